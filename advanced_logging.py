@@ -3,19 +3,89 @@ from discord.ext import commands
 from discord import app_commands
 import random
 from main import bot, has_permission, get_server_data, update_server_data, db
+from log_dispatcher import log_dispatcher
 from brand_config import BOT_FOOTER, BrandColors, VisualElements, create_success_embed, create_error_embed, create_info_embed, create_command_embed, create_warning_embed
 from datetime import datetime
 import os
 import sys
 import io
 import asyncio
+from collections import deque
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Global console output queue
-console_output_queue = asyncio.Queue() if asyncio.get_event_loop() else None
+# Live console mirroring configuration
+CONSOLE_FLUSH_INTERVAL = 5  # seconds between live-console batches
+CONSOLE_BUFFER_LINES = 500  # ring buffer size; oldest lines are dropped beyond this
+CONSOLE_MESSAGE_CHARS = 3900  # keeps a code-block batch inside the 4096-char embed description
+CONSOLE_MESSAGES_PER_FLUSH = 3
+CONSOLE_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+CONSOLE_LOG_LEVEL = CONSOLE_LEVELS.get(os.getenv('CONSOLE_LOG_LEVEL', 'INFO').upper(), 20)
+
+class ConsoleSink:
+    """Bounded ring buffer of console lines, drained in batches by console_output_logger"""
+    
+    def __init__(self, max_lines=CONSOLE_BUFFER_LINES, min_level=CONSOLE_LOG_LEVEL):
+        self.lines = deque(maxlen=max_lines)
+        self.min_level = min_level
+        self.dropped = 0
+        self.filtered = 0
+        self.accepted = 0
+    
+    @staticmethod
+    def classify(line):
+        """Infer a level from the markers the codebase already prints"""
+        if "[DEBUG]" in line:
+            return CONSOLE_LEVELS["DEBUG"]
+        if "❌" in line or "error" in line.lower() or "Traceback" in line:
+            return CONSOLE_LEVELS["ERROR"]
+        if "⚠️" in line:
+            return CONSOLE_LEVELS["WARNING"]
+        return CONSOLE_LEVELS["INFO"]
+    
+    def push(self, line, level=None):
+        if level is None:
+            level = self.classify(line)
+        if level < self.min_level:
+            self.filtered += 1
+            return
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+        self.accepted += 1
+    
+    def drain(self, max_chars=CONSOLE_MESSAGE_CHARS, max_batches=CONSOLE_MESSAGES_PER_FLUSH):
+        """Pop buffered lines into at most max_batches text blocks of max_chars each"""
+        batches = []
+        current = []
+        size = 0
+        while self.lines and len(batches) < max_batches:
+            line = self.lines[0]
+            if len(line) > max_chars:
+                line = line[:max_chars - 20] + " ... (truncated)"
+            if current and size + len(line) + 1 > max_chars:
+                batches.append("\n".join(current))
+                current, size = [], 0
+                continue
+            self.lines.popleft()
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            batches.append("\n".join(current))
+        return batches
+    
+    def stats(self):
+        return {
+            'buffered': len(self.lines),
+            'accepted': self.accepted,
+            'filtered': self.filtered,
+            'dropped': self.dropped
+        }
+
+console_sink = ConsoleSink()
+_console_dropped_reported = 0
 
 LOG_CHANNEL_TYPES = [
     "general", "moderation", "security",
@@ -95,36 +165,55 @@ async def initialize_global_logging():
         print(f"❌ Error initializing global logging: {e}")
 
 async def console_output_logger():
-    """Background task to process and log console outputs with jitter and optimization"""
-    buffer = []
+    """Background task that mirrors buffered console lines to live-console in batches"""
+    global _console_dropped_reported
     
     while True:
         try:
-            # Optimized interval: 5 seconds (from 2s) to reduce polling overhead
-            # Added jitter to prevent predictable request bursts
-            base_interval = 5 
-            jitter = random.uniform(0.5, 2.0)
-            await asyncio.sleep(base_interval + jitter)
+            # Jitter prevents predictable request bursts
+            await asyncio.sleep(CONSOLE_FLUSH_INTERVAL + random.uniform(0.5, 2.0))
             
-            if buffer:
-                # Batch send buffered outputs
-                combined = "\n".join(buffer[:5])
-                await log_console_output(combined)
-                buffer = buffer[5:] if len(buffer) > 5 else []
+            batches = console_sink.drain()
+            if console_sink.dropped > _console_dropped_reported and batches:
+                batches[-1] += f"\n... {console_sink.dropped - _console_dropped_reported} line(s) dropped (buffer full)"
+                _console_dropped_reported = console_sink.dropped
+            
+            for batch in batches:
+                await log_console_output(batch)
                 
         except Exception as e:
             print(f"Console logger error: {e}")
 
-def queue_console_output(message):
-    """Queue console output to be logged"""
-    try:
-        if message and message.strip():
-            asyncio.create_task(log_console_output(message))
-    except Exception as e:
-        print(f"Failed to queue console output: {e}")
+def queue_console_output(message, level=None):
+    """Queue console output to be logged (O(1), never awaits)"""
+    if message:
+        console_sink.push(message, level)
+
+# guild_id -> per-server global log channel id, so a log burst costs no database reads
+global_server_channels = {}
+_server_channel_locks = {}
 
 async def get_or_create_server_channel(global_category, guild):
     """Get or create per-server channel in global category"""
+    channel_id = global_server_channels.get(guild.id)
+    if channel_id:
+        channel = bot.get_channel(channel_id)
+        if channel:
+            return channel
+        del global_server_channels[guild.id]
+
+    # Serialize lookups per guild so concurrent logs don't each create a channel
+    lock = _server_channel_locks.setdefault(guild.id, asyncio.Lock())
+    async with lock:
+        if guild.id in global_server_channels:
+            return bot.get_channel(global_server_channels[guild.id])
+        channel = await _find_or_create_server_channel(global_category, guild)
+        if channel:
+            global_server_channels[guild.id] = channel.id
+        return channel
+
+async def _find_or_create_server_channel(global_category, guild):
+    """Resolve the per-server channel from the database, the category, or by creating it"""
     try:
         # Check if we already have this channel stored in database
         if db is not None:
@@ -200,10 +289,7 @@ async def send_global_log(log_type, message, guild=None):
         embed.add_field(name="📌 Log Type", value=log_type, inline=True)
         embed.set_footer(text=f"{BOT_FOOTER} • {guild.name}", icon_url=bot.user.display_avatar.url)
         
-        try:
-            await server_channel.send(embed=embed)
-        except Exception as e:
-            print(f"Error sending per-server global log: {e}")
+        log_dispatcher.enqueue(server_channel, embed)
             
     except Exception as e:
         print(f"Global logging error: {e}")
@@ -437,8 +523,8 @@ async def log_console_output(output_text):
             return
         
         # Truncate long outputs
-        if len(output_text) > 1000:
-            output_text = output_text[:1000] + "\n... (truncated)"
+        if len(output_text) > CONSOLE_MESSAGE_CHARS:
+            output_text = output_text[:CONSOLE_MESSAGE_CHARS] + "\n... (truncated)"
         
         embed = discord.Embed(
             description=f"```{output_text}```",
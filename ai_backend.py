@@ -0,0 +1,182 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from message_pipeline import LatencyHistogram
+from structured_logging import get_logger
+
+log = get_logger("ai_backend")
+
+# Configuration
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))  # upstream calls in flight across all guilds
+AI_GUILD_QUEUE_DEPTH = int(os.getenv('AI_GUILD_QUEUE_DEPTH', '5'))  # queued + running requests per guild
+AI_REQUEST_TIMEOUT = float(os.getenv('AI_REQUEST_TIMEOUT', '45'))  # seconds per upstream call
+TEXT_MODEL = "gemini-2.5-flash"
+IMAGE_MODEL = "gemini-2.5-flash-image"
+
+
+class AIQueueFull(Exception):
+    """Raised when a guild already has AI_GUILD_QUEUE_DEPTH requests waiting"""
+
+
+class GeminiBackend:
+    """Gemini calls that never block the event loop: native async client, thread pool as fallback"""
+
+    def __init__(self, client, types_module):
+        self.client = client
+        self.types = types_module
+        self._aio = getattr(client, 'aio', None)
+        self._pool = None if self._aio is not None else ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="gemini")
+
+    async def _generate(self, **kwargs):
+        if self._aio is not None:
+            return await self._aio.models.generate_content(**kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, lambda: self.client.models.generate_content(**kwargs))
+
+    async def generate_text(self, prompt):
+        response = await self._generate(model=TEXT_MODEL, contents=prompt)
+        return response.text
+
+    async def generate_image(self, prompt):
+        """Return (image bytes or None, model text or None)"""
+        response = await self._generate(
+            model=IMAGE_MODEL,
+            contents=prompt,
+            config=self.types.GenerateContentConfig(response_modalities=['IMAGE'])
+        )
+        if not response.candidates:
+            return None, None
+        content = response.candidates[0].content
+        if not content or not content.parts:
+            return None, None
+
+        text = None
+        for part in content.parts:
+            if part.text:
+                text = part.text
+            elif part.inline_data and part.inline_data.data:
+                return part.inline_data.data, text
+        return None, text
+
+
+class FakeBackend:
+    """Deterministic local backend for tests and offline runs (AI_BACKEND=fake)"""
+
+    def __init__(self, delay=0.0, reply="[fake] {prompt}", image=None):
+        self.delay = delay
+        self.reply = reply
+        self.image = image
+        self.calls = []
+
+    async def generate_text(self, prompt):
+        self.calls.append(('text', prompt))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.reply.format(prompt=prompt[-200:])
+
+    async def generate_image(self, prompt):
+        self.calls.append(('image', prompt))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.image, None
+
+
+class _GuildQueue:
+    __slots__ = ('lock', 'depth')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()  # asyncio.Lock wakes waiters in FIFO order
+        self.depth = 0
+
+
+class AIExecutor:
+    """Per-guild FIFO queues in front of a global concurrency limit, with timeouts and metrics"""
+
+    def __init__(self, max_concurrency=AI_MAX_CONCURRENCY, guild_queue_depth=AI_GUILD_QUEUE_DEPTH, timeout=AI_REQUEST_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.guild_queue_depth = guild_queue_depth
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._guilds = {}  # guild_id -> _GuildQueue, dropped once idle
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.queue_wait = LatencyHistogram()
+        self.latency = LatencyHistogram()
+
+    async def submit(self, guild_id, call, *args):
+        """Run `await call(*args)` in the guild's FIFO queue; raises AIQueueFull or asyncio.TimeoutError"""
+        queue = self._guilds.get(guild_id)
+        if queue is None:
+            queue = self._guilds[guild_id] = _GuildQueue()
+        if queue.depth >= self.guild_queue_depth:
+            self.rejected += 1
+            raise AIQueueFull(guild_id)
+
+        queue.depth += 1
+        enqueued = time.perf_counter()
+        try:
+            async with queue.lock:
+                async with self._semaphore:
+                    started = time.perf_counter()
+                    self.queue_wait.observe((started - enqueued) * 1000)
+                    self.in_flight += 1
+                    try:
+                        result = await asyncio.wait_for(call(*args), timeout=self.timeout)
+                    finally:
+                        self.in_flight -= 1
+                        self.latency.observe((time.perf_counter() - started) * 1000)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            queue.depth -= 1
+            if queue.depth == 0 and self._guilds.get(guild_id) is queue:
+                del self._guilds[guild_id]
+
+    def queue_depth(self, guild_id=None):
+        if guild_id is not None:
+            queue = self._guilds.get(guild_id)
+            return queue.depth if queue else 0
+        return sum(queue.depth for queue in self._guilds.values())
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queue_depth(),
+            'busy_guilds': len(self._guilds),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'errors': self.errors,
+            'queue_wait': self.queue_wait.summary(),
+            'latency': self.latency.summary()
+        }
+
+
+def create_backend(client, types_module):
+    """Pick the backend from AI_BACKEND (gemini|fake); None when Gemini is unavailable"""
+    if os.getenv('AI_BACKEND', 'gemini').lower() == 'fake':
+        log.info("Using fake AI backend")
+        return FakeBackend()
+    if client is None:
+        return None
+    return GeminiBackend(client, types_module)
+
+
+# Shared executor for every AI request the bot makes
+ai_executor = AIExecutor()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+
+# Configuration
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', '600'))  # seconds a cached answer stays valid
+AI_CACHE_SIZE = int(os.getenv('AI_CACHE_SIZE', '1000'))  # cached answers across all guilds
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Case-fold, drop punctuation and collapse whitespace so trivially different questions share a key"""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", prompt.casefold())).strip()
+
+
+class AIResponseCache:
+    """TTL + LRU cache of AI answers with single-flight deduplication of identical in-flight prompts"""
+
+    def __init__(self, max_size=AI_CACHE_SIZE, ttl=AI_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._in_flight = {}  # key -> asyncio.Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def make_key(self, guild_id, prompt, day):
+        """Return a cache key, or None when the prompt should not be served from cache
+
+        `day` buckets answers by date, since the prompt sent upstream carries today's date.
+        """
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return None
+        return (guild_id, normalized, day)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _store(self, key, response):
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key, compute):
+        """Serve from cache, join an identical in-flight request, or run `await compute()` once"""
+        while True:
+            response = self._lookup(key)
+            if response is not None:
+                self.hits += 1
+                return response
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                # Shield so one waiter being cancelled doesn't cancel the shared request
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leading request was cancelled; retry instead of failing this caller
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Failures reach every waiter but are never cached
+            future.set_exception(e)
+            future.exception()  # mark retrieved so an unjoined request doesn't log a warning
+            raise
+        else:
+            if response:
+                self._store(key, response)
+            future.set_result(response)
+            return response
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'in_flight': len(self._in_flight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': ((self.hits + self.coalesced) / lookups) if lookups else 0.0
+        }
+
+
+# Shared instance used by ai_chat.get_ai_response
+response_cache = AIResponseCache()
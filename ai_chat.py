@@ -3,6 +3,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import re
+import asyncio
+import time
 from datetime import datetime
 from google import genai
 from google.genai import types
@@ -12,6 +14,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from brand_config import BrandColors, BOT_FOOTER, VisualElements, create_info_embed, create_error_embed as brand_error_embed, create_warning_embed
+from structured_logging import get_logger
+from ai_backend import create_backend, ai_executor, AIQueueFull
+from ai_memory import conversation_memory, format_history
+from ai_cache import response_cache
+
+log = get_logger("ai_chat")
 
 # IMPORTANT: KEEP THIS COMMENT
 # Integration: blueprint:python_gemini
@@ -26,6 +34,12 @@ create_error_embed = None
 create_permission_denied_embed = None
 _setup_complete = False
 
+# guild_id -> AI channel id, bulk-loaded from db.ai_settings and kept current by set-ai-channel
+ai_channels = {}
+_ai_channels_loaded = False
+_ai_channels_retry_at = 0.0
+_ai_channels_lock = asyncio.Lock()
+
 # Initialize Gemini client
 try:
     gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
@@ -34,6 +48,9 @@ except Exception as e:
     gemini_client = None
     print(f"⚠️ Gemini AI client failed to initialize: {e}")
 
+# Every upstream call goes through ai_executor so it never blocks the event loop
+ai_backend = create_backend(gemini_client, types)
+
 def setup(bot_instance, db_instance, permission_func, log_func, error_embed_func, permission_denied_func):
     """Setup the AI chat module with bot instance and helper functions"""
     global bot, db, has_permission, log_action, create_error_embed, create_permission_denied_embed, _setup_complete
@@ -54,8 +71,45 @@ def setup(bot_instance, db_instance, permission_func, log_func, error_embed_func
         app_commands.describe(channel="Channel where AI will respond to messages")(set_ai_channel_command)
     )
     
+    bot.add_listener(load_ai_channels, 'on_ready')
+    bot.add_listener(forget_deleted_ai_channel, 'on_guild_channel_delete')
+    conversation_memory.attach_db(db)
+    
     _setup_complete = True
 
+async def load_ai_channels():
+    """Load every guild's AI channel into memory in a single query"""
+    global _ai_channels_loaded, _ai_channels_retry_at
+    
+    async with _ai_channels_lock:
+        if _ai_channels_loaded or db is None or time.monotonic() < _ai_channels_retry_at:
+            return
+        
+        try:
+            cursor = db.ai_settings.find({'ai_channel_id': {'$exists': True}}, {'guild_id': 1, 'ai_channel_id': 1})
+            async for doc in cursor:
+                if doc.get('guild_id') and doc.get('ai_channel_id'):
+                    ai_channels[int(doc['guild_id'])] = int(doc['ai_channel_id'])
+            _ai_channels_loaded = True
+            log.info("Loaded AI channels for %d guild(s)", len(ai_channels))
+            await conversation_memory.ensure_indexes()
+        except Exception:
+            # Back off so a database outage doesn't turn into a query per message
+            _ai_channels_retry_at = time.monotonic() + 60
+            log.exception("Failed to load AI channel settings")
+
+async def forget_deleted_ai_channel(channel):
+    """Drop a deleted AI channel from the map, its setting and its conversation memory"""
+    if ai_channels.get(channel.guild.id) != channel.id:
+        return
+    del ai_channels[channel.guild.id]
+    try:
+        if db is not None:
+            await db.ai_settings.update_one({'guild_id': str(channel.guild.id)}, {'$unset': {'ai_channel_id': ""}})
+        await conversation_memory.clear(channel.id)
+    except Exception:
+        log.exception("Failed to clear deleted AI channel %s", channel.id)
+
 # Image generation keywords
 IMAGE_KEYWORDS = [
     'create', 'generate', 'make', 'draw', 'design', 'paint', 'sketch',
@@ -82,88 +136,97 @@ def is_image_request(message_content: str) -> bool:
     keyword_count = sum(1 for keyword in IMAGE_KEYWORDS if keyword in content_lower)
     return keyword_count >= 2
 
-async def generate_ai_image(prompt: str, temp_path: str) -> bool:
+async def generate_ai_image(prompt: str, temp_path: str, guild_id=None) -> bool:
     """Generate image using Gemini"""
     try:
-        if not gemini_client:
-            print(f"❌ [AI IMAGE ERROR] Gemini client is None")
+        if not ai_backend:
+            log.error("Image generation requested but no AI backend is available")
             return False
         
-        print(f"🎨 [AI IMAGE] Calling Gemini API for image generation...")
+        log.debug("Calling AI backend for image generation")
         # IMPORTANT: Use gemini-2.5-flash-image for image generation (production model)
         # Integration: blueprint:python_gemini
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash-image",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=['IMAGE']
-            )
-        )
-        
-        if not response.candidates:
-            print(f"❌ [AI IMAGE ERROR] No candidates in response")
-            return False
+        image_data, model_text = await ai_executor.submit(guild_id, ai_backend.generate_image, prompt)
+        if model_text:
+            log.debug("Image model response text: %.100s", model_text)
         
-        content = response.candidates[0].content
-        if not content or not content.parts:
-            print(f"❌ [AI IMAGE ERROR] No content or parts in response")
+        if not image_data:
+            log.warning("Image generation returned no inline data")
             return False
         
-        for part in content.parts:
-            if part.text:
-                print(f"🎨 [AI IMAGE] Model response text: {part.text[:100]}...")
-            elif part.inline_data and part.inline_data.data:
-                with open(temp_path, 'wb') as f:
-                    f.write(part.inline_data.data)
-                print(f"✅ [AI IMAGE] Image saved to {temp_path}")
-                return True
-        
-        print(f"❌ [AI IMAGE ERROR] No inline_data found in response parts")
+        await asyncio.to_thread(_write_file, temp_path, image_data)
+        log.debug("Image saved to %s", temp_path)
+        return True
+    except AIQueueFull:
+        log.info("Image request rejected, AI queue full for guild %s", guild_id)
+        return False
+    except asyncio.TimeoutError:
+        log.warning("Image generation timed out for guild %s", guild_id)
         return False
     except Exception as e:
         error_str = str(e)
-        print(f"❌ [AI IMAGE ERROR] {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Image generation failed")
         
         # Check if it's a quota error
         if "RESOURCE_EXHAUSTED" in error_str or "quota" in error_str.lower():
-            print(f"⚠️ [AI IMAGE] Quota exceeded - user needs to wait or upgrade their plan")
+            log.warning("Image generation quota exceeded")
         
         return False
 
-async def get_ai_response(prompt: str) -> str:
-    """Get AI text response from Gemini"""
+def _write_file(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+# Fixed replies for failed requests; these are never stored as conversation history
+AI_REPLY_OFFLINE = "**✗ AI CORE OFFLINE**\nThe quantum AI core is currently unavailable. Please contact a server admin."
+AI_REPLY_BUSY = "**⚠ QUANTUM CORE BUSY**\nToo many requests are queued for this server. Please try again in a moment."
+AI_REPLY_TIMEOUT = "**⚠ QUANTUM CORE TIMEOUT**\nThe AI core took too long to respond. Please try again."
+AI_REPLY_QUOTA = "**⚠ QUANTUM CORE LIMIT REACHED**\nAI quota temporarily exhausted. Please try again in a few moments."
+AI_REPLY_ERROR = "**✗ PROCESSING ERROR**\nThe quantum core encountered an anomaly. Please try again."
+AI_REPLY_EMPTY = "I couldn't generate a response. Please try again."
+AI_FAILURE_REPLIES = frozenset({AI_REPLY_OFFLINE, AI_REPLY_BUSY, AI_REPLY_TIMEOUT, AI_REPLY_QUOTA, AI_REPLY_ERROR, AI_REPLY_EMPTY})
+
+async def get_ai_response(prompt: str, guild_id=None, history=None) -> str:
+    """Get AI text response from Gemini, optionally continuing a conversation history"""
     try:
-        if not gemini_client:
-            print(f"❌ [AI TEXT ERROR] Gemini client is None")
-            return "**✗ AI CORE OFFLINE**\nThe quantum AI core is currently unavailable. Please contact a server admin."
+        if not ai_backend:
+            log.error("Text generation requested but no AI backend is available")
+            return AI_REPLY_OFFLINE
         
         # Add current context (date/time/year) to the prompt
         now = datetime.now()
         current_time_context = f"[System Context: Today is {now.strftime('%A, %B %d, %Y')}. The current time is {now.strftime('%I:%M %p')}. You are RXT ENGINE, a futuristic AI core.]\n\n"
-        full_prompt = current_time_context + prompt
+        prompt_context = current_time_context + format_history(history)
+        full_prompt = prompt_context + prompt
         
-        print(f"💬 [AI TEXT] Calling Gemini API for text generation with current context...")
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=full_prompt
-        )
+        async def request():
+            log.debug("Calling AI backend for text generation")
+            return await ai_executor.submit(guild_id, ai_backend.generate_text, full_prompt)
         
-        result = response.text or "I couldn't generate a response. Please try again."
-        print(f"✅ [AI TEXT] Got response: {result[:100]}...")
+        # Identical standalone questions share one upstream call and are answered from cache;
+        # a conversation history changes the answer, so those prompts always go upstream
+        cache_key = None if history else response_cache.make_key(guild_id, prompt, now.date())
+        if cache_key is None:
+            result = await request()
+        else:
+            result = await response_cache.get_or_compute(cache_key, request)
+        
+        result = result or AI_REPLY_EMPTY
+        log.debug("Text response received (%d chars)", len(result))
         return result
+    except AIQueueFull:
+        return AI_REPLY_BUSY
+    except asyncio.TimeoutError:
+        return AI_REPLY_TIMEOUT
     except Exception as e:
         error_str = str(e)
-        print(f"❌ [AI TEXT ERROR] {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Text generation failed")
         
         # Check if it's a quota error
         if "RESOURCE_EXHAUSTED" in error_str or "quota" in error_str.lower():
-            return "**⚠ QUANTUM CORE LIMIT REACHED**\nAI quota temporarily exhausted. Please try again in a few moments."
+            return AI_REPLY_QUOTA
         
-        return "**✗ PROCESSING ERROR**\nThe quantum core encountered an anomaly. Please try again."
+        return AI_REPLY_ERROR
 
 async def set_ai_channel_command(interaction: discord.Interaction, channel: discord.TextChannel):
     """Set the AI chat channel for the server (registered dynamically during setup)"""
@@ -185,6 +248,11 @@ async def set_ai_channel_command(interaction: discord.Interaction, channel: disc
                 }},
                 upsert=True
             )
+        previous_channel_id = ai_channels.get(interaction.guild.id)
+        ai_channels[interaction.guild.id] = channel.id
+        if previous_channel_id and previous_channel_id != channel.id:
+            # The old channel no longer talks to the AI, so its history is dropped
+            await conversation_memory.clear(previous_channel_id)
         
         embed = discord.Embed(
             title="🤖 AI Chat Channel Set",
@@ -234,29 +302,21 @@ async def handle_ai_message(message):
     
     # Check if AI is enabled for this server
     if db is None:
-        print(f"⚠️ [AI CHAT] DB is None, skipping message from {message.author}")
+        return
+    
+    if not _ai_channels_loaded:
+        await load_ai_channels()
+    
+    # Ordinary chat outside the AI channel stops here with a dict lookup
+    if ai_channels.get(message.guild.id) != message.channel.id:
         return
     
     try:
-        ai_settings = await db.ai_settings.find_one({'guild_id': str(message.guild.id)})
-        print(f"🔍 [AI CHAT DEBUG] Guild ID: {message.guild.id}, Channel ID: {message.channel.id}, AI Settings: {ai_settings}")
-        
-        # No AI channel set
-        if not ai_settings or not ai_settings.get('ai_channel_id'):
-            print(f"⚠️ [AI CHAT] No AI settings found for guild {message.guild.id}")
-            return
+        log.debug("Processing message %s in AI channel %s", message.id, message.channel.id)
         
-        # Check if message is in the AI channel
-        if str(message.channel.id) != ai_settings.get('ai_channel_id'):
-            print(f"⚠️ [AI CHAT] Message in wrong channel: {message.channel.id} != {ai_settings.get('ai_channel_id')}")
-            return
-        
-        print(f"✅ [AI CHAT] Processing message in AI channel: {message.content[:100]}")
-        print(f"🔍 [AI CHAT] Gemini client status: {gemini_client is not None}")
-        
-        # Check if Gemini client is initialized
-        if not gemini_client:
-            print(f"❌ [AI CHAT] Gemini client is None!")
+        # Check if an AI backend is available
+        if not ai_backend:
+            log.error("AI channel message received but no AI backend is available")
             embed = discord.Embed(
                 title="✗ AI SERVICE OFFLINE",
                 description=f"The AI core is currently unavailable.\n\n**Action Required:** Server admin needs to configure the API key.\n{VisualElements.CIRCUIT_LINE}",
@@ -270,7 +330,6 @@ async def handle_ai_message(message):
         async with message.channel.typing():
             # Check if this is an image generation request
             if is_image_request(message.content):
-                print(f"🎨 [AI CHAT] Detected image request: {message.content[:50]}")
                 # Image generation disabled - show simple themed message
                 embed = discord.Embed(
                     title="◆ IMAGE GENERATION UNAVAILABLE",
@@ -278,12 +337,13 @@ async def handle_ai_message(message):
                 )
                 embed.set_footer(text=BOT_FOOTER)
                 await message.reply(embed=embed)
-                print(f"🎨 [AI CHAT] Sent unavailable message for image request")
+                log.debug("Declined image request %s", message.id)
             else:
                 # Generate text response
-                print(f"💬 [AI CHAT] Generating text response for: {message.content[:50]}")
-                response_text = await get_ai_response(message.content)
-                print(f"💬 [AI CHAT] Got response ({len(response_text)} chars): {response_text[:100]}...")
+                history = await conversation_memory.get_history(message.channel.id)
+                response_text = await get_ai_response(message.content, message.guild.id, history)
+                if response_text not in AI_FAILURE_REPLIES:
+                    await conversation_memory.record_exchange(message.channel.id, message.author.display_name, message.content, response_text)
                 
                 # Split response if too long (Discord limit is 2000 chars)
                 if len(response_text) > 2000:
@@ -291,10 +351,9 @@ async def handle_ai_message(message):
                     chunks = [response_text[i:i+2000] for i in range(0, len(response_text), 2000)]
                     for chunk in chunks:
                         await message.reply(chunk)
-                    print(f"✅ [AI CHAT] Sent {len(chunks)} message chunks")
+                    log.debug("Sent %d response chunks for message %s", len(chunks), message.id)
                 else:
                     await message.reply(response_text)
-                    print(f"✅ [AI CHAT] Sent text response")
                 
                 # Log the interaction
                 await log_action(
@@ -314,8 +373,8 @@ async def handle_ai_message(message):
                 except:
                     pass
                     
-    except Exception as e:
-        print(f"❌ [AI CHAT ERROR] {e}")
+    except Exception:
+        log.exception("AI chat failed for message %s", message.id)
         embed = discord.Embed(
             title="✗ PROCESSING ERROR",
             description=f"The quantum core encountered an anomaly while processing your request.\n\nPlease try again.\n{VisualElements.CIRCUIT_LINE}",
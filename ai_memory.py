@@ -0,0 +1,152 @@
+import os
+import time
+from collections import OrderedDict, deque
+
+from structured_logging import get_logger
+
+log = get_logger("ai_memory")
+
+# Configuration
+AI_CONTEXT_TOKENS = int(os.getenv('AI_CONTEXT_TOKENS', '1500'))  # history budget per prompt
+AI_CONTEXT_TURN_CHARS = 800  # longer turns are clipped before storage
+AI_CONTEXT_MAX_CHANNELS = int(os.getenv('AI_CONTEXT_MAX_CHANNELS', '500'))
+AI_CONTEXT_IDLE_SECONDS = int(os.getenv('AI_CONTEXT_IDLE_SECONDS', '3600'))
+AI_CONTEXT_PERSIST = os.getenv('AI_CONTEXT_PERSIST', '').lower() in ('1', 'true', 'yes')
+AI_CONTEXT_PERSIST_TURNS = 20  # turns kept per channel in Mongo
+AI_CONTEXT_PERSIST_TTL = 7 * 24 * 3600  # stored conversations expire after a week without activity
+CHARS_PER_TOKEN = 4  # rough estimate, good enough for budgeting
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class _Channel:
+    __slots__ = ('turns', 'tokens', 'last_used')
+
+    def __init__(self):
+        self.turns = deque()  # (speaker, text, tokens)
+        self.tokens = 0
+        self.last_used = time.monotonic()
+
+
+class ConversationMemory:
+    """Rolling per-channel AI conversation history trimmed to a token budget, with LRU eviction"""
+
+    def __init__(self, token_budget=AI_CONTEXT_TOKENS, max_channels=AI_CONTEXT_MAX_CHANNELS,
+                 idle_seconds=AI_CONTEXT_IDLE_SECONDS):
+        self.token_budget = token_budget
+        self.max_channels = max_channels
+        self.idle_seconds = idle_seconds
+        self.collection = None  # set by attach_db when persistence is enabled
+        self._channels = OrderedDict()  # channel_id -> _Channel
+        self.evictions = 0
+        self.trimmed_turns = 0
+
+    def attach_db(self, db):
+        if AI_CONTEXT_PERSIST and db is not None:
+            self.collection = db.ai_conversations
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        try:
+            await self.collection.create_index('channel_id', unique=True)
+            await self.collection.create_index('updated_at', expireAfterSeconds=AI_CONTEXT_PERSIST_TTL)
+        except Exception:
+            log.exception("Failed to create ai_conversations indexes")
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._channels:
+            channel_id, channel = next(iter(self._channels.items()))
+            if len(self._channels) <= self.max_channels and now - channel.last_used < self.idle_seconds:
+                break
+            del self._channels[channel_id]
+            self.evictions += 1
+
+    def _add(self, channel, speaker, text):
+        text = text[:AI_CONTEXT_TURN_CHARS]
+        tokens = estimate_tokens(text)
+        channel.turns.append((speaker, text, tokens))
+        channel.tokens += tokens
+        while channel.tokens > self.token_budget and len(channel.turns) > 1:
+            _, _, dropped = channel.turns.popleft()
+            channel.tokens -= dropped
+            self.trimmed_turns += 1
+
+    async def _get(self, channel_id):
+        channel = self._channels.get(channel_id)
+        if channel is not None:
+            self._channels.move_to_end(channel_id)
+            channel.last_used = time.monotonic()
+            return channel
+
+        channel = _Channel()
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({'channel_id': str(channel_id)}, {'turns': 1})
+                for turn in (doc or {}).get('turns', []):
+                    self._add(channel, turn.get('s', 'user'), turn.get('t', ''))
+            except Exception:
+                log.exception("Failed to load conversation history for channel %s", channel_id)
+        self._channels[channel_id] = channel
+        self._evict()
+        return channel
+
+    async def get_history(self, channel_id):
+        """Return [(speaker, text), ...] oldest first, already within the token budget"""
+        channel = await self._get(channel_id)
+        return [(speaker, text) for speaker, text, _ in channel.turns]
+
+    async def record_exchange(self, channel_id, user_label, user_text, reply_text):
+        """Store one user message and the bot's reply; persists just the two new turns"""
+        channel = await self._get(channel_id)
+        user_turn = f"{user_label}: {user_text}"
+        self._add(channel, 'user', user_turn)
+        self._add(channel, 'bot', reply_text)
+
+        if self.collection is not None:
+            try:
+                await self.collection.update_one(
+                    {'channel_id': str(channel_id)},
+                    {
+                        '$push': {'turns': {
+                            '$each': [
+                                {'s': 'user', 't': user_turn[:AI_CONTEXT_TURN_CHARS]},
+                                {'s': 'bot', 't': reply_text[:AI_CONTEXT_TURN_CHARS]}
+                            ],
+                            '$slice': -AI_CONTEXT_PERSIST_TURNS
+                        }},
+                        '$currentDate': {'updated_at': True}
+                    },
+                    upsert=True
+                )
+            except Exception:
+                log.exception("Failed to persist conversation history for channel %s", channel_id)
+
+    async def clear(self, channel_id):
+        self._channels.pop(channel_id, None)
+        if self.collection is not None:
+            await self.collection.delete_one({'channel_id': str(channel_id)})
+
+    def stats(self):
+        return {
+            'channels': len(self._channels),
+            'turns': sum(len(channel.turns) for channel in self._channels.values()),
+            'evictions': self.evictions,
+            'trimmed_turns': self.trimmed_turns,
+            'persistent': self.collection is not None
+        }
+
+
+def format_history(history, bot_name="RXT ENGINE"):
+    """Render history as a compact transcript block for the prompt"""
+    if not history:
+        return ""
+    lines = [text if speaker == 'user' else f"{bot_name}: {text}" for speaker, text in history]
+    return "[Conversation so far]\n" + "\n".join(lines) + "\n[End of conversation]\n\n"
+
+
+# Shared instance used by ai_chat
+conversation_memory = ConversationMemory()
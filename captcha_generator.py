@@ -1,8 +1,11 @@
 import random
 import string
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw, ImageFilter
 import io
-import discord
+from image_assets import assets
+
+# Exclude confusing characters: 0, O, I, l, 1
+CAPTCHA_CHARS = ''.join(c for c in string.ascii_uppercase + string.digits if c not in 'O0Il1')
 
 class CaptchaGenerator:
     """Generate CAPTCHA images with random text and distortions"""
@@ -11,17 +14,17 @@ class CaptchaGenerator:
         self.width = 300
         self.height = 100
         self.char_length = 6
+        self.layer_name = f'captcha_{self.width}x{self.height}'
+        assets.register_layer(self.layer_name, lambda: Image.new('RGB', (self.width, self.height), color=(20, 20, 40)))
         
     def generate_text(self):
         """Generate random CAPTCHA text (alphanumeric, no ambiguous characters)"""
-        # Exclude confusing characters: 0, O, I, l, 1
-        chars = ''.join([c for c in string.ascii_uppercase + string.digits if c not in 'O0Il1'])
-        return ''.join(random.choice(chars) for _ in range(self.char_length))
+        return ''.join(random.choice(CAPTCHA_CHARS) for _ in range(self.char_length))
     
     def create_captcha(self, text):
         """Create CAPTCHA image with text"""
-        # Create base image
-        image = Image.new('RGB', (self.width, self.height), color=(20, 20, 40))
+        # Copy of the shared base layer
+        image = assets.layer(self.layer_name)
         draw = ImageDraw.Draw(image)
         
         # Add noise lines
@@ -38,14 +41,8 @@ class CaptchaGenerator:
             y = random.randint(0, self.height)
             draw.point((x, y), fill=(random.randint(100, 200), random.randint(100, 200), random.randint(100, 255)))
         
-        # Try to load a font, fallback to default if not available
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 48)
-        except:
-            try:
-                font = ImageFont.truetype("arial.ttf", 48)
-            except:
-                font = ImageFont.load_default()
+        # Font is loaded once per render thread by the asset registry
+        font = assets.font(48)
         
         # Calculate text position to center it
         text_bbox = draw.textbbox((0, 0), text, font=font)
@@ -85,20 +82,14 @@ class CaptchaGenerator:
         
         return image
     
-    def get_captcha_file(self, text):
-        """Convert CAPTCHA image to Discord file"""
+    def render_png(self, text):
+        """Render CAPTCHA text to PNG bytes (thread-safe, no Discord objects)"""
         image = self.create_captcha(text)
-        
-        # Save to bytes buffer
         buffer = io.BytesIO()
         image.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        # Create Discord file
-        return discord.File(buffer, filename='captcha.png')
+        return buffer.getvalue()
     
-    def generate(self):
-        """Generate complete CAPTCHA (text + image file)"""
+    def generate_png(self):
+        """Generate CAPTCHA text and its PNG bytes; suitable for a render thread"""
         text = self.generate_text()
-        file = self.get_captcha_file(text)
-        return text, file
+        return text, self.render_png(text)
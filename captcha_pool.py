@@ -0,0 +1,77 @@
+import asyncio
+import os
+from collections import deque
+
+from captcha_generator import CaptchaGenerator
+from render_pool import render_executor, RenderBusy
+from structured_logging import get_logger
+
+log = get_logger("captcha")
+
+# Configuration
+CAPTCHA_POOL_DEPTH = int(os.getenv('CAPTCHA_POOL_DEPTH', '50'))  # ready-to-send CAPTCHAs kept in memory
+CAPTCHA_POOL_RETRY = 1.0  # seconds the refill worker backs off when the render pool is busy or failing
+
+
+class CaptchaPool:
+    """Pre-rendered (text, PNG bytes) CAPTCHAs, each handed out once and refilled in the background"""
+
+    def __init__(self, generator, depth=CAPTCHA_POOL_DEPTH):
+        self.generator = generator
+        self.depth = depth
+        self._ready = deque()
+        self._wanted = None  # asyncio.Event, created on the running loop
+        self._task = None
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.refill_errors = 0
+
+    def start(self):
+        """Start (or restart) the refill worker; needs a running event loop"""
+        if self._wanted is None:
+            self._wanted = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill())
+        self._wanted.set()
+
+    async def _refill(self):
+        while True:
+            await self._wanted.wait()
+            self._wanted.clear()
+            while len(self._ready) < self.depth:
+                try:
+                    # One render at a time so refilling never takes more than one render thread
+                    self._ready.append(await render_executor.run('captcha_pool', self.generator.generate_png))
+                    self.generated += 1
+                except RenderBusy:
+                    await asyncio.sleep(CAPTCHA_POOL_RETRY)
+                except Exception:
+                    self.refill_errors += 1
+                    log.exception("CAPTCHA pool refill failed")
+                    await asyncio.sleep(CAPTCHA_POOL_RETRY)
+
+    async def take(self):
+        """Return (text, png_bytes): from the pool when possible, rendered on demand otherwise"""
+        self.start()
+        if self._ready:
+            self.hits += 1
+            return self._ready.popleft()
+        self.misses += 1
+        return await render_executor.run('captcha', self.generator.generate_png)
+
+    def stats(self):
+        taken = self.hits + self.misses
+        return {
+            'ready': len(self._ready),
+            'depth': self.depth,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / taken) if taken else 0.0,
+            'generated': self.generated,
+            'refill_errors': self.refill_errors
+        }
+
+
+# Shared pool used by the verification flow
+captcha_pool = CaptchaPool(CaptchaGenerator())
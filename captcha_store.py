@@ -0,0 +1,188 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from structured_logging import get_logger
+
+log = get_logger("captcha")
+
+# Configuration
+CAPTCHA_TTL = int(os.getenv('CAPTCHA_TTL', '600'))  # seconds an unsolved challenge stays valid
+CAPTCHA_MAX_PENDING = int(os.getenv('CAPTCHA_MAX_PENDING', '20000'))  # memory cap across all guilds
+CAPTCHA_MAX_ATTEMPTS = int(os.getenv('CAPTCHA_MAX_ATTEMPTS', '5'))  # wrong answers before a member is locked out until expiry
+CAPTCHA_PERSIST = os.getenv('CAPTCHA_PERSIST', '').lower() in ('1', 'true', 'yes')
+
+# verify() results
+CAPTCHA_OK = 'ok'
+CAPTCHA_WRONG = 'wrong'
+CAPTCHA_EXPIRED = 'expired'
+CAPTCHA_LOCKED = 'locked'
+
+
+class _Challenge:
+    __slots__ = ('text', 'attempts', 'expires_at')
+
+    def __init__(self, text, attempts, expires_at):
+        self.text = text
+        self.attempts = attempts
+        self.expires_at = expires_at  # monotonic
+
+
+class CaptchaChallengeStore:
+    """Pending CAPTCHA answers per (guild, user) with a fixed TTL, attempt counting and a size cap
+
+    Every entry lives exactly `ttl` seconds after its last issue, so insertion order is
+    expiry order and a sweep only ever pops from the front of the OrderedDict.
+    """
+
+    def __init__(self, ttl=CAPTCHA_TTL, max_entries=CAPTCHA_MAX_PENDING, max_attempts=CAPTCHA_MAX_ATTEMPTS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_attempts = max_attempts
+        self.collection = None  # set by attach_db when persistence is enabled
+        self._challenges = OrderedDict()  # (guild_id, user_id) -> _Challenge
+        self.issued = 0
+        self.solved = 0
+        self.failed = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def attach_db(self, db):
+        if CAPTCHA_PERSIST and db is not None:
+            self.collection = db.captcha_challenges
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        try:
+            await self.collection.create_index([('guild_id', 1), ('user_id', 1)], unique=True)
+            await self.collection.create_index('expires_at', expireAfterSeconds=0)
+        except Exception:
+            log.exception("Failed to create captcha_challenges indexes")
+
+    def _sweep(self, now):
+        while self._challenges:
+            key, challenge = next(iter(self._challenges.items()))
+            if challenge.expires_at > now and len(self._challenges) <= self.max_entries:
+                break
+            del self._challenges[key]
+            if challenge.expires_at <= now:
+                self.expired += 1
+            else:
+                self.evicted += 1
+
+    async def _load(self, key, now):
+        challenge = self._challenges.get(key)
+        if challenge is not None:
+            if challenge.expires_at > now:
+                return challenge
+            del self._challenges[key]
+            self.expired += 1
+            return None
+        if self.collection is None:
+            return None
+        try:
+            doc = await self.collection.find_one({'guild_id': key[0], 'user_id': key[1]})
+        except Exception:
+            log.exception("Failed to load CAPTCHA challenge for %s", key)
+            return None
+        if not doc:
+            return None
+        expires_at = doc['expires_at']
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        if remaining <= 0:
+            return None
+        challenge = _Challenge(doc.get('text'), doc.get('attempts', 0), now + remaining)
+        self._challenges[key] = challenge
+        self._challenges.move_to_end(key)
+        return challenge
+
+    async def _persist(self, key, challenge):
+        if self.collection is None:
+            return
+        try:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=max(0.0, challenge.expires_at - time.monotonic()))
+            await self.collection.update_one(
+                {'guild_id': key[0], 'user_id': key[1]},
+                {'$set': {'text': challenge.text, 'attempts': challenge.attempts, 'expires_at': expires_at}},
+                upsert=True
+            )
+        except Exception:
+            log.exception("Failed to persist CAPTCHA challenge for %s", key)
+
+    async def lockout_remaining(self, guild_id, user_id):
+        """Seconds until a member who used up their attempts may try again (0 when allowed)"""
+        now = time.monotonic()
+        challenge = await self._load((str(guild_id), str(user_id)), now)
+        if challenge is None or challenge.attempts < self.max_attempts:
+            return 0
+        return challenge.expires_at - now
+
+    async def issue(self, guild_id, user_id, text):
+        """Store a new challenge, replacing any previous one; failed attempts so far are kept"""
+        key = (str(guild_id), str(user_id))
+        now = time.monotonic()
+        previous = await self._load(key, now)
+        challenge = _Challenge(text, previous.attempts if previous else 0, now + self.ttl)
+        self._challenges[key] = challenge
+        self._challenges.move_to_end(key)
+        self.issued += 1
+        self._sweep(now)
+        await self._persist(key, challenge)
+
+    async def get(self, guild_id, user_id):
+        """The pending answer, or None when there is no live challenge"""
+        challenge = await self._load((str(guild_id), str(user_id)), time.monotonic())
+        return challenge.text if challenge else None
+
+    async def verify(self, guild_id, user_id, answer):
+        """Check an answer; returns CAPTCHA_OK, CAPTCHA_WRONG, CAPTCHA_EXPIRED or CAPTCHA_LOCKED"""
+        key = (str(guild_id), str(user_id))
+        challenge = await self._load(key, time.monotonic())
+        if challenge is None:
+            return CAPTCHA_EXPIRED
+        if challenge.attempts >= self.max_attempts:
+            return CAPTCHA_LOCKED
+        if challenge.text is None:
+            return CAPTCHA_EXPIRED  # already answered wrongly; a new CAPTCHA is needed
+
+        if answer == challenge.text:
+            self.solved += 1
+            await self.discard(guild_id, user_id)
+            return CAPTCHA_OK
+
+        # A wrong answer burns this challenge; the attempt count survives until expiry
+        self.failed += 1
+        challenge.text = None
+        challenge.attempts += 1
+        await self._persist(key, challenge)
+        return CAPTCHA_LOCKED if challenge.attempts >= self.max_attempts else CAPTCHA_WRONG
+
+    async def discard(self, guild_id, user_id):
+        key = (str(guild_id), str(user_id))
+        self._challenges.pop(key, None)
+        if self.collection is not None:
+            try:
+                await self.collection.delete_one({'guild_id': key[0], 'user_id': key[1]})
+            except Exception:
+                log.exception("Failed to delete CAPTCHA challenge for %s", key)
+
+    def stats(self):
+        self._sweep(time.monotonic())
+        return {
+            'pending': len(self._challenges),
+            'max_entries': self.max_entries,
+            'issued': self.issued,
+            'solved': self.solved,
+            'failed': self.failed,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'persistent': self.collection is not None
+        }
+
+
+# Shared store used by the verification flow
+captcha_challenges = CaptchaChallengeStore()
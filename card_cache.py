@@ -0,0 +1,128 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from structured_logging import get_logger
+
+log = get_logger("cards")
+
+# Configuration
+PROFILE_CARD_CACHE_BYTES = int(os.getenv('PROFILE_CARD_CACHE_BYTES', str(32 * 1024 * 1024)))  # rendered PNGs kept in memory
+AVATAR_CACHE_BYTES = int(os.getenv('AVATAR_CACHE_BYTES', str(16 * 1024 * 1024)))  # downloaded avatar/icon bytes
+AVATAR_CACHE_TTL = int(os.getenv('AVATAR_CACHE_TTL', '3600'))  # seconds before an avatar is revalidated with its ETag
+AVATAR_FETCH_TIMEOUT = 10
+
+
+class ByteBudgetLRU:
+    """LRU map whose capacity is a total byte size rather than an entry count"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (size, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[0]
+        self._entries[key] = (size, value)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0
+        }
+
+
+class AvatarCache:
+    """Avatar and icon bytes by URL; expired entries are revalidated with If-None-Match"""
+
+    def __init__(self, max_bytes=AVATAR_CACHE_BYTES, ttl=AVATAR_CACHE_TTL):
+        self.ttl = ttl
+        self._lru = ByteBudgetLRU(max_bytes)  # url -> (expires_at, etag, data)
+        self._session = None
+        self.downloads = 0
+        self.revalidated = 0
+        self.failures = 0
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=AVATAR_FETCH_TIMEOUT))
+        return self._session
+
+    async def get(self, url):
+        """Return the image bytes for url, or None when it cannot be downloaded"""
+        entry = self._lru.get(url)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[2]
+
+        headers = {}
+        if entry is not None and entry[1]:
+            headers['If-None-Match'] = entry[1]
+        try:
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    self.revalidated += 1
+                    data, etag = entry[2], entry[1]
+                elif response.status == 200:
+                    self.downloads += 1
+                    data, etag = await response.read(), response.headers.get('ETag')
+                else:
+                    self.failures += 1
+                    return entry[2] if entry is not None else None
+        except Exception as e:
+            self.failures += 1
+            log.warning("Error downloading avatar %s: %s", url, e)
+            # A stale copy beats the placeholder avatar
+            return entry[2] if entry is not None else None
+
+        self._lru.put(url, (time.monotonic() + self.ttl, etag, data), len(data))
+        return data
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def stats(self):
+        return dict(self._lru.stats(), downloads=self.downloads, revalidated=self.revalidated, failures=self.failures)
+
+
+def card_cache_key(kind, *parts):
+    """Stable content hash of everything a card draws"""
+    return hashlib.sha1(repr((kind,) + parts).encode('utf-8')).hexdigest()
+
+
+# Shared instances used by profile_cards
+avatar_cache = AvatarCache()
+rendered_cards = ByteBudgetLRU(PROFILE_CARD_CACHE_BYTES)
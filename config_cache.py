@@ -0,0 +1,96 @@
+import copy
+import os
+import time
+from collections import OrderedDict
+
+# Configuration
+SERVER_CACHE_TTL = int(os.getenv('SERVER_CACHE_TTL', '300'))  # seconds
+SERVER_CACHE_SIZE = int(os.getenv('SERVER_CACHE_SIZE', '5000'))  # guilds
+
+
+class ServerConfigCache:
+    """Per-guild LRU cache of server configuration documents with TTL expiry"""
+
+    def __init__(self, max_size=SERVER_CACHE_SIZE, ttl=SERVER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # guild_id -> (expires_at, document)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.writes = 0  # bumped on every write so in-flight loads can detect they raced one
+
+    def get(self, guild_id):
+        """Return a private copy of the cached document, or None on a miss"""
+        guild_id = str(guild_id)
+        entry = self._entries.get(guild_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, document = entry
+        if expires_at < time.monotonic():
+            del self._entries[guild_id]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(guild_id)
+        self.hits += 1
+        # Callers routinely mutate nested dicts before writing back, so never hand out the cached object
+        return copy.deepcopy(document)
+
+    def put(self, guild_id, document, loaded_at_write=None):
+        """Store a freshly loaded document, unless a write landed while it was being loaded"""
+        if loaded_at_write is not None and loaded_at_write != self.writes:
+            return
+        guild_id = str(guild_id)
+        self._entries[guild_id] = (time.monotonic() + self.ttl, copy.deepcopy(document))
+        self._entries.move_to_end(guild_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def apply_update(self, guild_id, data):
+        """Write-through for a `$set` update; only guilds already cached are touched"""
+        guild_id = str(guild_id)
+        self.writes += 1
+        entry = self._entries.get(guild_id)
+        if entry is None:
+            return
+
+        expires_at, document = entry
+        for key, value in data.items():
+            if '.' in key:
+                # Dotted paths are not mirrored locally, reload on next read instead
+                self.invalidate(guild_id)
+                return
+            document[key] = copy.deepcopy(value)
+
+    def invalidate(self, guild_id=None):
+        """Drop one guild, or the whole cache when no guild is given"""
+        self.writes += 1
+        if guild_id is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+        elif self._entries.pop(str(guild_id), None) is not None:
+            self.invalidations += 1
+
+    def stats(self):
+        """Return hit/miss counters for diagnostics"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+
+# Shared instance; lives outside main.py so `python main.py` and `from main import ...` see the same cache
+server_cache = ServerConfigCache()
@@ -0,0 +1,84 @@
+import threading
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Configuration
+FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/System/Library/Fonts/Arial.ttf",
+    "arial.ttf"
+)
+
+
+class AssetRegistry:
+    """Process-wide fonts, masks and pre-rendered static layers for image generation
+
+    Fonts are cached per render thread because FreeType faces are not safe to share
+    between threads; static layers are built once and handed out as copies.
+    """
+
+    def __init__(self, font_paths=FONT_PATHS):
+        self.font_paths = font_paths
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._builders = {}  # name -> callable returning a PIL Image
+        self._layers = {}  # name -> built Image, never mutated after build
+        self._masks = {}  # size -> circular L-mode mask
+        self.font_loads = 0
+        self.layer_builds = 0
+
+    def font(self, size):
+        """Truetype font at size, falling back to Pillow's default bitmap font"""
+        fonts = getattr(self._local, 'fonts', None)
+        if fonts is None:
+            fonts = self._local.fonts = {}
+        font = fonts.get(size)
+        if font is None:
+            font = fonts[size] = self._load_font(size)
+        return font
+
+    def _load_font(self, size):
+        self.font_loads += 1
+        for path in self.font_paths:
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError:
+                continue
+        return ImageFont.load_default()
+
+    def register_layer(self, name, builder):
+        """Register a builder for a static layer; it runs once, on first use"""
+        self._builders[name] = builder
+        self._layers.pop(name, None)
+
+    def layer(self, name):
+        """A fresh copy of the named static layer, ready for the dynamic parts to be drawn on"""
+        base = self._layers.get(name)
+        if base is None:
+            with self._lock:
+                base = self._layers.get(name)
+                if base is None:
+                    base = self._layers[name] = self._builders[name]()
+                    self.layer_builds += 1
+        return base.copy()
+
+    def circle_mask(self, size):
+        """Shared circular alpha mask; treat as read-only"""
+        mask = self._masks.get(size)
+        if mask is None:
+            mask = Image.new('L', (size, size), 0)
+            ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+            self._masks[size] = mask
+        return mask
+
+    def stats(self):
+        return {
+            'layers': len(self._layers),
+            'layer_builds': self.layer_builds,
+            'font_loads': self.font_loads,
+            'masks': len(self._masks)
+        }
+
+
+# Shared registry used by profile_cards and captcha_generator
+assets = AssetRegistry()
@@ -0,0 +1,403 @@
+import asyncio
+import bisect
+import heapq
+import os
+import time
+from collections import OrderedDict
+
+from pymongo import UpdateOne
+
+from structured_logging import get_logger
+
+log = get_logger("karma")
+
+# Configuration
+KARMA_BOARD_IDLE_SECONDS = int(os.getenv('KARMA_BOARD_IDLE_SECONDS', '1800'))  # unused boards are dropped after this
+KARMA_BOARD_MAX_GUILDS = int(os.getenv('KARMA_BOARD_MAX_GUILDS', '200'))  # boards kept in memory at once
+KARMA_FLUSH_INTERVAL = float(os.getenv('KARMA_FLUSH_INTERVAL', '2'))  # seconds buffered karma changes wait before bulk_write
+KARMA_COOLDOWN_MAX = 180  # longest giver -> receiver cooldown; older entries can never block anyone
+KARMA_COOLDOWN_ENTRIES = int(os.getenv('KARMA_COOLDOWN_ENTRIES', '50000'))  # memory cap for live cooldowns
+KARMA_AUTHOR_CACHE_SIZE = int(os.getenv('KARMA_AUTHOR_CACHE_SIZE', '20000'))  # message_id -> author_id pairs remembered
+
+
+async def ensure_karma_indexes(db):
+    """Create the indexes rank and member lookups rely on; safe to run on every startup"""
+    if db is None:
+        return
+    try:
+        await db.karma.create_index([('guild_id', 1), ('karma', -1)])
+        await db.karma.create_index([('guild_id', 1), ('user_id', 1)])
+    except Exception:
+        log.exception("Failed to create karma indexes")
+
+
+class GuildKarmaBoard:
+    """One guild's karma standings as a sorted list of (-karma, user_id) plus a user -> karma map"""
+
+    __slots__ = ('entries', 'scores', 'last_used')
+
+    def __init__(self, docs=()):
+        self.scores = {doc['user_id']: doc.get('karma', 0) for doc in docs}
+        self.entries = sorted((-karma, user_id) for user_id, karma in self.scores.items())
+        self.last_used = time.monotonic()
+
+    def set(self, user_id, karma):
+        old = self.scores.get(user_id)
+        if old == karma:
+            return
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old, user_id))]
+        self.scores[user_id] = karma
+        bisect.insort(self.entries, (-karma, user_id))
+
+    def remove(self, user_id):
+        old = self.scores.pop(user_id, None)
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old, user_id))]
+
+    def rank(self, karma):
+        """1-based rank for a karma value; members tied on karma share a rank"""
+        return bisect.bisect_left(self.entries, (-karma,)) + 1
+
+    def page(self, offset, limit):
+        """[(user_id, karma), ...] for positions offset .. offset + limit - 1"""
+        return [(user_id, -negative) for negative, user_id in self.entries[offset:offset + limit]]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class KarmaLeaderboards:
+    """Lazily loaded per-guild karma boards, kept current by karma writes and evicted when idle"""
+
+    def __init__(self, max_guilds=KARMA_BOARD_MAX_GUILDS, idle_seconds=KARMA_BOARD_IDLE_SECONDS):
+        self.max_guilds = max_guilds
+        self.idle_seconds = idle_seconds
+        self._boards = OrderedDict()  # guild_id (str) -> GuildKarmaBoard
+        self._locks = {}
+        self._pending = {}  # guild_id -> {user_id: karma or None} written while the board was loading
+        self._cleared = set()  # guilds reset while their board was loading
+        self._pinned = {}  # guild_id -> buffered writes not yet in Mongo; pinned boards are never evicted
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _evict(self):
+        now = time.monotonic()
+        for guild_id, board in list(self._boards.items()):
+            if len(self._boards) <= self.max_guilds and now - board.last_used < self.idle_seconds:
+                break
+            if guild_id in self._pinned:
+                continue
+            del self._boards[guild_id]
+            self.evictions += 1
+
+    def pin(self, guild_id):
+        key = str(guild_id)
+        self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, guild_id):
+        key = str(guild_id)
+        if self._pinned.get(key, 0) <= 1:
+            self._pinned.pop(key, None)
+        else:
+            self._pinned[key] -= 1
+
+    async def get(self, db, guild_id):
+        """Return the guild's board, loading it with one query on first use"""
+        key = str(guild_id)
+        board = self._boards.get(key)
+        if board is not None:
+            self.hits += 1
+        else:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                board = self._boards.get(key)
+                if board is None:
+                    board = await self._load(db, key)
+            if self._locks.get(key) is lock and not lock.locked():
+                del self._locks[key]
+
+        self._boards.move_to_end(key)
+        board.last_used = time.monotonic()
+        self._evict()
+        return board
+
+    async def _load(self, db, key):
+        self._pending[key] = {}
+        try:
+            docs = await db.karma.find({'guild_id': key}, {'_id': 0, 'user_id': 1, 'karma': 1}).to_list(None)
+        finally:
+            pending = self._pending.pop(key)
+            cleared = key in self._cleared
+            self._cleared.discard(key)
+
+        board = GuildKarmaBoard(() if cleared else docs)
+        for user_id, karma in pending.items():
+            if karma is None:
+                board.remove(user_id)
+            else:
+                board.set(user_id, karma)
+        self._boards[key] = board
+        self.loads += 1
+        return board
+
+    def set_karma(self, guild_id, user_id, karma):
+        """Record a member's new karma total (None removes them) if the guild's board is loaded or loading"""
+        key = str(guild_id)
+        board = self._boards.get(key)
+        if board is not None:
+            if karma is None:
+                board.remove(str(user_id))
+            else:
+                board.set(str(user_id), karma)
+        elif key in self._pending:
+            self._pending[key][str(user_id)] = karma
+
+    def remove_user(self, guild_id, user_id):
+        self.set_karma(guild_id, user_id, None)
+
+    def reset_guild(self, guild_id):
+        """Forget every member's karma after a server-wide reset"""
+        key = str(guild_id)
+        if key in self._boards:
+            self._boards[key] = GuildKarmaBoard()
+        if key in self._pending:
+            self._pending[key].clear()
+            self._cleared.add(key)
+
+    def stats(self):
+        return {
+            'guilds': len(self._boards),
+            'max_guilds': self.max_guilds,
+            'members': sum(len(board) for board in self._boards.values()),
+            'hits': self.hits,
+            'loads': self.loads,
+            'evictions': self.evictions
+        }
+
+
+class KarmaWriteBuffer:
+    """Write-behind karma changes: bursts per member coalesce into one floored update per flush
+
+    A run of changes is kept as (floor, delta) meaning karma = max(floor, karma + delta),
+    which composes exactly, so "-3 then +2" on a member at 1 still ends at 2.
+    """
+
+    def __init__(self, boards, interval=KARMA_FLUSH_INTERVAL):
+        self.boards = boards
+        self.interval = interval
+        self.db = None
+        self._buffer = {}  # (guild_id, user_id) -> [floor, delta]
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self.changes = 0
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+
+    async def add(self, db, guild_id, user_id, delta):
+        """Apply a karma change in memory now and queue it for Mongo; returns (old_karma, new_karma)"""
+        board = await self.boards.get(db, guild_id)
+        guild_key, user_key = str(guild_id), str(user_id)
+        old_karma = board.scores.get(user_key, 0)
+        new_karma = max(0, old_karma + delta)
+        board.set(user_key, new_karma)
+
+        key = (guild_key, user_key)
+        entry = self._buffer.get(key)
+        if entry is None:
+            self._buffer[key] = [0, delta]
+            self.boards.pin(guild_key)
+        else:
+            entry[0] = max(0, entry[0] + delta)
+            entry[1] += delta
+        self.db = db
+        self.changes += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return old_karma, new_karma
+
+    def discard(self, guild_id, user_id=None):
+        """Drop buffered changes for one member, or the whole guild, ahead of a reset"""
+        guild_key = str(guild_id)
+        for key in [key for key in self._buffer if key[0] == guild_key and (user_id is None or key[1] == str(user_id))]:
+            del self._buffer[key]
+            self.boards.unpin(guild_key)
+
+    async def _run(self):
+        while self._buffer:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered with one unordered bulk_write"""
+        async with self._flush_lock:
+            if not self._buffer or self.db is None:
+                return
+            batch, self._buffer = self._buffer, {}
+            ops = [
+                UpdateOne(
+                    {'guild_id': guild_id, 'user_id': user_id},
+                    [{'$set': {'karma': {'$max': [floor, {'$add': [{'$ifNull': ['$karma', 0]}, delta]}]}}}],
+                    upsert=True
+                )
+                for (guild_id, user_id), (floor, delta) in batch.items()
+            ]
+            try:
+                await self.db.karma.bulk_write(ops, ordered=False)
+            except Exception:
+                self.failures += 1
+                log.exception("Failed to write %d buffered karma changes; retrying next flush", len(ops))
+                # Older changes apply first: max(f2, max(f1, x + d1) + d2)
+                for key, (floor, delta) in batch.items():
+                    newer = self._buffer.get(key)
+                    if newer is None:
+                        self._buffer[key] = [floor, delta]
+                    else:
+                        self._buffer[key] = [max(newer[0], floor + newer[1]), delta + newer[1]]
+                        self.boards.unpin(key[0])
+                return
+            self.flushes += 1
+            self.written += len(ops)
+            for guild_id, _ in batch:
+                self.boards.unpin(guild_id)
+
+    async def close(self):
+        """Flush on shutdown; a failed final flush is logged with the changes it lost"""
+        await self.flush()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self._buffer:
+            log.error("Dropping %d unsaved karma changes at shutdown", len(self._buffer))
+
+    def stats(self):
+        return {
+            'buffered': len(self._buffer),
+            'changes': self.changes,
+            'flushes': self.flushes,
+            'written': self.written,
+            'failures': self.failures
+        }
+
+
+class CooldownStore:
+    """(giver, receiver) -> last karma time; entries expire through a min-heap and the map is size-capped"""
+
+    def __init__(self, ttl=KARMA_COOLDOWN_MAX, max_entries=KARMA_COOLDOWN_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._last = {}  # (giver_id, receiver_id) -> monotonic timestamp
+        self._heap = []  # (timestamp, key); stale pairs are skipped when popped
+        self.expired = 0
+        self.evicted = 0
+
+    def _prune(self, now):
+        heap = self._heap
+        while heap and (heap[0][0] + self.ttl <= now or len(self._last) > self.max_entries):
+            stamp, key = heapq.heappop(heap)
+            if self._last.get(key) != stamp:
+                continue
+            del self._last[key]
+            if stamp + self.ttl <= now:
+                self.expired += 1
+            else:
+                self.evicted += 1
+        if len(heap) > 2 * len(self._last) + 64:
+            # Repeated touches leave superseded pairs behind; rebuild once they dominate
+            self._heap = [(stamp, key) for key, stamp in self._last.items()]
+            heapq.heapify(self._heap)
+
+    def remaining(self, giver_id, receiver_id, cooldown):
+        """Seconds until giver may reward receiver again (0 when allowed)"""
+        now = time.monotonic()
+        self._prune(now)
+        stamp = self._last.get((giver_id, receiver_id))
+        if stamp is None:
+            return 0
+        return max(0.0, cooldown - (now - stamp))
+
+    def touch(self, giver_id, receiver_id):
+        now = time.monotonic()
+        key = (giver_id, receiver_id)
+        self._last[key] = now
+        heapq.heappush(self._heap, (now, key))
+        self._prune(now)
+
+    def __len__(self):
+        return len(self._last)
+
+    def stats(self):
+        return {
+            'live': len(self._last),
+            'max_entries': self.max_entries,
+            'heap': len(self._heap),
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
+
+
+class MessageAuthorCache:
+    """LRU of message_id -> author_id so reactions on uncached messages fetch each message at most once"""
+
+    def __init__(self, max_size=KARMA_AUTHOR_CACHE_SIZE):
+        self.max_size = max_size
+        self._authors = OrderedDict()
+        self.hits = 0
+        self.fetches = 0
+
+    def get(self, message_id):
+        author_id = self._authors.get(message_id)
+        if author_id is not None:
+            self._authors.move_to_end(message_id)
+            self.hits += 1
+        return author_id
+
+    def put(self, message_id, author_id):
+        self._authors[message_id] = author_id
+        self._authors.move_to_end(message_id)
+        while len(self._authors) > self.max_size:
+            self._authors.popitem(last=False)
+
+    def stats(self):
+        return {'size': len(self._authors), 'hits': self.hits, 'fetches': self.fetches}
+
+
+# Shared instances used by xp_commands and profile_cards
+karma_boards = KarmaLeaderboards()
+karma_writes = KarmaWriteBuffer(karma_boards)
+karma_cooldowns = CooldownStore()
+message_authors = MessageAuthorCache()
+
+
+async def get_karma_rank(db, guild_id, karma):
+    """1-based server rank: members with strictly more karma, plus one (ties share a rank)"""
+    try:
+        board = await karma_boards.get(db, guild_id)
+    except Exception:
+        log.exception("Failed to load karma board for guild %s", guild_id)
+        higher = await db.karma.count_documents({'guild_id': str(guild_id), 'karma': {'$gt': karma}})
+        return higher + 1
+    return board.rank(karma)
+
+
+async def get_member_karma(db, guild_id, user_id):
+    """A member's karma including changes still waiting in the write-behind buffer"""
+    try:
+        board = await karma_boards.get(db, guild_id)
+    except Exception:
+        log.exception("Failed to load karma board for guild %s", guild_id)
+        doc = await db.karma.find_one({'user_id': str(user_id), 'guild_id': str(guild_id)})
+        return doc.get('karma', 0) if doc else 0
+    return board.scores.get(str(user_id), 0)
+
+
+async def get_karma_page(db, guild_id, page=0, per_page=10):
+    """[(user_id, karma), ...] for one leaderboard page, highest karma first"""
+    try:
+        board = await karma_boards.get(db, guild_id)
+    except Exception:
+        log.exception("Failed to load karma board for guild %s", guild_id)
+        docs = await db.karma.find({'guild_id': str(guild_id)}).sort('karma', -1).skip(page * per_page).limit(per_page).to_list(None)
+        return [(doc['user_id'], doc.get('karma', 0)) for doc in docs]
+    return board.page(page * per_page, per_page)
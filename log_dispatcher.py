@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+import discord
+
+# Configuration
+LOG_BATCH_SIZE = 10  # Discord allows at most 10 embeds per message
+LOG_BATCH_CHARS = 6000  # Discord limit for the combined length of all embeds in one message
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', '1.5'))  # seconds to wait for a batch to fill
+LOG_CHANNEL_QUEUE_LIMIT = int(os.getenv('LOG_CHANNEL_QUEUE_LIMIT', '250'))  # pending embeds per channel
+LOG_TOTAL_QUEUE_LIMIT = int(os.getenv('LOG_TOTAL_QUEUE_LIMIT', '5000'))  # pending embeds overall
+ROUTE_BUCKET_SIZE = 5  # POST /channels/{id}/messages allows 5 sends...
+ROUTE_BUCKET_WINDOW = 5.0  # ...per 5 seconds per channel
+
+
+class _ChannelQueue:
+    """Pending embeds and send history for a single log channel"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.embeds = deque()
+        self.sent_at = deque(maxlen=ROUTE_BUCKET_SIZE)
+        self.wakeup = asyncio.Event()
+        self.worker = None
+
+
+class LogDispatcher:
+    """Per-channel log queues that coalesce embeds and pace sends to the channel's rate-limit bucket"""
+
+    def __init__(self):
+        self._queues = {}  # channel_id -> _ChannelQueue
+        self.pending = 0
+        self.enqueued = 0
+        self.messages_sent = 0
+        self.embeds_sent = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self._flushing = False
+
+    def enqueue(self, channel, embed) -> bool:
+        """Queue an embed for a channel; returns False when it was dropped because the queue is full"""
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = _ChannelQueue(channel)
+        else:
+            queue.channel = channel
+
+        if len(queue.embeds) >= LOG_CHANNEL_QUEUE_LIMIT or self.pending >= LOG_TOTAL_QUEUE_LIMIT:
+            self.dropped += 1
+            return False
+
+        queue.embeds.append(embed)
+        self.pending += 1
+        self.enqueued += 1
+
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._run(channel.id, queue))
+        elif len(queue.embeds) == 1 or len(queue.embeds) >= LOG_BATCH_SIZE:
+            # Wake a worker that is idling on an empty queue or holding a now-full batch
+            queue.wakeup.set()
+        return True
+
+    def _take_batch(self, queue):
+        batch = []
+        chars = 0
+        while queue.embeds and len(batch) < LOG_BATCH_SIZE:
+            size = len(queue.embeds[0])
+            if batch and chars + size > LOG_BATCH_CHARS:
+                break
+            batch.append(queue.embeds.popleft())
+            chars += size
+        self.pending -= len(batch)
+        return batch
+
+    async def _wait_for_bucket(self, queue):
+        if len(queue.sent_at) == ROUTE_BUCKET_SIZE:
+            wait = queue.sent_at[0] + ROUTE_BUCKET_WINDOW - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def _send(self, queue, batch):
+        await self._wait_for_bucket(queue)
+        try:
+            await queue.channel.send(embeds=batch)
+            self.messages_sent += 1
+            self.embeds_sent += len(batch)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                # Put the batch back and let the bucket drain before retrying
+                self.rate_limited += 1
+                queue.embeds.extendleft(reversed(batch))
+                self.pending += len(batch)
+                await asyncio.sleep(getattr(e, 'retry_after', None) or ROUTE_BUCKET_WINDOW)
+            else:
+                self.failed += len(batch)
+                print(f"Error sending batched log: {e}")
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Error sending batched log: {e}")
+        finally:
+            queue.sent_at.append(time.monotonic())
+
+    async def _run(self, channel_id, queue):
+        """Drain one channel: wait for a full batch or the flush interval, then send"""
+        try:
+            while True:
+                if not queue.embeds:
+                    # Linger for one bucket window so the send history survives short gaps between bursts
+                    if self._flushing:
+                        break
+                    queue.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(queue.wakeup.wait(), timeout=ROUTE_BUCKET_WINDOW)
+                    except asyncio.TimeoutError:
+                        pass
+                    if not queue.embeds:
+                        break
+                    continue
+
+                if len(queue.embeds) < LOG_BATCH_SIZE and not self._flushing:
+                    queue.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(queue.wakeup.wait(), timeout=LOG_FLUSH_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                batch = self._take_batch(queue)
+                if batch:
+                    await self._send(queue, batch)
+        finally:
+            if self._queues.get(channel_id) is queue:
+                del self._queues[channel_id]
+                self.pending -= len(queue.embeds)
+
+    async def flush_all(self):
+        """Send everything still queued, e.g. before shutdown"""
+        self._flushing = True
+        for queue in list(self._queues.values()):
+            queue.wakeup.set()
+        workers = [queue.worker for queue in self._queues.values() if queue.worker and not queue.worker.done()]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        self._flushing = False
+
+    def stats(self):
+        """Return queue and throughput counters for diagnostics"""
+        return {
+            'channels': len(self._queues),
+            'pending': self.pending,
+            'enqueued': self.enqueued,
+            'messages_sent': self.messages_sent,
+            'embeds_sent': self.embeds_sent,
+            'dropped': self.dropped,
+            'rate_limited': self.rate_limited,
+            'failed': self.failed
+        }
+
+
+# Shared instance used by log_action and the global logging helpers
+log_dispatcher = LogDispatcher()
@@ -44,8 +44,14 @@ else:
     mongo_client = None
     db = None
 
-# Cache for server settings
-server_cache = {}
+# Cache for server settings (shared per-guild LRU/TTL cache, see config_cache.py)
+from config_cache import server_cache
+from log_dispatcher import log_dispatcher
+from structured_logging import get_logger
+from message_pipeline import message_pipeline
+
+# Message pipeline logger; DEBUG is off unless LOG_LEVELS enables "pipeline=DEBUG"
+pipeline_log = get_logger("pipeline")
 
 # Bot setup
 intents = discord.Intents.all()
@@ -53,13 +59,50 @@ intents.message_content = True  # Explicitly enable message content intent
 bot = commands.Bot(command_prefix='!', intents=intents, case_insensitive=True)
 bot.remove_command('help')
 bot.start_time = time.time()
+_close_bot = bot.close
+
+async def close_with_flush():
+    """Flush write-behind buffers before the gateway connection and database go away"""
+    try:
+        from karma_store import karma_writes
+        await karma_writes.close()
+    except Exception as e:
+        print(f"⚠️ Karma flush on shutdown failed: {e}")
+    try:
+        from voice_tracker import flush_checkpoints, milestone_notifier
+        from voice_analytics import voice_analytics
+        await flush_checkpoints()
+        await milestone_notifier.flush()
+        await voice_analytics.close()
+    except Exception as e:
+        print(f"⚠️ Voice checkpoint on shutdown failed: {e}")
+    try:
+        await log_dispatcher.flush_all()
+    except Exception as e:
+        print(f"⚠️ Log flush on shutdown failed: {e}")
+    try:
+        from card_cache import avatar_cache
+        await avatar_cache.close()
+    except Exception as e:
+        print(f"⚠️ Avatar session close failed: {e}")
+    await _close_bot()
+
+bot.close = close_with_flush
 
 async def get_server_data(guild_id):
-    """Get server configuration from database"""
+    """Get server configuration, served from the per-guild cache when possible"""
     guild_id = str(guild_id)
-    if db is not None:
-        return await db.servers.find_one({'guild_id': guild_id}) or {}
-    return {}
+    if db is None:
+        return {}
+
+    cached = server_cache.get(guild_id)
+    if cached is not None:
+        return cached
+
+    loaded_at_write = server_cache.writes
+    server_data = await db.servers.find_one({'guild_id': guild_id}) or {}
+    server_cache.put(guild_id, server_data, loaded_at_write)
+    return server_data
 
 async def update_server_data(guild_id, data):
     """Update server configuration in database"""
@@ -70,10 +113,8 @@ async def update_server_data(guild_id, data):
             {'$set': data},
             upsert=True
         )
-    # Update cache
-    if guild_id not in server_cache:
-        server_cache[guild_id] = {}
-    server_cache[guild_id].update(data)
+    # Write-through so cached readers see the change immediately
+    server_cache.apply_update(guild_id, data)
 
 async def log_action(guild_id, log_type, message):
     """Log actions to appropriate channels with support for single channel, organized, and global logging"""
@@ -140,11 +181,9 @@ async def log_action(guild_id, log_type, message):
                 timestamp=datetime.now()
             )
             embed.set_footer(text=f"{BOT_FOOTER} • {log_type.title()}", icon_url=bot.user.display_avatar.url)
-            try:
-                await channel.send(embed=embed)
-                return
-            except Exception as e:
-                print(f"Error sending single log: {e}")
+            # Queued and coalesced with other events for this channel (see log_dispatcher.py)
+            log_dispatcher.enqueue(channel, embed)
+            return
 
     # Check for organized logging system
     organized_logs = server_data.get('organized_log_channels', {})
@@ -194,11 +233,8 @@ async def log_action(guild_id, log_type, message):
                     timestamp=datetime.now()
                 )
                 embed.set_footer(text=f"{BOT_FOOTER} • {log_type.title()}", icon_url=bot.user.display_avatar.url)
-                try:
-                    await channel.send(embed=embed)
-                    return
-                except Exception as e:
-                    print(f"Error sending organized log: {e}")
+                log_dispatcher.enqueue(channel, embed)
+                return
 
 async def has_permission(interaction, permission_level):
     """Check if user has required permission level"""
@@ -947,164 +983,167 @@ async def on_member_join(member):
     except:
         pass  # User has DMs disabled
 
-@bot.event
-async def on_message(message):
-    """Handle all message events including DMs and security checks"""
-    print(f"🟢 [DEBUG] on_message triggered! Author: {message.author}, Bot: {message.author.bot}")
-    
-    # Process commands first
-    await bot.process_commands(message)
+# ═══════════════════════════════════════════════════════════════════════════
+# MESSAGE PIPELINE STAGES - security (10) registers itself from rxt_security.py
+# ═══════════════════════════════════════════════════════════════════════════
+
+async def commands_message_stage(ctx):
+    """Run prefix commands"""
+    await bot.process_commands(ctx.message)
+
+async def reaction_role_setup_stage(ctx):
+    """Handle Reaction Role Setup (text-based command)"""
+    message = ctx.message
+    if not message.content.startswith("reaction role setup"):
+        return
+    ctx.stop("reaction_role_setup")
     
-    # Skip bot messages
-    if message.author.bot:
-        print(f"🤖 [DEBUG] Skipping bot message from {message.author}")
+    server_data = await ctx.server_data()
+    main_mod_role_id = server_data.get('main_moderator_role')
+    is_main_moderator = message.author.id == message.guild.owner_id or (
+        main_mod_role_id and message.guild.get_role(int(main_mod_role_id)) in message.author.roles)
+    if not is_main_moderator:
+        await message.channel.send("❌ Only Main Moderators can set up reaction roles!")
         return
     
-    print(f"🔍 [ON_MESSAGE] Message from {message.author} in {message.guild.name if message.guild else 'DM'}: {message.content[:100]}")
+    await message.channel.send("Please provide the message ID, emoji, role, and channel for the reaction role.")
     
-    # Handle Reaction Role Setup (text-based command)
-    if message.guild and message.content.startswith("reaction role setup"):
-        if not await has_permission(message, "main_moderator"):
-            await message.channel.send("❌ Only Main Moderators can set up reaction roles!")
-            return
+    def check(m):
+        return m.author == message.author and m.channel == message.channel
+    
+    try:
+        # Get message ID
+        msg_prompt = await bot.wait_for("message", check=check, timeout=60)
+        message_id = int(msg_prompt.content.split()[0])
+        message_to_react = await message.channel.fetch_message(message_id)
         
-        await message.channel.send("Please provide the message ID, emoji, role, and channel for the reaction role.")
+        # Get emoji
+        emoji_prompt = await bot.wait_for("message", check=check, timeout=60)
+        emoji_str = emoji_prompt.content
         
-        def check(m):
-            return m.author == message.author and m.channel == message.channel
+        # Get role name
+        role_prompt = await bot.wait_for("message", check=check, timeout=60)
+        role_name = role_prompt.content
+        role = discord.utils.get(message.guild.roles, name=role_name)
+        if not role:
+            await message.channel.send(f"❌ Role '{role_name}' not found.")
+            return
         
+        # Add reaction to message
         try:
-            # Get message ID
-            msg_prompt = await bot.wait_for("message", check=check, timeout=60)
-            message_id = int(msg_prompt.content.split()[0])
-            message_to_react = await message.channel.fetch_message(message_id)
-            
-            # Get emoji
-            emoji_prompt = await bot.wait_for("message", check=check, timeout=60)
-            emoji_str = emoji_prompt.content
-            
-            # Get role name
-            role_prompt = await bot.wait_for("message", check=check, timeout=60)
-            role_name = role_prompt.content
-            role = discord.utils.get(message.guild.roles, name=role_name)
-            if not role:
-                await message.channel.send(f"❌ Role '{role_name}' not found.")
-                return
-            
-            # Add reaction to message
-            try:
-                await message_to_react.add_reaction(emoji_str)
-            except discord.HTTPException:
-                await message.channel.send("❌ Invalid emoji provided.")
-                return
-            
-            await message.channel.send("✅ Reaction role setup complete!")
-            
-        except asyncio.TimeoutError:
-            await message.channel.send("❌ Timeout. Please try the command again.")
-        except Exception as e:
-            await message.channel.send(f"❌ An error occurred: {e}")
-        return
+            await message_to_react.add_reaction(emoji_str)
+        except discord.HTTPException:
+            await message.channel.send("❌ Invalid emoji provided.")
+            return
+        
+        await message.channel.send("✅ Reaction role setup complete!")
+        
+    except asyncio.TimeoutError:
+        await message.channel.send("❌ Timeout. Please try the command again.")
+    except Exception as e:
+        await message.channel.send(f"❌ An error occurred: {e}")
+
+async def ai_chat_message_stage(ctx):
+    """Handle AI chat in designated channels"""
+    if handle_ai_message:
+        await handle_ai_message(ctx.message)
+
+async def dm_message_stage(ctx):
+    """Handle DM mentions"""
+    message = ctx.message
     
-    # Handle AI chat in designated channels (must be after reaction role check)
-    if message.guild:
-        print(f"📤 [AI HANDLER] handle_ai_message is: {handle_ai_message}")
-        if handle_ai_message:
-            try:
-                print(f"🚀 [AI HANDLER] Calling handle_ai_message for: {message.content[:50]}")
-                await handle_ai_message(message)
-            except Exception as e:
-                print(f"❌ [AI CHAT ERROR] {e}")
-        else:
-            print(f"⚠️ [AI HANDLER] handle_ai_message is None!")
+    # Log DM received to global logging
+    try:
+        from advanced_logging import log_dm_received
+        await log_dm_received(message.author, message.content)
+    except Exception as e:
+        pipeline_log.warning("Failed to log DM received: %s", e)
     
-    # Handle DM mentions
-    if not message.guild:  # This is a DM
-        # Log DM received to global logging
-        try:
-            from advanced_logging import log_dm_received
-            await log_dm_received(message.author, message.content)
-        except Exception as e:
-            print(f"Failed to log DM received: {e}")
-        
-        # Check for bot mention in DMs - Send contact info
-        if (bot.user in message.mentions or
-            f"<@{bot.user.id}>" in message.content or
-            f"<@!{bot.user.id}>" in message.content):
+    # Check for bot mention in DMs - Send contact info
+    if (bot.user in message.mentions or
+        f"<@{bot.user.id}>" in message.content or
+        f"<@!{bot.user.id}>" in message.content):
 
-            # Send contact info in DMs
-            bot_owner_id = os.getenv('BOT_OWNER_ID')
-            contact_email = os.getenv('CONTACT_EMAIL')
-            support_server = os.getenv('SUPPORT_SERVER')
+        # Send contact info in DMs
+        bot_owner_id = os.getenv('BOT_OWNER_ID')
+        contact_email = os.getenv('CONTACT_EMAIL')
+        support_server = os.getenv('SUPPORT_SERVER')
 
-            owner_mention = f"<@{bot_owner_id}>" if bot_owner_id else "Contact via server"
-            email_text = contact_email if contact_email else "Not available"
-            support_text = support_server if support_server else "Contact owner for invite"
+        owner_mention = f"<@{bot_owner_id}>" if bot_owner_id else "Contact via server"
+        email_text = contact_email if contact_email else "Not available"
+        support_text = support_server if support_server else "Contact owner for invite"
 
-            embed = discord.Embed(
-                title="📞 **Contact Information & Support**",
-                description=f"*Hello! Here's how to get help or get in touch:*\n\n**👨‍💻 Developer:** {owner_mention}\n**📧 Email:** `{email_text}`\n**🏠 Support Server:** {support_text}\n\n*Need quick help? Use `/help` in any server!*",
-                color=BrandColors.PRIMARY
-            )
-            embed.set_thumbnail(url=bot.user.display_avatar.url)
-            embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
+        embed = discord.Embed(
+            title="📞 **Contact Information & Support**",
+            description=f"*Hello! Here's how to get help or get in touch:*\n\n**👨‍💻 Developer:** {owner_mention}\n**📧 Email:** `{email_text}`\n**🏠 Support Server:** {support_text}\n\n*Need quick help? Use `/help` in any server!*",
+            color=BrandColors.PRIMARY
+        )
+        embed.set_thumbnail(url=bot.user.display_avatar.url)
+        embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
 
-            view = discord.ui.View()
-            if support_server:
-                support_button = discord.ui.Button(label="🏠 Support Server", style=discord.ButtonStyle.link, url=support_server, emoji="🏠")
-                view.add_item(support_button)
+        view = discord.ui.View()
+        if support_server:
+            support_button = discord.ui.Button(label="🏠 Support Server", style=discord.ButtonStyle.link, url=support_server, emoji="🏠")
+            view.add_item(support_button)
 
-            invite_button = discord.ui.Button(label="🔗 Invite Bot", style=discord.ButtonStyle.link, url=f"https://discord.com/api/oauth2/authorize?client_id={bot.user.id}&permissions=8&scope=bot%20applications.commands", emoji="🔗")
-            view.add_item(invite_button)
+        invite_button = discord.ui.Button(label="🔗 Invite Bot", style=discord.ButtonStyle.link, url=f"https://discord.com/api/oauth2/authorize?client_id={bot.user.id}&permissions=8&scope=bot%20applications.commands", emoji="🔗")
+        view.add_item(invite_button)
 
-            sent_message = await message.channel.send(embed=embed, view=view)
+        # Auto delete after 1 minute (scheduled by discord.py so the pipeline isn't held open)
+        await message.channel.send(embed=embed, view=view, delete_after=60)
 
-            # Log DM sent globally
-            try:
-                from advanced_logging import log_dm_sent
-                asyncio.create_task(log_dm_sent(message.author, "Contact information sent - Bot mention detected"))
-            except Exception as e:
-                print(f"Failed to log DM sent: {e}")
+        # Log DM sent globally
+        try:
+            from advanced_logging import log_dm_sent
+            asyncio.create_task(log_dm_sent(message.author, "Contact information sent - Bot mention detected"))
+        except Exception as e:
+            print(f"Failed to log DM sent: {e}")
+        return
 
-            # Auto delete after 1 minute
-            await asyncio.sleep(60)
-            try:
-                await sent_message.delete()
-            except:
-                pass
-            return
+    # Check for owner mention in DMs
+    owner_id = os.getenv('BOT_OWNER_ID')
+    if owner_id and (f"<@{owner_id}>" in message.content or
+                    f"<@!{owner_id}>" in message.content or
+                    "daazo" in message.content.lower()):
+        owner_mention = f"<@{owner_id}>" if owner_id else "Contact via server"
+        embed = discord.Embed(
+            title="📢 **Developer Mention**",
+            description=f"**Developer:** {owner_mention}\n\n**About:** {BOT_OWNER_DESCRIPTION}\n\n**Need Help?** Use `/help` or contact the support server.",
+            color=BrandColors.ACCENT
+        )
+        embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
+        embed.set_thumbnail(url=bot.user.display_avatar.url)
+        # Auto delete after 1 minute
+        await message.channel.send(embed=embed, delete_after=60)
+        
+        # Log DM sent globally
+        try:
+            from advanced_logging import log_dm_sent
+            asyncio.create_task(log_dm_sent(message.author, "Developer information sent - Owner mention detected"))
+        except Exception as e:
+            print(f"Failed to log DM sent: {e}")
 
-        # Check for owner mention in DMs
-        owner_id = os.getenv('BOT_OWNER_ID')
-        if owner_id and (f"<@{owner_id}>" in message.content or
-                        f"<@!{owner_id}>" in message.content or
-                        "daazo" in message.content.lower()):
-            owner_mention = f"<@{owner_id}>" if owner_id else "Contact via server"
-            embed = discord.Embed(
-                title="📢 **Developer Mention**",
-                description=f"**Developer:** {owner_mention}\n\n**About:** {BOT_OWNER_DESCRIPTION}\n\n**Need Help?** Use `/help` or contact the support server.",
-                color=BrandColors.ACCENT
-            )
-            embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
-            embed.set_thumbnail(url=bot.user.display_avatar.url)
-            sent_message = await message.channel.send(embed=embed)
-            
-            # Log DM sent globally
-            try:
-                from advanced_logging import log_dm_sent
-                asyncio.create_task(log_dm_sent(message.author, "Developer information sent - Owner mention detected"))
-            except Exception as e:
-                print(f"Failed to log DM sent: {e}")
-            
-            # Auto delete after 1 minute
-            await asyncio.sleep(60)
-            try:
-                await sent_message.delete()
-            except:
-                pass
-            return
+def setup_message_stages():
+    """Register main's pipeline stages once
 
-        return  # Don't process other DM messages
+    Submodules import main.py a second time as `main`; the first copy to get here is the one
+    whose bot actually runs, so later calls leave its stages in place.
+    """
+    if message_pipeline.has_stage("commands"):
+        return
+    message_pipeline.configure(load_server_data=get_server_data)
+    message_pipeline.register("commands", commands_message_stage, order=20)
+    message_pipeline.register("reaction_role_setup", reaction_role_setup_stage, order=30, guild_only=True)
+    message_pipeline.register("ai_chat", ai_chat_message_stage, order=40, guild_only=True)
+    message_pipeline.register("dm", dm_message_stage, order=50, dm_only=True)
+
+setup_message_stages()
+
+@bot.event
+async def on_message(message):
+    """Handle all message events including DMs and security checks"""
+    pipeline_log.debug("message %s from %s in %s", message.id, message.author.id, message.guild.id if message.guild else "DM")
+    await message_pipeline.run(message)
 
 @bot.event
 async def on_message_delete(message):
@@ -2029,6 +2068,167 @@ async def serverinfo(interaction: discord.Interaction):
 
     await log_action(interaction.guild.id, "general", f"🏰 [SERVERINFO] {interaction.user} viewed server information")
 
+@bot.tree.command(name="perfstats", description="📊 Show internal cache and pipeline statistics (Owner only)")
+async def perf_stats(interaction: discord.Interaction):
+    if str(interaction.user.id) != BOT_OWNER_ID:
+        await interaction.response.send_message(embed=create_error_embed("Access Denied", "This command is restricted to the bot owner."), ephemeral=True)
+        return
+
+    cache_stats = server_cache.stats()
+    embed = discord.Embed(
+        title="📊 **Quantum Core Diagnostics**",
+        description=f"{VisualElements.CIRCUIT_LINE}",
+        color=BrandColors.PRIMARY,
+        timestamp=datetime.now()
+    )
+    embed.add_field(
+        name="◆ Server Config Cache",
+        value=f"Entries: `{cache_stats['size']}/{cache_stats['max_size']}` (TTL `{cache_stats['ttl']}s`)\n"
+              f"Hits: `{cache_stats['hits']}` • Misses: `{cache_stats['misses']}` • Hit rate: `{cache_stats['hit_rate']:.1%}`\n"
+              f"Evictions: `{cache_stats['evictions']}` • Invalidations: `{cache_stats['invalidations']}`",
+        inline=False
+    )
+    log_stats = log_dispatcher.stats()
+    embed.add_field(
+        name="◆ Log Dispatcher",
+        value=f"Channels: `{log_stats['channels']}` • Pending: `{log_stats['pending']}`\n"
+              f"Embeds: `{log_stats['embeds_sent']}` in `{log_stats['messages_sent']}` messages\n"
+              f"Dropped: `{log_stats['dropped']}` • 429s: `{log_stats['rate_limited']}` • Failed: `{log_stats['failed']}`",
+        inline=False
+    )
+    pipeline_stats = message_pipeline.stats()
+    stage_lines = [
+        f"`{stage['name']}` n=`{stage['count']}` mean=`{stage['mean_ms']:.2f}ms` p95≤`{stage['p95_ms']}ms` stops=`{stage['stops']}` errors=`{stage['errors']}`"
+        for stage in pipeline_stats['stages']
+    ]
+    embed.add_field(
+        name="◆ Message Pipeline",
+        value=f"Messages: `{pipeline_stats['messages']}` • Bot messages skipped: `{pipeline_stats['bot_messages_skipped']}`\n" + "\n".join(stage_lines),
+        inline=False
+    )
+    try:
+        from ai_backend import ai_executor
+        ai_stats = ai_executor.stats()
+        embed.add_field(
+            name="◆ AI Executor",
+            value=f"In flight: `{ai_stats['in_flight']}` • Queued: `{ai_stats['queued']}` across `{ai_stats['busy_guilds']}` guilds\n"
+                  f"Completed: `{ai_stats['completed']}` • Rejected: `{ai_stats['rejected']}` • Timeouts: `{ai_stats['timeouts']}` • Errors: `{ai_stats['errors']}`\n"
+                  f"Queue wait p95≤`{ai_stats['queue_wait']['p95_ms']}ms` • Call mean `{ai_stats['latency']['mean_ms']:.0f}ms` p95≤`{ai_stats['latency']['p95_ms']}ms`",
+            inline=False
+        )
+        from ai_cache import response_cache
+        cache_stats = response_cache.stats()
+        embed.add_field(
+            name="◆ AI Response Cache",
+            value=f"Entries: `{cache_stats['size']}/{cache_stats['max_size']}` • In flight: `{cache_stats['in_flight']}`\n"
+                  f"Hits: `{cache_stats['hits']}` • Coalesced: `{cache_stats['coalesced']}` • Misses: `{cache_stats['misses']}` • Hit rate: `{cache_stats['hit_rate']:.1%}`",
+            inline=False
+        )
+        from ai_memory import conversation_memory
+        memory_stats = conversation_memory.stats()
+        embed.add_field(
+            name="◆ AI Conversation Memory",
+            value=f"Channels: `{memory_stats['channels']}` • Turns: `{memory_stats['turns']}` • Persistent: `{memory_stats['persistent']}`\n"
+                  f"Evicted channels: `{memory_stats['evictions']}` • Trimmed turns: `{memory_stats['trimmed_turns']}`",
+            inline=False
+        )
+    except ImportError:
+        pass
+    try:
+        from karma_store import karma_boards, karma_writes, karma_cooldowns, message_authors
+        board_stats = karma_boards.stats()
+        write_stats = karma_writes.stats()
+        cooldown_stats = karma_cooldowns.stats()
+        author_stats = message_authors.stats()
+        embed.add_field(
+            name="◆ Karma Leaderboards",
+            value=f"Guilds: `{board_stats['guilds']}/{board_stats['max_guilds']}` • Members: `{board_stats['members']}`\n"
+                  f"Hits: `{board_stats['hits']}` • Loads: `{board_stats['loads']}` • Evictions: `{board_stats['evictions']}`\n"
+                  f"Writes: `{write_stats['changes']}` changes → `{write_stats['written']}` updates in `{write_stats['flushes']}` flushes • "
+                  f"Buffered: `{write_stats['buffered']}` • Failures: `{write_stats['failures']}`\n"
+                  f"Cooldowns: `{cooldown_stats['live']}/{cooldown_stats['max_entries']}` live • Expired: `{cooldown_stats['expired']}` • Evicted: `{cooldown_stats['evicted']}`\n"
+                  f"Reaction authors: `{author_stats['size']}` cached • Hits: `{author_stats['hits']}` • Fetches: `{author_stats['fetches']}`",
+            inline=False
+        )
+    except ImportError:
+        pass
+    try:
+        from voice_tracker import voice_sessions, checkpoint_stats, tracker_enabled, milestone_notifier, VOICE_CHECKPOINT_INTERVAL
+        from voice_analytics import voice_analytics
+        milestone_stats = milestone_notifier.stats()
+        analytics_stats = voice_analytics.stats()
+        embed.add_field(
+            name="◆ Voice Sessions",
+            value=f"Open: `{len(voice_sessions)}` • Tracking guilds: `{sum(tracker_enabled.values())}` • Checkpoint every `{VOICE_CHECKPOINT_INTERVAL}s`\n"
+                  f"Checkpoints: `{checkpoint_stats['checkpoints']}` → `{checkpoint_stats['written']}` updates • Failures: `{checkpoint_stats['failures']}`\n"
+                  f"On startup: resumed `{checkpoint_stats['resumed']}` • started `{checkpoint_stats['started']}` • Closed: `{checkpoint_stats['closed']}`\n"
+                  f"Milestones: `{milestone_stats['crossings']}` crossings → `{milestone_stats['messages']}` messages • Pending guilds: `{milestone_stats['pending_guilds']}`\n"
+                  f"Analytics: `{analytics_stats['intervals']}` intervals → `{analytics_stats['written']}` bucket updates in `{analytics_stats['flushes']}` flushes • "
+                  f"Buffered: `{analytics_stats['buffered']}` • Failures: `{analytics_stats['failures']}`",
+            inline=False
+        )
+    except ImportError:
+        pass
+    try:
+        from render_pool import render_executor
+        render_stats = render_executor.stats()
+        render_lines = [
+            f"`{kind}` n=`{kind_stats['count']}` mean=`{kind_stats['mean_ms']:.1f}ms` p95≤`{kind_stats['p95_ms']}ms` queue p95≤`{kind_stats['queue_p95_ms']}ms` errors=`{kind_stats['errors']}`"
+            for kind, kind_stats in render_stats['kinds'].items()
+        ]
+        embed.add_field(
+            name="◆ Render Pool",
+            value=f"Workers: `{render_stats['workers']}` • Pending: `{render_stats['pending']}/{render_stats['max_pending']}` • Rejected: `{render_stats['rejected']}`"
+                  + ("\n" + "\n".join(render_lines) if render_lines else ""),
+            inline=False
+        )
+    except ImportError:
+        pass
+    try:
+        from captcha_pool import captcha_pool
+        from captcha_store import captcha_challenges
+        pool_stats = captcha_pool.stats()
+        challenge_stats = captcha_challenges.stats()
+        embed.add_field(
+            name="◆ CAPTCHA Pool",
+            value=f"Ready: `{pool_stats['ready']}/{pool_stats['depth']}` • Hits: `{pool_stats['hits']}` • Misses: `{pool_stats['misses']}` • Hit rate: `{pool_stats['hit_rate']:.1%}`\n"
+                  f"Generated: `{pool_stats['generated']}` • Refill errors: `{pool_stats['refill_errors']}`\n"
+                  f"Challenges: `{challenge_stats['pending']}/{challenge_stats['max_entries']}` pending • Solved: `{challenge_stats['solved']}` • Failed: `{challenge_stats['failed']}` • "
+                  f"Expired: `{challenge_stats['expired']}` • Persistent: `{challenge_stats['persistent']}`",
+            inline=False
+        )
+    except ImportError:
+        pass
+    try:
+        from card_cache import avatar_cache, rendered_cards
+        from image_assets import assets
+        card_stats = rendered_cards.stats()
+        avatar_stats = avatar_cache.stats()
+        asset_stats = assets.stats()
+        embed.add_field(
+            name="◆ Image Caches",
+            value=f"Cards: `{card_stats['entries']}` • `{card_stats['bytes'] // 1024}/{card_stats['max_bytes'] // 1024} KiB` • Hit rate: `{card_stats['hit_rate']:.1%}` • Evictions: `{card_stats['evictions']}`\n"
+                  f"Avatars: `{avatar_stats['entries']}` • `{avatar_stats['bytes'] // 1024}/{avatar_stats['max_bytes'] // 1024} KiB` • Hit rate: `{avatar_stats['hit_rate']:.1%}`\n"
+                  f"Downloads: `{avatar_stats['downloads']}` • Revalidated (304): `{avatar_stats['revalidated']}` • Failures: `{avatar_stats['failures']}`\n"
+                  f"Assets: `{asset_stats['layers']}` static layers • `{asset_stats['font_loads']}` font loads • `{asset_stats['masks']}` masks",
+            inline=False
+        )
+    except ImportError:
+        pass
+    try:
+        from advanced_logging import console_sink
+        console_stats = console_sink.stats()
+        embed.add_field(
+            name="◆ Live Console",
+            value=f"Buffered: `{console_stats['buffered']}` • Mirrored: `{console_stats['accepted']}`\n"
+                  f"Filtered: `{console_stats['filtered']}` • Dropped: `{console_stats['dropped']}`",
+            inline=False
+        )
+    except ImportError:
+        pass
+    embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # Contact info command
 @bot.tree.command(name="synccommands", description="🔄 Force sync all bot commands (Owner only)")
 async def sync_commands(interaction: discord.Interaction):
@@ -2136,17 +2336,14 @@ async def contact_info(interaction: discord.Interaction):
 
     # Try to create bot profile card
     try:
-        from profile_cards import create_bot_profile_card
+        from profile_cards import render_bot_profile_card_png
         await interaction.response.defer()
 
-        card_image = await create_bot_profile_card(bot, owner_status, owner_status_emoji, uptime_str, len(bot.guilds))
+        card_png = await render_bot_profile_card_png(bot, owner_status, owner_status_emoji, uptime_str, len(bot.guilds))
 
-        if card_image:
-            # Save image to bytes
-            import io
-            img_bytes = io.BytesIO()
-            card_image.save(img_bytes, format='PNG', quality=95)
-            img_bytes.seek(0)
+        if card_png:
+            # Drawn and encoded on a render thread
+            img_bytes = io.BytesIO(card_png)
 
             # Create Discord file
             file = discord.File(img_bytes, filename=f"bot_contact_{bot.user.id}.png")
@@ -2256,15 +2453,28 @@ class ConsoleCapture:
     """Captures print output for live console logging"""
     def __init__(self, original):
         self.original = original
-        self.buffer = []
+        self._queue = None
+    
+    def write_record(self, line, level):
+        """Write a structured log record, passing its real level on to the live console"""
+        self.original.write(line + "\n")
+        try:
+            if self._queue is None:
+                from advanced_logging import queue_console_output
+                self._queue = queue_console_output
+            self._queue(line, level)
+        except Exception:
+            pass
     
     def write(self, message):
-        """Capture and forward output"""
+        """Capture and forward output; queuing is a bounded ring-buffer append"""
         self.original.write(message)
-        if message and message.strip():
+        if message and not message.isspace():
             try:
-                from advanced_logging import queue_console_output
-                queue_console_output(message.strip())
+                if self._queue is None:
+                    from advanced_logging import queue_console_output
+                    self._queue = queue_console_output
+                self._queue(message.strip())
             except Exception:
                 pass
     
@@ -2343,7 +2553,6 @@ try:
     ai_chat.setup(bot, db, has_permission, log_action, create_error_embed, create_permission_denied_embed)
     handle_ai_message = ai_chat.handle_ai_message
     print("✅ AI Chat system loaded (Gemini)")
-    print(f"✅ handle_ai_message assigned: {handle_ai_message}")
 except ImportError as e:
     print(f"⚠️ AI Chat module not found: {e}")
     handle_ai_message = None
@@ -2365,7 +2574,7 @@ except Exception as e:
 # Import and setup Voice Tracker system
 try:
     import voice_tracker
-    voice_tracker.setup(bot, db, has_permission, log_action)
+    voice_tracker.setup(bot, db, has_permission, log_action, get_server_data)
     print("✅ Voice Tracker system loaded")
 except ImportError as e:
     print(f"⚠️ Voice Tracker module not found: {e}")
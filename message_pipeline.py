@@ -0,0 +1,166 @@
+import bisect
+import time
+
+from structured_logging import get_logger
+
+log = get_logger("pipeline")
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; O(log buckets) per observation"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms):
+        self.counts[bisect.bisect_left(self.bounds, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket containing the given fraction of observations"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': (self.total_ms / self.count) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms
+        }
+
+
+class MessageContext:
+    """Per-message state shared by every pipeline stage"""
+
+    __slots__ = ('message', 'guild', 'security_policy', 'stopped', 'stopped_by', 'stop_reason', '_server_data', '_load_server_data')
+
+    def __init__(self, message, security_policy=None, load_server_data=None):
+        self.message = message
+        self.guild = message.guild
+        self.security_policy = security_policy
+        self._server_data = None
+        self._load_server_data = load_server_data
+        self.stopped = False
+        self.stopped_by = None
+        self.stop_reason = None
+
+    async def server_data(self):
+        """The guild's config, loaded on first use and shared by the remaining stages"""
+        if self._server_data is None:
+            if self.guild is None or self._load_server_data is None:
+                self._server_data = {}
+            else:
+                self._server_data = await self._load_server_data(self.guild.id)
+        return self._server_data
+
+    def stop(self, reason=None):
+        """Short-circuit the pipeline after the current stage"""
+        self.stopped = True
+        self.stop_reason = reason
+
+
+class _Stage:
+    __slots__ = ('name', 'handler', 'order', 'guild_only', 'dm_only', 'histogram', 'stops', 'errors')
+
+    def __init__(self, name, handler, order, guild_only, dm_only):
+        self.name = name
+        self.handler = handler
+        self.order = order
+        self.guild_only = guild_only
+        self.dm_only = dm_only
+        self.histogram = LatencyHistogram()
+        self.stops = 0
+        self.errors = 0
+
+
+class MessagePipeline:
+    """Ordered on_message stages that share one policy/config load and can stop the chain early"""
+
+    def __init__(self):
+        self._stages = []
+        self._load_server_data = None
+        self._load_security_policy = None
+        self.messages = 0
+        self.bot_messages_skipped = 0
+
+    def configure(self, load_server_data=None, load_security_policy=None):
+        """Set the coroutines used to load a guild's config and security policy once per message"""
+        if load_server_data is not None:
+            self._load_server_data = load_server_data
+        if load_security_policy is not None:
+            self._load_security_policy = load_security_policy
+
+    def has_stage(self, name):
+        return any(stage.name == name for stage in self._stages)
+
+    def register(self, name, handler, order, guild_only=False, dm_only=False):
+        """Add (or replace) a stage; handlers are `async def handler(ctx)` and call ctx.stop() to end the chain"""
+        self._stages = [stage for stage in self._stages if stage.name != name]
+        self._stages.append(_Stage(name, handler, order, guild_only, dm_only))
+        self._stages.sort(key=lambda stage: stage.order)
+
+    async def run(self, message):
+        self.messages += 1
+        if message.author.bot:
+            self.bot_messages_skipped += 1
+            return None
+
+        policy = None
+        if message.guild and self._load_security_policy is not None:
+            policy = await self._load_security_policy(message.guild.id)
+        ctx = MessageContext(message, policy, self._load_server_data)
+
+        for stage in self._stages:
+            if stage.guild_only and not ctx.guild:
+                continue
+            if stage.dm_only and ctx.guild:
+                continue
+
+            started = time.perf_counter()
+            try:
+                await stage.handler(ctx)
+            except Exception:
+                stage.errors += 1
+                log.exception("Stage %s failed for message %s", stage.name, message.id)
+            stage.histogram.observe((time.perf_counter() - started) * 1000)
+
+            if ctx.stopped:
+                ctx.stopped_by = stage.name
+                stage.stops += 1
+                log.debug("Message %s stopped by %s: %s", message.id, stage.name, ctx.stop_reason)
+                break
+        return ctx
+
+    def stats(self):
+        """Return per-stage timing summaries in execution order"""
+        return {
+            'messages': self.messages,
+            'bot_messages_skipped': self.bot_messages_skipped,
+            'stages': [
+                dict(stage.histogram.summary(), name=stage.name, stops=stage.stops, errors=stage.errors)
+                for stage in self._stages
+            ]
+        }
+
+
+# Shared instance; main.on_message feeds it and modules register their stages
+message_pipeline = MessagePipeline()
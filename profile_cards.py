@@ -4,8 +4,11 @@ from discord import app_commands
 from main import bot, db, has_permission, get_server_data, log_action
 from brand_config import create_permission_denied_embed, create_owner_only_embed,  BOT_FOOTER, BrandColors, create_success_embed, create_error_embed, create_info_embed, create_command_embed, create_warning_embed
 from xp_commands import get_karma_level_info
-from PIL import Image, ImageDraw, ImageFont
-import requests
+from karma_store import get_karma_rank, get_member_karma
+from card_cache import avatar_cache, rendered_cards, card_cache_key
+from render_pool import render_executor
+from image_assets import assets
+from PIL import Image, ImageDraw
 from io import BytesIO
 import os
 import asyncio
@@ -23,14 +26,13 @@ ACCENT_COLOR = BrandColorsRGB.PRIMARY  # Quantum Purple
 KARMA_COLOR = BrandColorsRGB.ACCENT  # Soft Neon Violet
 COIN_COLOR = BrandColorsRGB.SECONDARY  # Hyper Blue
 
-async def download_avatar(avatar_url):
-    """Download user avatar from URL"""
-    try:
-        response = requests.get(avatar_url, timeout=10)
-        if response.status_code == 200:
-            return Image.open(BytesIO(response.content))
-    except Exception as e:
-        print(f"Error downloading avatar: {e}")
+def open_avatar(avatar_bytes):
+    """Decode downloaded avatar bytes, falling back to the placeholder avatar"""
+    if avatar_bytes:
+        try:
+            return Image.open(BytesIO(avatar_bytes))
+        except Exception as e:
+            print(f"Error decoding avatar: {e}")
 
     # Return default avatar if download fails
     default_avatar = Image.new('RGB', (128, 128), (114, 137, 218))
@@ -43,10 +45,8 @@ def create_circular_avatar(avatar_image, size=120):
     # Resize avatar
     avatar = avatar_image.resize((size, size), Image.Resampling.LANCZOS)
 
-    # Create circular mask
-    mask = Image.new('L', (size, size), 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse((0, 0, size, size), fill=255)
+    # Shared circular mask
+    mask = assets.circle_mask(size)
 
     # Apply mask to create circular avatar
     circular_avatar = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -66,22 +66,69 @@ def draw_progress_bar(draw, x, y, width, height, progress, max_value, color, bg_
         if progress_width > 0:
             draw.rounded_rectangle([x, y, x + progress_width, y + height], radius=height//2, fill=color)
 
+def encode_png(image):
+    """PNG-encode a rendered card"""
+    img_bytes = BytesIO()
+    image.save(img_bytes, format='PNG', quality=95)
+    return img_bytes.getvalue()
+
 def get_default_font(size):
-    """Get default font with fallback"""
-    try:
-        # Try to use a nice font if available
-        return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", size)
-    except:
-        try:
-            return ImageFont.truetype("/System/Library/Fonts/Arial.ttf", size)
-        except:
-            return ImageFont.load_default()
+    """Get default font with fallback, loaded once per size from the asset registry"""
+    return assets.font(size)
+
+async def collect_profile_card_fields(user, guild, karma):
+    """Everything the profile card draws; also the input to its cache key"""
+    display_name = user.display_name
+    if len(display_name) > 20:
+        display_name = display_name[:17] + "..."
+
+    # Server position (count earlier joiners instead of sorting the whole member list)
+    joined = user.joined_at or guild.created_at
+    join_position = sum(1 for member in guild.members if (member.joined_at or guild.created_at) < joined) + 1
 
-async def create_profile_card(user, guild, karma_data):
-    """Create a profile card image for the user"""
-    # Create base image
+    # Server rank based on karma
+    if db is not None:
+        rank = await get_karma_rank(db, guild.id, karma) if karma > 0 else "Unranked"
+    else:
+        rank = "N/A"
+
+    return {
+        'avatar_url': str(user.display_avatar.url),
+        'display_name': display_name,
+        'username': user.name,
+        'join_date': user.joined_at.strftime("%B %d, %Y") if user.joined_at else "Unknown",
+        'join_position': join_position,
+        'karma': karma,
+        'rank': rank,
+        'top_roles': tuple(role.name[:15] for role in user.roles if role.name != "@everyone" and role.name != "Admin")[:3],
+        'status': str(user.status)
+    }
+
+def build_profile_base():
+    """Static layer of the profile card: background, section headings and footer"""
     card = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), BACKGROUND_COLOR)
     draw = ImageDraw.Draw(card)
+    subtitle_font = get_default_font(20)
+    text_font = get_default_font(16)
+    small_font = get_default_font(14)
+
+    stats_y = 200
+    draw.text((50, stats_y), "✨ KARMA LEVEL", fill=KARMA_COLOR, font=subtitle_font)
+
+    # Server activity indicator
+    draw.text((400, stats_y), "⚡ ACTIVITY", fill=COIN_COLOR, font=subtitle_font)
+    draw.text((400, stats_y + 30), "Active Member", fill=TEXT_COLOR, font=text_font)
+    draw.text((400, stats_y + 55), "Engaged Community Member", fill=(200, 200, 200), font=small_font)
+
+    # Footer
+    draw.text((50, CARD_HEIGHT - 30), BOT_FOOTER, fill=(100, 100, 100), font=small_font)
+    return card
+
+def draw_profile_card(fields, avatar_bytes):
+    """Draw the profile card from collected fields; pure CPU work with no Discord or database access"""
+    # Copy of the pre-rendered static layer
+    card = assets.layer('profile_card')
+    draw = ImageDraw.Draw(card)
 
     # Load fonts
     title_font = get_default_font(32)
@@ -89,10 +136,8 @@ async def create_profile_card(user, guild, karma_data):
     text_font = get_default_font(16)
     small_font = get_default_font(14)
 
-    # Download and process avatar
-    avatar_url = str(user.display_avatar.url)
-    avatar_image = await download_avatar(avatar_url)
-    circular_avatar = create_circular_avatar(avatar_image, 100)
+    # Process avatar
+    circular_avatar = create_circular_avatar(open_avatar(avatar_bytes), 100)
 
     # Paste avatar
     avatar_x = 50
@@ -107,31 +152,23 @@ async def create_profile_card(user, guild, karma_data):
     info_y = 50
 
     # Username and tag
-    display_name = user.display_name
-    if len(display_name) > 20:
-        display_name = display_name[:17] + "..."
-
-    draw.text((info_x, info_y), display_name, fill=TEXT_COLOR, font=title_font)
-    draw.text((info_x, info_y + 40), f"@{user.name}", fill=(150, 150, 150), font=subtitle_font)
+    draw.text((info_x, info_y), fields['display_name'], fill=TEXT_COLOR, font=title_font)
+    draw.text((info_x, info_y + 40), f"@{fields['username']}", fill=(150, 150, 150), font=subtitle_font)
 
     # Join date
-    join_date = user.joined_at.strftime("%B %d, %Y") if user.joined_at else "Unknown"
-    draw.text((info_x, info_y + 70), f"Joined: {join_date}", fill=(200, 200, 200), font=text_font)
+    draw.text((info_x, info_y + 70), f"Joined: {fields['join_date']}", fill=(200, 200, 200), font=text_font)
 
     # Server position
-    members_sorted = sorted(guild.members, key=lambda m: m.joined_at or guild.created_at)
-    join_position = members_sorted.index(user) + 1
-    draw.text((info_x, info_y + 95), f"Member #{join_position}", fill=(200, 200, 200), font=text_font)
+    draw.text((info_x, info_y + 95), f"Member #{fields['join_position']}", fill=(200, 200, 200), font=text_font)
 
     # Stats section
     stats_y = 200
 
     # Karma information
-    karma = karma_data.get('karma', 0) if karma_data else 0
+    karma = fields['karma']
     current_level, next_level = get_karma_level_info(karma)
     level_title = current_level["title"] if current_level else "🌱 New Member"
 
-    draw.text((50, stats_y), "✨ KARMA LEVEL", fill=KARMA_COLOR, font=subtitle_font)
     draw.text((50, stats_y + 30), f"{karma} points", fill=TEXT_COLOR, font=text_font)
     draw.text((50, stats_y + 55), level_title, fill=KARMA_COLOR, font=text_font)
 
@@ -149,16 +186,11 @@ async def create_profile_card(user, guild, karma_data):
     else:
         draw.text((50, stats_y + 80), "MAX LEVEL!", fill=KARMA_COLOR, font=text_font)
 
-    # Server activity indicator
-    draw.text((400, stats_y), "⚡ ACTIVITY", fill=COIN_COLOR, font=subtitle_font)
-    draw.text((400, stats_y + 30), "Active Member", fill=TEXT_COLOR, font=text_font)
-    draw.text((400, stats_y + 55), "Engaged Community Member", fill=(200, 200, 200), font=small_font)
-
     # Roles section
-    top_roles = [role for role in user.roles if role.name != "@everyone" and role.name != "Admin"][:3]
+    top_roles = fields['top_roles']
     if top_roles:
         draw.text((400, stats_y + 80), "🎭 TOP ROLES", fill=ACCENT_COLOR, font=text_font)
-        role_text = ", ".join([role.name[:15] for role in top_roles])
+        role_text = ", ".join(top_roles)
         if len(role_text) > 35:
             role_text = role_text[:32] + "..."
         draw.text((400, stats_y + 105), role_text, fill=(200, 200, 200), font=small_font)
@@ -166,30 +198,47 @@ async def create_profile_card(user, guild, karma_data):
     # Status indicators
     status_y = CARD_HEIGHT - 80
 
-    # Server rank based on karma
-    if db is not None:
-        users_sorted = await db.karma.find({'guild_id': str(guild.id)}).sort('karma', -1).to_list(None)
-        rank = next((i + 1 for i, u in enumerate(users_sorted) if u['user_id'] == str(user.id)), "Unranked")
-    else:
-        rank = "N/A"
-
-    draw.text((50, status_y), f"🏆 Server Rank: #{rank}", fill=ACCENT_COLOR, font=text_font)
+    draw.text((50, status_y), f"🏆 Server Rank: #{fields['rank']}", fill=ACCENT_COLOR, font=text_font)
 
     # User status
-    status_emoji = {"online": "🟢", "idle": "🟡", "dnd": "🔴", "offline": "⚫"}.get(str(user.status), "⚫")
-    draw.text((400, status_y), f"{status_emoji} {str(user.status).title()}", fill=TEXT_COLOR, font=text_font)
-
-    # Footer
-    from brand_config import create_permission_denied_embed, create_owner_only_embed,  BOT_FOOTER
-    draw.text((50, CARD_HEIGHT - 30), BOT_FOOTER, fill=(100, 100, 100), font=small_font)
+    status = fields['status']
+    status_emoji = {"online": "🟢", "idle": "🟡", "dnd": "🔴", "offline": "⚫"}.get(status, "⚫")
+    draw.text((400, status_y), f"{status_emoji} {status.title()}", fill=TEXT_COLOR, font=text_font)
 
     return card
 
-async def create_bot_profile_card(bot, owner_status, owner_status_emoji, uptime_str, server_count):
-    """Create a profile card for the bot with information"""
+def render_profile_card(fields, avatar_bytes):
+    """Draw and encode the profile card; runs on a render thread"""
+    return encode_png(draw_profile_card(fields, avatar_bytes))
+
+async def render_profile_card_png(user, guild, karma):
+    """Profile card as PNG bytes; identical cards are served from the rendered-card cache"""
+    fields = await collect_profile_card_fields(user, guild, karma)
+    key = card_cache_key('profile', *sorted(fields.items()))
+    png = rendered_cards.get(key)
+    if png is not None:
+        return png
+
+    png = await render_executor.run('profile', render_profile_card, fields, await avatar_cache.get(fields['avatar_url']))
+    rendered_cards.put(key, png, len(png))
+    return png
+
+async def render_bot_profile_card_png(bot, owner_status, owner_status_emoji, uptime_str, server_count):
+    """Bot profile card as PNG bytes, drawn and encoded off the event loop"""
     from main import BOT_OWNER_NAME, BOT_TAGLINE
-    from brand_config import create_permission_denied_embed, create_owner_only_embed,  BOT_NAME, BOT_VERSION
-    import time
+    avatar_bytes = await avatar_cache.get(str(bot.user.display_avatar.url))
+    return await render_executor.run(
+        'bot_profile', render_bot_profile_card,
+        bot.user.name, BOT_OWNER_NAME, BOT_TAGLINE, owner_status, owner_status_emoji, uptime_str, server_count, avatar_bytes
+    )
+
+def render_bot_profile_card(*args):
+    """Draw and encode the bot profile card; runs on a render thread"""
+    return encode_png(draw_bot_profile_card(*args))
+
+def build_bot_profile_base():
+    """Static layer of the bot profile card: background, headings, credits, features and build info"""
+    from brand_config import BOT_NAME, BOT_VERSION, BOT_OWNER_DESCRIPTION, BOT_DIRECTOR_NAME, BOT_DIRECTOR_DESCRIPTION
 
     # Create base image with more height to avoid overlap
     card = Image.new('RGB', (CARD_WIDTH, 520), BACKGROUND_COLOR)
@@ -201,69 +250,21 @@ async def create_bot_profile_card(bot, owner_status, owner_status_emoji, uptime_
     text_font = get_default_font(14)
     small_font = get_default_font(12)
 
-    # Download and process bot avatar
-    avatar_url = str(bot.user.display_avatar.url)
-    avatar_image = await download_avatar(avatar_url)
-    circular_avatar = create_circular_avatar(avatar_image, 100)
-
-    # Paste avatar with special border for bot
-    avatar_x = 50
-    avatar_y = 30
-    card.paste(circular_avatar, (avatar_x, avatar_y), circular_avatar)
-
-    # Draw special bot border
-    draw.ellipse([avatar_x-3, avatar_y-3, avatar_x+103, avatar_y+103], outline=ACCENT_COLOR, width=2)
-    draw.ellipse([avatar_x-5, avatar_y-5, avatar_x+105, avatar_y+105], outline=KARMA_COLOR, width=1)
-
     # Bot information section
     info_x = 170
     info_y = 35
-
-    # Bot name and tag
     draw.text((info_x, info_y), BOT_NAME, fill=TEXT_COLOR, font=title_font)
-    draw.text((info_x, info_y + 30), f"@{bot.user.name}", fill=(150, 150, 150), font=subtitle_font)
     draw.text((info_x, info_y + 50), f"{BOT_VERSION} • 🤖 Discord Bot", fill=ACCENT_COLOR, font=text_font)
 
-    # Tagline (properly wrapped)
-    tagline_words = BOT_TAGLINE.split()
-    line1 = " ".join(tagline_words[:6])  # First 6 words
-    line2 = " ".join(tagline_words[6:]) if len(tagline_words) > 6 else ""
-    
-    draw.text((info_x, info_y + 70), line1, fill=(200, 200, 200), font=small_font)
-    if line2:
-        draw.text((info_x, info_y + 85), line2, fill=(200, 200, 200), font=small_font)
-
     # Stats section - better spacing (adjusted for more content)
     stats_y = 140
-
-    # Server count and status
     draw.text((50, stats_y), "🏰 SERVER STATISTICS", fill=ACCENT_COLOR, font=subtitle_font)
-    draw.text((50, stats_y + 25), f"📊 {server_count} servers active", fill=TEXT_COLOR, font=text_font)
-    draw.text((50, stats_y + 45), f"⏰ Uptime: {uptime_str}", fill=(200, 200, 200), font=text_font)
     draw.text((50, stats_y + 65), "🟢 Status: Online & Ready", fill=(46, 204, 113), font=text_font)
 
-    # Import descriptions here to avoid circular imports
-    from brand_config import BOT_OWNER_DESCRIPTION, BOT_DIRECTOR_NAME, BOT_DIRECTOR_DESCRIPTION
-    
     # Owner information
     draw.text((400, stats_y), "⚙️ FOUNDER & LEAD DEVELOPER", fill=KARMA_COLOR, font=subtitle_font)
-    draw.text((400, stats_y + 25), BOT_OWNER_NAME, fill=TEXT_COLOR, font=text_font)
-
-    # Better status display
-    if owner_status == "Offline":
-        status_color = (128, 128, 128)
-    elif owner_status == "Online":
-        status_color = (46, 204, 113)
-    elif owner_status == "Idle":
-        status_color = (255, 193, 7)
-    elif owner_status == "Do Not Disturb":
-        status_color = (220, 53, 69)
-    else:
-        status_color = (200, 200, 200)
-
-    draw.text((400, stats_y + 45), f"{owner_status_emoji} {owner_status}", fill=status_color, font=text_font)
     draw.text((400, stats_y + 65), BOT_OWNER_DESCRIPTION[:50], fill=ACCENT_COLOR, font=small_font)
-    
+
     # Director information
     draw.text((50, stats_y + 110), "📌 CORE ARCHITECTURE DIRECTOR", fill=KARMA_COLOR, font=subtitle_font)
     draw.text((50, stats_y + 135), BOT_DIRECTOR_NAME, fill=TEXT_COLOR, font=text_font)
@@ -302,6 +303,63 @@ async def create_bot_profile_card(bot, owner_status, owner_status_emoji, uptime_
     # Key Commands Info
     draw.text((50, build_y + 60), "Key Commands: /help | /invite | /set-update", font=small_font, fill=ACCENT_COLOR)
 
+    return card
+
+def draw_bot_profile_card(bot_username, owner_name, tagline, owner_status, owner_status_emoji, uptime_str, server_count, avatar_bytes):
+    """Draw the dynamic parts of the bot profile card onto a copy of its static layer"""
+    card = assets.layer('bot_profile_card')
+    draw = ImageDraw.Draw(card)
+
+    subtitle_font = get_default_font(16)
+    text_font = get_default_font(14)
+    small_font = get_default_font(12)
+
+    # Process bot avatar
+    circular_avatar = create_circular_avatar(open_avatar(avatar_bytes), 100)
+
+    # Paste avatar with special border for bot
+    avatar_x = 50
+    avatar_y = 30
+    card.paste(circular_avatar, (avatar_x, avatar_y), circular_avatar)
+
+    # Draw special bot border
+    draw.ellipse([avatar_x-3, avatar_y-3, avatar_x+103, avatar_y+103], outline=ACCENT_COLOR, width=2)
+    draw.ellipse([avatar_x-5, avatar_y-5, avatar_x+105, avatar_y+105], outline=KARMA_COLOR, width=1)
+
+    # Bot tag and tagline (properly wrapped)
+    info_x = 170
+    info_y = 35
+    draw.text((info_x, info_y + 30), f"@{bot_username}", fill=(150, 150, 150), font=subtitle_font)
+
+    tagline_words = tagline.split()
+    line1 = " ".join(tagline_words[:6])  # First 6 words
+    line2 = " ".join(tagline_words[6:]) if len(tagline_words) > 6 else ""
+
+    draw.text((info_x, info_y + 70), line1, fill=(200, 200, 200), font=small_font)
+    if line2:
+        draw.text((info_x, info_y + 85), line2, fill=(200, 200, 200), font=small_font)
+
+    # Server count and uptime
+    stats_y = 140
+    draw.text((50, stats_y + 25), f"📊 {server_count} servers active", fill=TEXT_COLOR, font=text_font)
+    draw.text((50, stats_y + 45), f"⏰ Uptime: {uptime_str}", fill=(200, 200, 200), font=text_font)
+
+    # Owner name and status
+    draw.text((400, stats_y + 25), owner_name, fill=TEXT_COLOR, font=text_font)
+
+    if owner_status == "Offline":
+        status_color = (128, 128, 128)
+    elif owner_status == "Online":
+        status_color = (46, 204, 113)
+    elif owner_status == "Idle":
+        status_color = (255, 193, 7)
+    elif owner_status == "Do Not Disturb":
+        status_color = (220, 53, 69)
+    else:
+        status_color = (200, 200, 200)
+
+    draw.text((400, stats_y + 45), f"{owner_status_emoji} {owner_status}", fill=status_color, font=text_font)
+
     # Footer with RXT ENGINE theme
     footer_y = 490
     footer_text = f"ʀxᴛ ᴇɴɢɪɴᴇ • ᴀᴄᴛɪᴠᴇ ɪɴ {server_count} sᴇʀᴠᴇʀs • ᴄᴏᴍᴍᴀɴᴅɪɴɢ ᴠɪsɪᴏɴ ᴛᴏᴋʏᴏ<3 • ᴘᴏᴡᴇʀᴇᴅ ʙʏ ʀ!ᴏ</>"
@@ -322,19 +380,11 @@ async def profile_card(interaction: discord.Interaction, user: discord.Member =
     await interaction.response.defer()
 
     try:
-        # Get user data from databases
-        karma_data = None
-
-        if db is not None:
-            karma_data = await db.karma.find_one({'user_id': str(target_user.id), 'guild_id': str(interaction.guild.id)})
-
-        # Create profile card
-        card_image = await create_profile_card(target_user, interaction.guild, karma_data)
+        # Karma including changes still waiting in the write-behind buffer
+        karma = await get_member_karma(db, interaction.guild.id, target_user.id) if db is not None else 0
 
-        # Save image to bytes
-        img_bytes = BytesIO()
-        card_image.save(img_bytes, format='PNG', quality=95)
-        img_bytes.seek(0)
+        # Create profile card (repeat views of an unchanged card come from memory)
+        img_bytes = BytesIO(await render_profile_card_png(target_user, interaction.guild, karma))
 
         # Create Discord file
         file = discord.File(img_bytes, filename=f"profile_{target_user.id}.png")
@@ -356,8 +406,7 @@ async def profile_card(interaction: discord.Interaction, user: discord.Member =
         print(f"Error creating profile card: {e}")
 
         # Fallback embed if image generation fails
-        karma_data = await db.karma.find_one({'user_id': str(target_user.id), 'guild_id': str(interaction.guild.id)}) if db is not None else None
-        karma = karma_data.get('karma', 0) if karma_data else 0
+        karma = await get_member_karma(db, interaction.guild.id, target_user.id) if db is not None else 0
 
         embed = discord.Embed(
             title=f"👤 **{target_user.display_name}'s Profile**",
@@ -370,6 +419,52 @@ async def profile_card(interaction: discord.Interaction, user: discord.Member =
 
         await interaction.followup.send(embed=embed)
 
+def build_server_card_base():
+    """Static layer of the server card: background and section headings"""
+    card = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(card)
+    subtitle_font = get_default_font(22)
+    draw.text((50, 200), "📊 SERVER STATISTICS", fill=ACCENT_COLOR, font=subtitle_font)
+    draw.text((400, 200), "📁 CHANNELS", fill=COIN_COLOR, font=subtitle_font)
+    return card
+
+def render_server_card(fields, icon_bytes):
+    """Draw and encode the server overview card; runs on a render thread"""
+    card = assets.layer('server_card')
+    draw = ImageDraw.Draw(card)
+
+    # Load fonts
+    title_font = get_default_font(36)
+    text_font = get_default_font(18)
+
+    # Server icon
+    if icon_bytes is not None:
+        circular_icon = create_circular_avatar(open_avatar(icon_bytes), 120)
+        card.paste(circular_icon, (50, 50), circular_icon)
+        draw.ellipse([48, 48, 172, 172], outline=ACCENT_COLOR, width=4)
+
+    # Server name
+    server_name = fields['name']
+    if len(server_name) > 25:
+        server_name = server_name[:22] + "..."
+
+    draw.text((200, 70), server_name, fill=TEXT_COLOR, font=title_font)
+    draw.text((200, 115), f"Created: {fields['created']}", fill=(200, 200, 200), font=text_font)
+
+    # Member stats
+    stats_y = 200
+    draw.text((50, stats_y + 40), f"👥 {fields['member_count']} total members", fill=TEXT_COLOR, font=text_font)
+    draw.text((50, stats_y + 65), f"🟢 {fields['online_members']} online • 👤 {fields['human_count']} humans • 🤖 {fields['bot_count']} bots", fill=(200, 200, 200), font=text_font)
+
+    # Channels
+    draw.text((400, stats_y + 40), f"💬 {fields['text_channels']} text channels", fill=TEXT_COLOR, font=text_font)
+    draw.text((400, stats_y + 65), f"🔊 {fields['voice_channels']} voice channels", fill=TEXT_COLOR, font=text_font)
+
+    # Footer
+    draw.text((50, CARD_HEIGHT - 30), f"⚡ {fields['name']} Server Overview • RXT ENGINE", fill=(100, 100, 100), font=get_default_font(12))
+
+    return encode_png(card)
+
 @bot.tree.command(name="servercard", description="🏰 Generate a beautiful server overview card")
 async def server_card(interaction: discord.Interaction):
     if not await has_permission(interaction, "junior_moderator"):
@@ -381,53 +476,22 @@ async def server_card(interaction: discord.Interaction):
     try:
         guild = interaction.guild
 
-        # Create server card
-        card = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), BACKGROUND_COLOR)
-        draw = ImageDraw.Draw(card)
-
-        # Load fonts
-        title_font = get_default_font(36)
-        subtitle_font = get_default_font(22)
-        text_font = get_default_font(18)
-
-        # Server icon
-        if guild.icon:
-            icon_url = str(guild.icon.url)
-            icon_image = await download_avatar(icon_url)
-            circular_icon = create_circular_avatar(icon_image, 120)
-            card.paste(circular_icon, (50, 50), circular_icon)
-            draw.ellipse([48, 48, 172, 172], outline=ACCENT_COLOR, width=4)
-
-        # Server name
-        server_name = guild.name
-        if len(server_name) > 25:
-            server_name = server_name[:22] + "..."
-
-        draw.text((200, 70), server_name, fill=TEXT_COLOR, font=title_font)
-        draw.text((200, 115), f"Created: {guild.created_at.strftime('%B %d, %Y')}", fill=(200, 200, 200), font=text_font)
-
-        # Member stats
+        # Member stats are gathered here; drawing and encoding happen on a render thread
         online_members = sum(1 for member in guild.members if member.status != discord.Status.offline)
         bot_count = sum(1 for member in guild.members if member.bot)
-        human_count = guild.member_count - bot_count
-
-        stats_y = 200
-        draw.text((50, stats_y), "📊 SERVER STATISTICS", fill=ACCENT_COLOR, font=subtitle_font)
-        draw.text((50, stats_y + 40), f"👥 {guild.member_count} total members", fill=TEXT_COLOR, font=text_font)
-        draw.text((50, stats_y + 65), f"🟢 {online_members} online • 👤 {human_count} humans • 🤖 {bot_count} bots", fill=(200, 200, 200), font=text_font)
-
-        # Channels
-        draw.text((400, stats_y), "📁 CHANNELS", fill=COIN_COLOR, font=subtitle_font)
-        draw.text((400, stats_y + 40), f"💬 {len(guild.text_channels)} text channels", fill=TEXT_COLOR, font=text_font)
-        draw.text((400, stats_y + 65), f"🔊 {len(guild.voice_channels)} voice channels", fill=TEXT_COLOR, font=text_font)
-
-        # Footer
-        draw.text((50, CARD_HEIGHT - 30), f"⚡ {guild.name} Server Overview • RXT ENGINE", fill=(100, 100, 100), font=get_default_font(12))
-
-        # Save and send
-        img_bytes = BytesIO()
-        card.save(img_bytes, format='PNG', quality=95)
-        img_bytes.seek(0)
+        fields = {
+            'name': guild.name,
+            'created': guild.created_at.strftime('%B %d, %Y'),
+            'member_count': guild.member_count,
+            'online_members': online_members,
+            'bot_count': bot_count,
+            'human_count': guild.member_count - bot_count,
+            'text_channels': len(guild.text_channels),
+            'voice_channels': len(guild.voice_channels)
+        }
+        icon_bytes = (await avatar_cache.get(str(guild.icon.url)) or b"") if guild.icon else None
+        png = await render_executor.run('server_card', render_server_card, fields, icon_bytes)
+        img_bytes = BytesIO(png)
 
         file = discord.File(img_bytes, filename=f"server_{guild.id}.png")
 
@@ -473,12 +537,10 @@ async def bot_profile(interaction: discord.Interaction):
         server_count = len(bot.guilds) if hasattr(bot, 'guilds') else 0
 
         # Create the bot profile card
-        bot_card_image = await create_bot_profile_card(bot, owner_status, owner_status_emoji, uptime_str, server_count)
+        bot_card_png = await render_bot_profile_card_png(bot, owner_status, owner_status_emoji, uptime_str, server_count)
 
-        if bot_card_image:
-            img_bytes = BytesIO()
-            bot_card_image.save(img_bytes, format='PNG', quality=95)
-            img_bytes.seek(0)
+        if bot_card_png:
+            img_bytes = BytesIO(bot_card_png)
 
             file = discord.File(img_bytes, filename="bot_profile.png")
 
@@ -500,3 +562,8 @@ async def bot_profile(interaction: discord.Interaction):
     except Exception as e:
         print(f"Error generating bot profile card: {e}")
         await interaction.followup.send("❌ An error occurred while generating the bot profile card. Please try again later.", ephemeral=True), create_success_embed, create_error_embed, create_info_embed, create_command_embed, create_warning_embed, create_permission_denied_embed, create_owner_only_embed
+
+# Static card layers, rendered once on first use and copied per card
+assets.register_layer('profile_card', build_profile_base)
+assets.register_layer('bot_profile_card', build_bot_profile_base)
+assets.register_layer('server_card', build_server_card_base)
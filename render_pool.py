@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from message_pipeline import LatencyHistogram
+from structured_logging import get_logger
+
+log = get_logger("render")
+
+# Configuration
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', str(min(4, os.cpu_count() or 1))))  # Pillow releases the GIL while drawing/encoding
+RENDER_MAX_PENDING = int(os.getenv('RENDER_MAX_PENDING', '64'))  # queued + running renders before new ones are refused
+
+
+class RenderBusy(Exception):
+    """Raised when RENDER_MAX_PENDING renders are already waiting"""
+
+    def __str__(self):
+        return "Image renderer is busy, please try again in a moment"
+
+
+class _KindStats:
+    __slots__ = ('queue_wait', 'render', 'errors')
+
+    def __init__(self):
+        self.queue_wait = LatencyHistogram()
+        self.render = LatencyHistogram()
+        self.errors = 0
+
+
+class RenderExecutor:
+    """Shared thread pool for PIL drawing and PNG encoding, with backpressure and per-kind latency"""
+
+    def __init__(self, workers=RENDER_WORKERS, max_pending=RENDER_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self._kinds = {}  # kind -> _KindStats
+        self.pending = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _timed(func, args):
+        # Runs on a render thread; timings are recorded back on the event loop
+        started = time.perf_counter()
+        result = func(*args)
+        return result, started, time.perf_counter()
+
+    async def run(self, kind, func, *args):
+        """Run `func(*args)` on a render thread; raises RenderBusy when the queue is full"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise RenderBusy()
+        stats = self._kinds.get(kind)
+        if stats is None:
+            stats = self._kinds[kind] = _KindStats()
+
+        self.pending += 1
+        enqueued = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._pool, self._timed, func, args)
+            stats.queue_wait.observe((started - enqueued) * 1000)
+            stats.render.observe((finished - started) * 1000)
+            return result
+        except Exception:
+            stats.errors += 1
+            log.exception("Render %s failed", kind)
+            raise
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'kinds': {
+                kind: dict(stats.render.summary(), queue_p95_ms=stats.queue_wait.percentile(0.95), errors=stats.errors)
+                for kind, stats in self._kinds.items()
+            }
+        }
+
+
+# Shared executor for every image the bot renders
+render_executor = RenderExecutor()
@@ -6,13 +6,15 @@ import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict
 import re
-from collections import defaultdict
+import copy
+from collections import defaultdict, deque
 from brand_config import BrandColors, VisualElements, BOT_FOOTER
+from message_pipeline import message_pipeline
 
 # Global logging import (avoid circular import by not importing main)
 _log_to_global = None
 
-user_message_timestamps = defaultdict(lambda: defaultdict(list))
+user_message_timestamps = defaultdict(lambda: defaultdict(deque))
 user_join_timestamps = defaultdict(list)
 user_message_deletion_attempts = defaultdict(lambda: defaultdict(list))
 user_message_deletions_bulk = defaultdict(lambda: defaultdict(list))  # Track bulk deletes by user
@@ -28,67 +30,189 @@ _log_action = None
 _has_permission = None
 _setup_complete = False
 
+DEFAULT_SECURITY_CONFIG = {
+    'security_enabled': False,
+    'antiraid_enabled': False,
+    'antinuke_enabled': False,
+    'antilink_enabled': False,
+    'antispam_enabled': False,
+    'massmention_enabled': False,
+    'webhookguard_enabled': False,
+    'antirole_enabled': False,
+    'massdelete_enabled': False,
+    
+    'quarantine_role_id': None,
+    'quarantine_channel_id': None,
+    'quarantine_category_id': None,
+    
+    'whitelist_users': [],
+    'whitelist_roles': [],
+    'whitelist_bots': [],
+    
+    'raid_join_threshold': 10,
+    'raid_time_window': 10,
+    'raid_account_age_days': 7,
+    
+    'spam_message_threshold': 5,
+    'spam_time_window': 5,
+    
+    'allowed_domains': [],
+    'blocked_domains': ['discord.gg', 'bit.ly', 't.co'],
+    
+    'quarantine_base_duration': 900,
+    'mass_delete_threshold': 5,
+    'mass_delete_time_window': 5
+}
+
+URL_PATTERN = re.compile(r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&/=]*)')
+
+def _extract_host(url: str) -> str:
+    """Return the lowercase hostname of a URL matched by URL_PATTERN"""
+    host = url.split('://', 1)[-1]
+    for separator in '/?#':
+        host = host.split(separator, 1)[0]
+    host = host.rsplit('@', 1)[-1].split(':', 1)[0]
+    return host.lower().rstrip('.')
+
+class DomainSuffixTrie:
+    """Trie over reversed domain labels; `example.com` matches itself and every subdomain"""
+    
+    _TERMINAL = object()
+    
+    def __init__(self, domains=()):
+        self._root = {}
+        for domain in domains:
+            self.add(domain)
+    
+    def add(self, domain: str):
+        labels = domain.lower().strip('.').split('.')
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node[self._TERMINAL] = True
+    
+    def matches(self, host: str) -> bool:
+        node = self._root
+        for label in reversed(host.split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if self._TERMINAL in node:
+                return True
+        return False
+    
+    def __bool__(self):
+        return bool(self._root)
+
+def _compile_domain_rules(domains):
+    """Split configured domains into a host suffix trie and path-specific substring rules"""
+    trie = DomainSuffixTrie()
+    path_rules = []
+    for domain in domains or []:
+        domain = str(domain).strip().lower()
+        if not domain:
+            continue
+        bare = domain.split('://', 1)[-1]
+        if bare.startswith('www.'):
+            bare = bare[4:]
+        if '/' in bare.rstrip('/'):
+            # Entries like "discord.gg/invite" keep the old substring behaviour
+            path_rules.append(bare)
+        else:
+            trie.add(bare.rstrip('/'))
+    return trie, tuple(path_rules)
+
+class SecurityPolicy:
+    """Immutable, precompiled view of a guild's security config used on the message hot path"""
+    
+    __slots__ = (
+        'security_enabled', 'massmention_enabled', 'antispam_enabled', 'antilink_enabled',
+        'whitelist_users', 'whitelist_roles', 'whitelist_bots',
+        'spam_message_threshold', 'spam_time_window',
+        'blocked_domains', 'blocked_paths', 'allowed_domains', 'allowed_paths'
+    )
+    
+    def __init__(self, config: Dict):
+        def _ids(key):
+            return frozenset(int(value) for value in config.get(key) or [])
+        
+        blocked_domains, blocked_paths = _compile_domain_rules(config.get('blocked_domains'))
+        allowed_domains, allowed_paths = _compile_domain_rules(config.get('allowed_domains'))
+        values = {
+            'security_enabled': bool(config.get('security_enabled')),
+            'massmention_enabled': bool(config.get('massmention_enabled')),
+            'antispam_enabled': bool(config.get('antispam_enabled')),
+            'antilink_enabled': bool(config.get('antilink_enabled')),
+            'whitelist_users': _ids('whitelist_users'),
+            'whitelist_roles': _ids('whitelist_roles'),
+            'whitelist_bots': _ids('whitelist_bots'),
+            'spam_message_threshold': config.get('spam_message_threshold', 5),
+            'spam_time_window': config.get('spam_time_window', 5),
+            'blocked_domains': blocked_domains,
+            'blocked_paths': blocked_paths,
+            'allowed_domains': allowed_domains,
+            'allowed_paths': allowed_paths,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("SecurityPolicy is immutable; use update_security_config to change it")
+    
+    def is_whitelisted(self, user: discord.Member) -> bool:
+        if user.guild.owner_id == user.id:
+            return True
+        if user.id in self.whitelist_users:
+            return True
+        if user.bot and user.id in self.whitelist_bots:
+            return True
+        if self.whitelist_roles:
+            return any(role.id in self.whitelist_roles for role in user.roles)
+        return False
+    
+    def find_blocked_url(self, content: str) -> Optional[str]:
+        """Return the first blocked (and not explicitly allowed) URL in content, if any"""
+        if 'http' not in content:
+            return None
+        for match in URL_PATTERN.finditer(content):
+            url = match.group(0)
+            host = _extract_host(url)
+            lowered = url.lower()
+            if not (self.blocked_domains.matches(host) or any(rule in lowered for rule in self.blocked_paths)):
+                continue
+            if self.allowed_domains.matches(host) or any(rule in lowered for rule in self.allowed_paths):
+                continue
+            return url
+        return None
+
+# guild_id -> SecurityPolicy, rebuilt by update_security_config
+_security_policies: Dict[int, SecurityPolicy] = {}
+
 async def get_security_config(guild_id: int) -> Dict:
     server_data = await _get_server_data(guild_id)
-    default_config = {
-        'security_enabled': False,
-        'antiraid_enabled': False,
-        'antinuke_enabled': False,
-        'antilink_enabled': False,
-        'antispam_enabled': False,
-        'massmention_enabled': False,
-        'webhookguard_enabled': False,
-        'antirole_enabled': False,
-        'massdelete_enabled': False,
-        
-        'quarantine_role_id': None,
-        'quarantine_channel_id': None,
-        'quarantine_category_id': None,
-        
-        'whitelist_users': [],
-        'whitelist_roles': [],
-        'whitelist_bots': [],
-        
-        'raid_join_threshold': 10,
-        'raid_time_window': 10,
-        'raid_account_age_days': 7,
-        
-        'spam_message_threshold': 5,
-        'spam_time_window': 5,
-        
-        'allowed_domains': [],
-        'blocked_domains': ['discord.gg', 'bit.ly', 't.co'],
-        
-        'quarantine_base_duration': 900,
-        'mass_delete_threshold': 5,
-        'mass_delete_time_window': 5
-    }
+    default_config = copy.deepcopy(DEFAULT_SECURITY_CONFIG)
     
     security_config = server_data.get('security_config', {})
     default_config.update(security_config)
     return default_config
 
+async def get_security_policy(guild_id: int) -> SecurityPolicy:
+    guild_id = int(guild_id)
+    policy = _security_policies.get(guild_id)
+    if policy is None:
+        policy = SecurityPolicy(await get_security_config(guild_id))
+        _security_policies[guild_id] = policy
+    return policy
+
 async def update_security_config(guild_id: int, config_data: Dict):
     await _update_server_data(guild_id, {'security_config': config_data})
+    merged = copy.deepcopy(DEFAULT_SECURITY_CONFIG)
+    merged.update(config_data)
+    _security_policies[int(guild_id)] = SecurityPolicy(merged)
 
 async def is_whitelisted(guild_id: int, user: discord.Member) -> bool:
-    if user.guild.owner_id == user.id:
-        return True
-    
-    config = await get_security_config(guild_id)
-    
-    if user.id in config.get('whitelist_users', []):
-        return True
-    
-    if user.bot and user.id in config.get('whitelist_bots', []):
-        return True
-    
-    user_role_ids = [role.id for role in user.roles]
-    whitelist_roles = config.get('whitelist_roles', [])
-    if any(role_id in whitelist_roles for role_id in user_role_ids):
-        return True
-    
-    return False
+    policy = await get_security_policy(guild_id)
+    return policy.is_whitelisted(user)
 
 async def get_or_create_quarantine_category(guild: discord.Guild, config: Dict):
     category_id = config.get('quarantine_category_id')
@@ -585,23 +709,18 @@ def setup(bot: commands.Bot, get_server_data_func, update_server_data_func, log_
         except:
             pass
     
-    @bot.listen('on_message')
-    async def security_on_message(message):
-        if message.author.bot:
-            return
+    # Runs first in the shared message pipeline so actioned messages stop costing work downstream
+    async def security_on_message(ctx):
+        message = ctx.message
+        policy = ctx.security_policy
         
-        if not message.guild:
+        if not policy.security_enabled:
             return
         
-        config = await get_security_config(message.guild.id)
-        
-        if not config.get('security_enabled'):
+        if policy.is_whitelisted(message.author):
             return
         
-        if await is_whitelisted(message.guild.id, message.author):
-            return
-        
-        if config.get('massmention_enabled'):
+        if policy.massmention_enabled:
             if '@everyone' in message.content or '@here' in message.content:
                 try:
                     await message.delete()
@@ -612,21 +731,20 @@ def setup(bot: commands.Bot, get_server_data_func, update_server_data_func, log_
                 
                 await _log_action(message.guild.id, "security", 
                                f"🚫 [MASS MENTION BLOCKED] {message.author} attempted @everyone/@here")
+                ctx.stop("mass_mention")
                 return
         
-        if config.get('antispam_enabled'):
+        if policy.antispam_enabled:
             user_id = message.author.id
             guild_id = message.guild.id
             current_time = time.time()
             
-            user_message_timestamps[guild_id][user_id].append(current_time)
-            
-            user_message_timestamps[guild_id][user_id] = [
-                ts for ts in user_message_timestamps[guild_id][user_id]
-                if current_time - ts < config.get('spam_time_window', 5)
-            ]
+            timestamps = user_message_timestamps[guild_id][user_id]
+            timestamps.append(current_time)
+            while timestamps and current_time - timestamps[0] >= policy.spam_time_window:
+                timestamps.popleft()
             
-            if len(user_message_timestamps[guild_id][user_id]) > config.get('spam_message_threshold', 5):
+            if len(timestamps) > policy.spam_message_threshold:
                 try:
                     await message.delete()
                 except:
@@ -637,36 +755,27 @@ def setup(bot: commands.Bot, get_server_data_func, update_server_data_func, log_
                 await _log_action(message.guild.id, "security", 
                                f"🚫 [ANTI-SPAM] {message.author} placed in quarantine for spam/flood")
                 
-                user_message_timestamps[guild_id][user_id].clear()
+                timestamps.clear()
+                ctx.stop("anti_spam")
                 return
         
-        if config.get('antilink_enabled'):
-            url_pattern = r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&/=]*)'
-            urls = re.findall(url_pattern, message.content)
-            
-            if urls:
-                allowed_domains = config.get('allowed_domains', [])
-                blocked_domains = config.get('blocked_domains', [])
+        if policy.antilink_enabled:
+            url = policy.find_blocked_url(message.content)
+            if url:
+                try:
+                    await message.delete()
+                except:
+                    pass
                 
-                for url in urls:
-                    is_blocked = False
-                    
-                    for blocked_domain in blocked_domains:
-                        if blocked_domain in url:
-                            is_blocked = True
-                            break
-                    
-                    if is_blocked and not any(allowed_domain in url for allowed_domain in allowed_domains):
-                        try:
-                            await message.delete()
-                        except:
-                            pass
-                        
-                        await apply_quarantine(message.author, f"Posted blocked link: {url}", "anti_link")
-                        
-                        await _log_action(message.guild.id, "security", 
-                                       f"🚫 [ANTI-LINK] {message.author} placed in quarantine for blocked link")
-                        return
+                await apply_quarantine(message.author, f"Posted blocked link: {url}", "anti_link")
+                
+                await _log_action(message.guild.id, "security", 
+                               f"🚫 [ANTI-LINK] {message.author} placed in quarantine for blocked link")
+                ctx.stop("anti_link")
+                return
+    
+    message_pipeline.configure(load_security_policy=get_security_policy)
+    message_pipeline.register("security", security_on_message, order=10, guild_only=True)
     
     @bot.listen('on_member_join')
     async def security_on_member_join(member):
@@ -1,18 +1,22 @@
+import io
 import discord
 from discord.ext import commands
 from discord import app_commands
 from main import bot
 from brand_config import create_permission_denied_embed, create_owner_only_embed,  BOT_FOOTER, BrandColors, create_success_embed, create_error_embed, create_info_embed, create_command_embed, create_warning_embed
-from main import has_permission, get_server_data, update_server_data, log_action
-from captcha_generator import CaptchaGenerator
+from main import db, has_permission, get_server_data, update_server_data, log_action
+from captcha_pool import captcha_pool
+from captcha_store import captcha_challenges, CAPTCHA_OK, CAPTCHA_WRONG, CAPTCHA_LOCKED
 
-# CAPTCHA tracking data
-security_data = {
-    'captcha_data': {}  # Store active CAPTCHA challenges {user_id: captcha_text}
-}
+# Pending challenges expire on their own; CAPTCHA_PERSIST keeps them in Mongo across restarts
+captcha_challenges.attach_db(db)
 
-# Initialize CAPTCHA generator
-captcha_gen = CaptchaGenerator()
+async def warm_captcha_pool():
+    """Fill the pre-rendered CAPTCHA pool before the first verification arrives"""
+    captcha_pool.start()
+    await captcha_challenges.ensure_indexes()
+
+bot.add_listener(warm_captcha_pool, 'on_ready')
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CAPTCHA VERIFICATION SYSTEM
@@ -105,21 +109,18 @@ class CaptchaModal(discord.ui.Modal, title='🔐 CAPTCHA Verification'):
         min_length=6
     )
     
-    def __init__(self, correct_captcha, verified_role, remove_role=None):
+    def __init__(self, verified_role, remove_role=None):
         super().__init__()
-        self.correct_captcha = correct_captcha
         self.verified_role = verified_role
         self.remove_role = remove_role
     
     async def on_submit(self, interaction: discord.Interaction):
         user_input = self.captcha_input.value.upper().strip()
         
-        # Remove user's CAPTCHA from cache
-        user_id = str(interaction.user.id)
-        if user_id in security_data['captcha_data']:
-            del security_data['captcha_data'][user_id]
+        # Checked against the challenge store, which also handles expiry and attempt limits
+        result = await captcha_challenges.verify(interaction.guild.id, interaction.user.id, user_input)
         
-        if user_input == self.correct_captcha:
+        if result == CAPTCHA_OK:
             # Correct CAPTCHA - verify the user
             try:
                 # Remove the specified role if configured
@@ -143,16 +144,22 @@ class CaptchaModal(discord.ui.Modal, title='🔐 CAPTCHA Verification'):
                 await interaction.response.send_message(embed=create_error_embed("I don't have permission to assign the verified role. Contact administrators."), ephemeral=True)
             except Exception as e:
                 await interaction.response.send_message(embed=create_error_embed(f"Verification failed: {str(e)}"), ephemeral=True)
-        else:
+        elif result == CAPTCHA_WRONG or result == CAPTCHA_LOCKED:
             # Incorrect CAPTCHA - RXT ENGINE Theme
+            if result == CAPTCHA_LOCKED:
+                retry_text = f"⏰ Too many failed attempts — try again in **{captcha_challenges.ttl // 60} minutes**"
+            else:
+                retry_text = "⚡ Click the **Verify Me** button to get a new CAPTCHA\n💠 Each attempt generates a unique code"
             embed = discord.Embed(
                 title="✗ **Verification Failed**",
-                description=f"**◆ Incorrect CAPTCHA code**\n**You entered:** `{user_input}`\n\n⚡ Click the **Verify Me** button to get a new CAPTCHA\n💠 Each attempt generates a unique code",
+                description=f"**◆ Incorrect CAPTCHA code**\n**You entered:** `{user_input}`\n\n{retry_text}",
                 color=BrandColors.DANGER
             )
             embed.set_footer(text="◆ Quantum security active", icon_url=bot.user.display_avatar.url)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             await log_action(interaction.guild.id, "security", f"❌ [CAPTCHA FAILED] {interaction.user} entered incorrect CAPTCHA: {user_input}")
+        else:
+            await interaction.response.send_message("❌ Your CAPTCHA session has expired. Please click 'Verify Me' again.", ephemeral=True)
 
 class VerificationView(discord.ui.View):
     def __init__(self, verified_role_id=None, remove_role_id=None):
@@ -230,16 +237,21 @@ class VerificationView(discord.ui.View):
             return
 
         # Handle CAPTCHA Verification
+        locked_for = await captcha_challenges.lockout_remaining(interaction.guild.id, interaction.user.id)
+        if locked_for > 0:
+            await interaction.response.send_message(embed=create_error_embed(f"Too many failed CAPTCHA attempts. Try again in {int(locked_for // 60) + 1} minutes."), ephemeral=True)
+            return
+
         try:
             # Generate unique CAPTCHA for this user
-            captcha_text, captcha_file = captcha_gen.generate()
+            captcha_text, captcha_png = await captcha_pool.take()
+            captcha_file = discord.File(io.BytesIO(captcha_png), filename='captcha.png')
 
             # Store CAPTCHA for validation
-            user_id = str(interaction.user.id)
-            security_data['captcha_data'][user_id] = captcha_text
+            await captcha_challenges.issue(interaction.guild.id, interaction.user.id, captcha_text)
 
             # Create modal and view
-            modal = CaptchaModal(captcha_text, verified_role, remove_role)
+            modal = CaptchaModal(verified_role, remove_role)
 
             # Send CAPTCHA image with button in ONE message - RXT ENGINE Theme
             embed = discord.Embed(
@@ -279,8 +291,7 @@ class CaptchaInputView(discord.ui.View):
             verified_role_id = verification_config.get('verified_role')
             remove_role_id = verification_config.get('remove_role')
             
-            user_id = str(interaction.user.id)
-            correct_captcha = security_data['captcha_data'].get(user_id)
+            correct_captcha = await captcha_challenges.get(interaction.guild.id, interaction.user.id)
             
             if not correct_captcha:
                 await interaction.response.send_message("❌ Your CAPTCHA session has expired. Please click 'Verify Me' again.", ephemeral=True)
@@ -289,5 +300,5 @@ class CaptchaInputView(discord.ui.View):
             verified_role = interaction.guild.get_role(int(verified_role_id))
             remove_role = interaction.guild.get_role(int(remove_role_id)) if remove_role_id else None
             
-            modal = CaptchaModal(correct_captcha, verified_role, remove_role)
+            modal = CaptchaModal(verified_role, remove_role)
             await interaction.response.send_modal(modal)
@@ -0,0 +1,76 @@
+import logging
+import os
+import sys
+
+# Configuration
+# LOG_LEVEL sets the default for every rxt.* logger; LOG_LEVELS overrides single modules,
+# e.g. LOG_LEVELS="pipeline=DEBUG,ai_chat=DEBUG". DEBUG is off unless asked for.
+LOG_ROOT = "rxt"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_configured = False
+
+
+class StructuredFormatter(logging.Formatter):
+    """Appends `extra={'ctx': {...}}` fields to the message as key=value pairs"""
+
+    def format(self, record):
+        line = super().format(record)
+        ctx = getattr(record, 'ctx', None)
+        if ctx:
+            line += " | " + " ".join(f"{key}={value}" for key, value in ctx.items())
+        return line
+
+
+class ConsoleHandler(logging.Handler):
+    """Writes to whatever sys.stdout is at emit time so ConsoleCapture sees records with their level"""
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+            stream = sys.stdout
+            write_record = getattr(stream, 'write_record', None)
+            if write_record is not None:
+                write_record(line, record.levelno)
+            else:
+                stream.write(line + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def _parse_level(value, default=logging.INFO):
+    level = logging.getLevelName(value.strip().upper())
+    return level if isinstance(level, int) else default
+
+
+def configure_logging():
+    """Install the console handler and apply LOG_LEVEL / LOG_LEVELS; safe to call repeatedly"""
+    global _configured
+    if _configured:
+        return
+
+    root = logging.getLogger(LOG_ROOT)
+    root.setLevel(_parse_level(LOG_LEVEL))
+    handler = ConsoleHandler()
+    handler.setFormatter(StructuredFormatter(LOG_FORMAT, datefmt="%H:%M:%S"))
+    root.addHandler(handler)
+    root.propagate = False
+
+    for entry in LOG_LEVELS.split(','):
+        if '=' not in entry:
+            continue
+        name, level = entry.split('=', 1)
+        name = name.strip()
+        if not name.startswith(LOG_ROOT + "."):
+            name = f"{LOG_ROOT}.{name}"
+        logging.getLogger(name).setLevel(_parse_level(level))
+
+    _configured = True
+
+
+def get_logger(name):
+    """Return the rxt.<name> logger; use %-style args so disabled levels cost nothing"""
+    configure_logging()
+    return logging.getLogger(f"{LOG_ROOT}.{name}")
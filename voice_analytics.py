@@ -0,0 +1,168 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from structured_logging import get_logger
+
+log = get_logger("voice")
+
+# Configuration
+VOICE_ANALYTICS_FLUSH_INTERVAL = float(os.getenv('VOICE_ANALYTICS_FLUSH_INTERVAL', '30'))  # seconds buckets are buffered before bulk_write
+VOICE_HOURLY_RETENTION_DAYS = int(os.getenv('VOICE_HOURLY_RETENTION_DAYS', '14'))  # hourly buckets feed the activity heatmap
+VOICE_DAILY_RETENTION_DAYS = int(os.getenv('VOICE_DAILY_RETENTION_DAYS', '400'))  # daily buckets feed weekly/monthly boards
+
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _day(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def split_by_hour(start, end):
+    """Yield (hour, seconds) for each UTC clock hour the interval [start, end) overlaps"""
+    while start < end:
+        hour = _hour(start)
+        boundary = min(end, hour + timedelta(hours=1))
+        yield hour, int((boundary - start).total_seconds())
+        start = boundary
+
+
+class VoiceAnalytics:
+    """Voice time per member in hourly and daily buckets, written behind in batches
+
+    Intervals are folded into hour and day buckets in memory; each flush $incs voice_hourly
+    and voice_daily, and TTL indexes age both collections out.
+    """
+
+    def __init__(self, interval=VOICE_ANALYTICS_FLUSH_INTERVAL):
+        self.interval = interval
+        self.db = None
+        self._hourly = {}  # (guild_id, user_id, hour) -> seconds
+        self._daily = {}  # (guild_id, user_id, day) -> seconds
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self.intervals = 0
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+
+    def attach_db(self, db):
+        self.db = db
+
+    async def ensure_indexes(self):
+        """Bucket keys, guild range scans and TTL retention; safe to run on every startup"""
+        if self.db is None:
+            return
+        try:
+            await self.db.voice_hourly.create_index([('guild_id', 1), ('user_id', 1), ('hour', 1)], unique=True)
+            await self.db.voice_hourly.create_index([('guild_id', 1), ('hour', 1)])
+            await self.db.voice_hourly.create_index('hour', expireAfterSeconds=VOICE_HOURLY_RETENTION_DAYS * 86400)
+            await self.db.voice_daily.create_index([('guild_id', 1), ('user_id', 1), ('day', 1)], unique=True)
+            await self.db.voice_daily.create_index([('guild_id', 1), ('day', 1)])
+            await self.db.voice_daily.create_index('day', expireAfterSeconds=VOICE_DAILY_RETENTION_DAYS * 86400)
+        except Exception:
+            log.exception("Failed to create voice analytics indexes")
+
+    def record(self, guild_id, user_id, start, end):
+        """Queue the credited interval [start, end) of a member's voice session (naive UTC datetimes)"""
+        if self.db is None or end <= start:
+            return
+        guild_key, user_key = str(guild_id), str(user_id)
+        for hour, seconds in split_by_hour(start, end):
+            hour_key = (guild_key, user_key, hour)
+            day_key = (guild_key, user_key, _day(hour))
+            self._hourly[hour_key] = self._hourly.get(hour_key, 0) + seconds
+            self._daily[day_key] = self._daily.get(day_key, 0) + seconds
+        self.intervals += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._hourly or self._daily:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered hour buckets and their daily rollups, one unordered bulk_write per collection"""
+        async with self._flush_lock:
+            if self.db is None:
+                return
+            hourly, self._hourly = self._hourly, {}
+            daily, self._daily = self._daily, {}
+            written = 0
+            for collection, field, batch, retry in (
+                (self.db.voice_hourly, 'hour', hourly, self._hourly),
+                (self.db.voice_daily, 'day', daily, self._daily)
+            ):
+                if not batch:
+                    continue
+                try:
+                    await collection.bulk_write([
+                        UpdateOne({'guild_id': g, 'user_id': u, field: t}, {'$inc': {'seconds': s}}, upsert=True)
+                        for (g, u, t), s in batch.items()
+                    ], ordered=False)
+                except Exception:
+                    # Best effort: a partially applied batch may be counted twice on retry
+                    self.failures += 1
+                    log.exception("Failed to write %d voice %s buckets; retrying next flush", len(batch), field)
+                    for key, seconds in batch.items():
+                        retry[key] = retry.get(key, 0) + seconds
+                    continue
+                written += len(batch)
+            if written:
+                self.flushes += 1
+                self.written += written
+
+    async def close(self):
+        """Flush on shutdown"""
+        await self.flush()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def top_members(self, guild_id, days, limit=10):
+        """[(user_id, seconds)] for the last `days` days (today included), from the daily rollups"""
+        since = _day(datetime.utcnow()) - timedelta(days=days - 1)
+        pipeline = [
+            {'$match': {'guild_id': str(guild_id), 'day': {'$gte': since}}},
+            {'$group': {'_id': '$user_id', 'seconds': {'$sum': '$seconds'}}},
+            {'$sort': {'seconds': -1, '_id': 1}},
+            {'$limit': limit}
+        ]
+        return [(doc['_id'], int(doc['seconds'])) async for doc in self.db.voice_daily.aggregate(pipeline)]
+
+    async def member_total(self, guild_id, user_id, days):
+        """A member's seconds over the last `days` days, from the daily rollups"""
+        since = _day(datetime.utcnow()) - timedelta(days=days - 1)
+        total = 0
+        async for doc in self.db.voice_daily.find({'guild_id': str(guild_id), 'user_id': str(user_id), 'day': {'$gte': since}}, {'seconds': 1}):
+            total += doc.get('seconds', 0)
+        return int(total)
+
+    async def heatmap(self, guild_id, days=7):
+        """7x24 grid of guild voice seconds by weekday (Monday first) and UTC hour, from the hourly buckets"""
+        since = _hour(datetime.utcnow()) - timedelta(days=days)
+        pipeline = [
+            {'$match': {'guild_id': str(guild_id), 'hour': {'$gte': since}}},
+            {'$group': {'_id': {'weekday': {'$isoDayOfWeek': '$hour'}, 'hour': {'$hour': '$hour'}}, 'seconds': {'$sum': '$seconds'}}}
+        ]
+        grid = [[0] * 24 for _ in range(7)]
+        async for doc in self.db.voice_hourly.aggregate(pipeline):
+            grid[doc['_id']['weekday'] - 1][doc['_id']['hour']] = int(doc['seconds'])
+        return grid
+
+    def stats(self):
+        return {
+            'buffered': len(self._hourly) + len(self._daily),
+            'intervals': self.intervals,
+            'flushes': self.flushes,
+            'written': self.written,
+            'failures': self.failures
+        }
+
+
+# Shared instance used by voice_tracker
+voice_analytics = VoiceAnalytics()
@@ -4,22 +4,61 @@ from discord import app_commands
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 import asyncio
+import math
+import os
+from bisect import bisect_right
 
+from pymongo import ReturnDocument, UpdateOne
+
+from config_cache import server_cache
+from voice_analytics import voice_analytics
 from brand_config import (
     BOT_FOOTER, BrandColors, VisualElements,
     create_success_embed, create_error_embed, create_info_embed,
     create_permission_denied_embed
 )
 
+# Configuration
+VOICE_CHECKPOINT_INTERVAL = int(os.getenv('VOICE_CHECKPOINT_INTERVAL', '300'))  # seconds between checkpoints of open sessions
+VOICE_MILESTONE_BATCH_DELAY = float(os.getenv('VOICE_MILESTONE_BATCH_DELAY', '10'))  # seconds crossings are collected before a guild's announcement
+VOICE_RESUME_GRACE = int(os.getenv('VOICE_RESUME_GRACE', '900'))  # max seconds since the last checkpoint for a session to resume after a restart
+
 bot = None
 db = None
 has_permission = None
 log_action = None
+get_server_data = None
+
+class VoiceSession:
+    """An open voice session; `credited` seconds of it are already included in total_seconds"""
+    __slots__ = ('started_at', 'credited')
+
+    def __init__(self, started_at: datetime, credited: int = 0):
+        self.started_at = started_at
+        self.credited = credited
+
+    def elapsed(self, now: datetime = None) -> int:
+        return max(0, int(((now or datetime.utcnow()) - self.started_at).total_seconds()))
+
+    def uncredited(self, now: datetime = None) -> int:
+        return max(0, self.elapsed(now) - self.credited)
+
+voice_sessions: Dict[str, VoiceSession] = {}
 
-voice_sessions: Dict[str, Dict[str, datetime]] = {}
+# guild_id -> voice_tracker_enabled; filled on ready and kept current by /voicetracker
+tracker_enabled: Dict[str, bool] = {}
+_tracker_flags_loaded = False
+
+checkpoint_stats = {'checkpoints': 0, 'written': 0, 'failures': 0, 'resumed': 0, 'started': 0, 'closed': 0}
+_checkpoint_lock = asyncio.Lock()
 
 MILESTONES_HOURS = [24, 50, 100, 150, 200]
 MILESTONE_INCREMENT = 50
+HEATMAP_DAYS = 7  # /voicetime heatmap window; hourly buckets are kept for VOICE_HOURLY_RETENTION_DAYS
+HEATMAP_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HEATMAP_SHADES = " ░▒▓█"
+LEADERBOARD_PERIODS = {'week': (7, "This Week"), 'month': (30, "This Month")}  # /voicetime action -> (days, label)
+MILESTONE_EMBED_MEMBERS = 20  # members listed in one batched announcement
 
 def format_duration(total_seconds: int) -> str:
     hours = total_seconds // 3600
@@ -34,34 +73,62 @@ def format_duration(total_seconds: int) -> str:
         return f"{seconds}s"
 
 def get_next_milestone(current_hours: float) -> int:
-    for milestone in MILESTONES_HOURS:
-        if current_hours < milestone:
-            return milestone
-    
+    index = bisect_right(MILESTONES_HOURS, current_hours)
+    if index < len(MILESTONES_HOURS):
+        return MILESTONES_HOURS[index]
+    last_milestone = MILESTONES_HOURS[-1]
+    return last_milestone + MILESTONE_INCREMENT * (math.floor((current_hours - last_milestone) / MILESTONE_INCREMENT) + 1)
+
+def milestones_between(after_hours: float, up_to_hours: float) -> list:
+    """Every milestone m with after_hours < m <= up_to_hours, computed without walking the gap"""
+    if up_to_hours <= after_hours:
+        return []
+    fixed = MILESTONES_HOURS[bisect_right(MILESTONES_HOURS, after_hours):bisect_right(MILESTONES_HOURS, up_to_hours)]
     last_milestone = MILESTONES_HOURS[-1]
-    while current_hours >= last_milestone:
-        last_milestone += MILESTONE_INCREMENT
-    return last_milestone
+    first_step = max(1, math.floor((after_hours - last_milestone) / MILESTONE_INCREMENT) + 1)
+    last_step = math.floor((up_to_hours - last_milestone) / MILESTONE_INCREMENT)
+    return fixed + [last_milestone + step * MILESTONE_INCREMENT for step in range(first_step, last_step + 1)]
 
 def get_all_milestones_up_to(hours: float) -> list:
-    milestones = []
-    for m in MILESTONES_HOURS:
-        if hours >= m:
-            milestones.append(m)
-    
-    if hours >= MILESTONES_HOURS[-1]:
-        extra = MILESTONES_HOURS[-1] + MILESTONE_INCREMENT
-        while hours >= extra:
-            milestones.append(extra)
-            extra += MILESTONE_INCREMENT
-    
-    return milestones
+    return milestones_between(0, hours)
+
+async def load_tracker_flags():
+    """Replace the enablement map with every guild that has the tracker switched on"""
+    global _tracker_flags_loaded
+    if db is None:
+        return
+    enabled = set()
+    async for doc in db.servers.find({'voice_tracker_enabled': True}, {'guild_id': 1}):
+        enabled.add(doc['guild_id'])
+    tracker_enabled.clear()
+    tracker_enabled.update(dict.fromkeys(enabled, True))
+    _tracker_flags_loaded = True
+
+def set_tracker_enabled(guild_id: str, enabled: bool):
+    tracker_enabled[str(guild_id)] = enabled
+
+def cached_tracker_enabled(guild_id: str) -> Optional[bool]:
+    """The cached flag, or None when it is not known without a database read"""
+    enabled = tracker_enabled.get(guild_id)
+    if enabled is None and _tracker_flags_loaded:
+        return False
+    return enabled
 
 async def is_voice_tracker_enabled(guild_id: str) -> bool:
     if db is None:
         return False
-    server_data = await db.servers.find_one({'guild_id': guild_id}) or {}
-    return server_data.get('voice_tracker_enabled', False)
+    enabled = cached_tracker_enabled(guild_id)
+    if enabled is None:
+        server_data = await db.servers.find_one({'guild_id': guild_id}, {'voice_tracker_enabled': 1}) or {}
+        enabled = tracker_enabled[guild_id] = server_data.get('voice_tracker_enabled', False)
+    return enabled
+
+def is_tracked_channel(guild: discord.Guild, channel) -> bool:
+    """In voice and not in the AFK channel; served entirely from the gateway cache"""
+    if channel is None:
+        return False
+    afk_channel = guild.afk_channel
+    return not (afk_channel and channel.id == afk_channel.id)
 
 async def get_voice_data(guild_id: str, user_id: str) -> dict:
     if db is None:
@@ -72,150 +139,413 @@ async def get_voice_data(guild_id: str, user_id: str) -> dict:
         return {'guild_id': guild_id, 'user_id': user_id, 'total_seconds': 0, 'last_milestone': 0}
     return data
 
-async def update_voice_data(guild_id: str, user_id: str, total_seconds: int, last_milestone: int):
-    if db is None:
-        return
-    
-    await db.voice_tracker.update_one(
-        {'guild_id': guild_id, 'user_id': user_id},
-        {'$set': {
-            'total_seconds': total_seconds,
-            'last_milestone': last_milestone
-        }},
-        upsert=True
-    )
-
 def start_session(guild_id: str, user_id: str):
     key = f"{guild_id}_{user_id}"
-    voice_sessions[key] = datetime.utcnow()
+    # Whole seconds, so the start time survives MongoDB's millisecond datetimes unchanged
+    voice_sessions[key] = VoiceSession(datetime.utcnow().replace(microsecond=0))
 
-def end_session(guild_id: str, user_id: str) -> int:
+def end_session(guild_id: str, user_id: str) -> Optional[VoiceSession]:
     key = f"{guild_id}_{user_id}"
-    if key not in voice_sessions:
-        return 0
-    
-    start_time = voice_sessions.pop(key)
-    elapsed = (datetime.utcnow() - start_time).total_seconds()
-    return int(elapsed)
+    return voice_sessions.pop(key, None)
 
 def get_session_key(guild_id: str, user_id: str) -> str:
     return f"{guild_id}_{user_id}"
 
-async def send_milestone_message(guild: discord.Guild, member: discord.Member, milestone_hours: int):
-    server_data = await db.servers.find_one({'guild_id': str(guild.id)}) or {}
-    
-    embed = discord.Embed(
-        title="🎧 **VOICE MILESTONE UNLOCKED**",
-        description=f"{VisualElements.CIRCUIT_LINE}",
-        color=BrandColors.PRIMARY,
-        timestamp=datetime.now()
-    )
-    
-    embed.add_field(
-        name="◆ Milestone Achieved",
-        value=f"**{milestone_hours} Hours** in Voice Channels!",
-        inline=False
-    )
-    embed.add_field(
-        name="◆ User",
-        value=f"{member.mention} (`{member.display_name}`)",
-        inline=True
-    )
-    embed.add_field(
-        name="◆ Server",
-        value=f"{guild.name}",
-        inline=True
-    )
-    
-    next_milestone = get_next_milestone(milestone_hours)
-    embed.add_field(
-        name="◆ Next Milestone",
-        value=f"**{next_milestone} Hours**",
-        inline=False
-    )
-    
-    embed.set_thumbnail(url=member.display_avatar.url if member.display_avatar else None)
-    embed.set_footer(text=f"⚡ RXT ENGINE • Voice Tracker", icon_url=bot.user.display_avatar.url)
-    
-    log_channel_id = server_data.get('log_channel')
-    if log_channel_id:
-        channel = guild.get_channel(int(log_channel_id))
-        if channel:
-            try:
-                await channel.send(embed=embed)
-            except:
-                pass
-    
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return value
+
+def _credit_pipeline(session: VoiceSession, seconds: int, now: datetime, still_open: bool) -> list:
+    """Update pipeline that adds `seconds` of `session` to total_seconds at most once, however often it is replayed
+
+    The document remembers which session it last credited and how far; only the part beyond that is added,
+    so a retried checkpoint, or one that lands after the session was closed, adds nothing.
+    """
+    same_session = {'$eq': ['$session_started_at', session.started_at]}
+    already = {'$cond': [same_session, {'$ifNull': ['$session_credited', 0]}, 0]}
+    return [{'$set': {
+        'total_seconds': {'$add': [{'$ifNull': ['$total_seconds', 0]}, {'$max': [0, {'$subtract': [seconds, already]}]}]},
+        'last_milestone': {'$ifNull': ['$last_milestone', 0]},
+        'session_started_at': session.started_at,
+        'session_credited': {'$max': [seconds, already]},
+        'session_checkpoint_at': now,
+        'session_open': {'$cond': [{'$and': [same_session, {'$eq': ['$session_open', False]}]}, False, still_open]}
+    }}]
+
+async def flush_checkpoints():
+    """Write the accrued time of every open session with one unordered bulk_write"""
+    if db is None:
+        return
+    async with _checkpoint_lock:
+        now = datetime.utcnow()
+        batch = []
+        for key, session in list(voice_sessions.items()):
+            if cached_tracker_enabled(key.split('_', 1)[0]) is False:
+                continue  # paused guilds accrue nothing; the session is dropped on leave
+            seconds = session.elapsed(now)
+            if seconds > session.credited:
+                batch.append((key, session, seconds))
+        if not batch:
+            return
+        ops = []
+        for key, session, seconds in batch:
+            guild_id, user_id = key.split('_', 1)
+            ops.append(UpdateOne(
+                {'guild_id': guild_id, 'user_id': user_id},
+                _credit_pipeline(session, seconds, now, True),
+                upsert=True
+            ))
+        try:
+            await db.voice_tracker.bulk_write(ops, ordered=False)
+        except Exception as e:
+            # Nothing is marked credited, and replaying is harmless, so the next checkpoint retries
+            checkpoint_stats['failures'] += 1
+            print(f"⚠️ Voice checkpoint of {len(ops)} sessions failed: {e}")
+            return
+        for key, session, seconds in batch:
+            guild_id, user_id = key.split('_', 1)
+            voice_analytics.record(guild_id, user_id, session.started_at + timedelta(seconds=session.credited), session.started_at + timedelta(seconds=seconds))
+            session.credited = max(session.credited, seconds)
+        checkpoint_stats['checkpoints'] += 1
+        checkpoint_stats['written'] += len(ops)
+
+@tasks.loop(seconds=VOICE_CHECKPOINT_INTERVAL)
+async def checkpoint_voice_sessions():
+    """Periodically persist open sessions so a crash loses at most one interval"""
+    await flush_checkpoints()
+
+async def credit_session(guild_id: str, user_id: str, session: VoiceSession) -> tuple:
+    """Credit a finished session; returns (total before the session, total after, last milestone)"""
+    # Serialized with checkpoints so the analytics interval matches what was actually credited
+    async with _checkpoint_lock:
+        now = datetime.utcnow()
+        seconds = session.elapsed(now)
+        before = await db.voice_tracker.find_one_and_update(
+            {'guild_id': guild_id, 'user_id': user_id},
+            _credit_pipeline(session, seconds, now, False),
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        ) or {}
+    checkpoint_stats['closed'] += 1
+
+    already = 0
+    if _naive_utc(before.get('session_started_at')) == session.started_at:
+        already = before.get('session_credited', 0)
+    if seconds > already:
+        voice_analytics.record(guild_id, user_id, session.started_at + timedelta(seconds=already), session.started_at + timedelta(seconds=seconds))
+    new_total = before.get('total_seconds', 0) + max(0, seconds - already)
+    # Checkpoints already moved part of this session into total_seconds
+    return max(0, new_total - seconds), new_total, before.get('last_milestone', 0)
+
+async def reconcile_voice_sessions():
+    """Resume or start sessions for members already in voice, and close those that ended while offline"""
+    if db is None or bot is None:
+        return
+    now = datetime.utcnow()
+
+    await load_tracker_flags()
+    persisted = {}
+    async for doc in db.voice_tracker.find({'session_open': True}, {'guild_id': 1, 'user_id': 1, 'session_started_at': 1, 'session_credited': 1, 'session_checkpoint_at': 1}):
+        persisted[get_session_key(doc['guild_id'], doc['user_id'])] = doc
+
+    in_voice = set()
+    for guild in bot.guilds:
+        guild_id = str(guild.id)
+        if not tracker_enabled.get(guild_id):
+            continue
+        for channel in list(guild.voice_channels) + list(guild.stage_channels):
+            if not is_tracked_channel(guild, channel):
+                continue
+            for member in channel.members:
+                key = get_session_key(guild_id, str(member.id))
+                in_voice.add(key)
+                if key in voice_sessions:
+                    continue  # still running from before a reconnect
+
+                doc = persisted.get(key)
+                checkpoint_at = _naive_utc(doc.get('session_checkpoint_at')) if doc else None
+                if checkpoint_at and (now - checkpoint_at).total_seconds() <= VOICE_RESUME_GRACE:
+                    # Short restart: keep the session, counting the downtime as time in voice
+                    voice_sessions[key] = VoiceSession(_naive_utc(doc['session_started_at']), doc.get('session_credited', 0))
+                    checkpoint_stats['resumed'] += 1
+                else:
+                    start_session(guild_id, str(member.id))
+                    checkpoint_stats['started'] += 1
+
+    # Members who left while the gateway was not delivering events
+    for key in [key for key in voice_sessions if key not in in_voice]:
+        guild_id, user_id = key.split('_', 1)
+        session = voice_sessions.pop(key)
+        if not tracker_enabled.get(guild_id):
+            continue  # tracking was turned off; nothing more is credited
+        guild = bot.get_guild(int(guild_id))
+        member = guild.get_member(int(user_id)) if guild else None
+        try:
+            await process_time_update(member, guild_id, user_id, session)
+        except Exception as e:
+            print(f"⚠️ Failed to close voice session {key}: {e}")
+
+    # Sessions a crash left open; their checkpointed time stands, the rest is unknown
+    stale = [doc for key, doc in persisted.items() if key not in voice_sessions]
+    if stale:
+        try:
+            await db.voice_tracker.bulk_write([
+                UpdateOne(
+                    {'guild_id': doc['guild_id'], 'user_id': doc['user_id'], 'session_started_at': doc['session_started_at']},
+                    {'$set': {'session_open': False}}
+                )
+                for doc in stale
+            ], ordered=False)
+        except Exception as e:
+            print(f"⚠️ Failed to close {len(stale)} stale voice sessions: {e}")
+
+async def ensure_voice_indexes():
+    """Create the indexes leaderboard, rank and member lookups rely on; safe to run on every startup"""
+    if db is None:
+        return
     try:
-        await log_action(guild.id, "voice", f"🎧 [MILESTONE] {member} reached **{milestone_hours}h** voice time!")
-    except:
-        pass
+        await db.voice_tracker.create_index([('guild_id', 1), ('total_seconds', -1)])
+        await db.voice_tracker.create_index([('guild_id', 1), ('user_id', 1)])
+    except Exception as e:
+        print(f"⚠️ Failed to create voice_tracker indexes: {e}")
+
+async def get_active_totals(guild_id: str) -> dict:
+    """user_id -> (stored total, live total) for every member with an open session in the guild"""
+    prefix = f"{guild_id}_"
+    now = datetime.utcnow()
+    active = {key[len(prefix):]: session for key, session in list(voice_sessions.items()) if key.startswith(prefix)}
+    if not active:
+        return {}
+    stored = {}
+    async for doc in db.voice_tracker.find({'guild_id': guild_id, 'user_id': {'$in': list(active)}}, {'user_id': 1, 'total_seconds': 1}):
+        stored[doc['user_id']] = doc.get('total_seconds', 0)
+    return {
+        user_id: (stored.get(user_id, 0), stored.get(user_id, 0) + session.uncredited(now))
+        for user_id, session in active.items()
+    }
+
+async def get_voice_leaderboard(guild_id: str, limit: int = 10, active: dict = None) -> list:
+    """Top `limit` (user_id, live total) pairs from the indexed top-K merged with open sessions
+
+    Live time only ever adds to a stored total, so nobody outside the stored top K or the
+    active set can outrank the members in them.
+    """
+    if active is None:
+        active = await get_active_totals(guild_id)
+    totals = {}
+    cursor = db.voice_tracker.find({'guild_id': guild_id}, {'user_id': 1, 'total_seconds': 1}).sort('total_seconds', -1).limit(limit)
+    async for doc in cursor:
+        totals[doc['user_id']] = doc.get('total_seconds', 0)
+    for user_id, (_, live_total) in active.items():
+        totals[user_id] = live_total
+    return sorted(totals.items(), key=lambda entry: (-entry[1], entry[0]))[:limit]
+
+async def get_voice_rank(guild_id: str, user_id: str, live_total: int, active: dict = None) -> int:
+    """1 + members with more voice time; tied members share a rank"""
+    if active is None:
+        active = await get_active_totals(guild_id)
+    rank = 1 + await db.voice_tracker.count_documents({'guild_id': guild_id, 'total_seconds': {'$gt': live_total}})
+    # Open sessions the stored totals do not show yet
+    for other_id, (stored_total, other_live) in active.items():
+        if other_id != user_id and stored_total <= live_total < other_live:
+            rank += 1
+    return rank
+
+async def voice_tracker_on_ready():
+    await ensure_voice_indexes()
+    await voice_analytics.ensure_indexes()
+    try:
+        await reconcile_voice_sessions()
+    except Exception as e:
+        print(f"⚠️ Voice session reconciliation failed: {e}")
+    if not checkpoint_voice_sessions.is_running():
+        checkpoint_voice_sessions.start()
+
+def format_milestones(milestones: list) -> str:
+    if len(milestones) <= 5:
+        return ", ".join(f"**{m}h**" for m in milestones)
+    return f"**{milestones[0]}h** → **{milestones[-1]}h** ({len(milestones)} milestones)"
+
+async def get_milestone_channel(guild: discord.Guild):
+    """The guild's log channel for milestone announcements, from the cached server config"""
+    server_data = await get_server_data(guild.id)
+    log_channel_id = server_data.get('log_channel')
+    return guild.get_channel(int(log_channel_id)) if log_channel_id else None
+
+def build_milestone_embed(guild: discord.Guild, crossings: list) -> discord.Embed:
+    """One embed for a batch of (member, milestones) crossings"""
+    if len(crossings) == 1 and len(crossings[0][1]) == 1:
+        member, (milestone_hours,) = crossings[0]
+        embed = discord.Embed(
+            title="🎧 **VOICE MILESTONE UNLOCKED**",
+            description=f"{VisualElements.CIRCUIT_LINE}",
+            color=BrandColors.PRIMARY,
+            timestamp=datetime.now()
+        )
+        embed.add_field(
+            name="◆ Milestone Achieved",
+            value=f"**{milestone_hours} Hours** in Voice Channels!",
+            inline=False
+        )
+        embed.add_field(
+            name="◆ User",
+            value=f"{member.mention} (`{member.display_name}`)",
+            inline=True
+        )
+        embed.add_field(
+            name="◆ Server",
+            value=f"{guild.name}",
+            inline=True
+        )
+        embed.add_field(
+            name="◆ Next Milestone",
+            value=f"**{get_next_milestone(milestone_hours)} Hours**",
+            inline=False
+        )
+        embed.set_thumbnail(url=member.display_avatar.url if member.display_avatar else None)
+    else:
+        embed = discord.Embed(
+            title="🎧 **VOICE MILESTONES UNLOCKED**",
+            description=f"{VisualElements.CIRCUIT_LINE}",
+            color=BrandColors.PRIMARY,
+            timestamp=datetime.now()
+        )
+        shown = crossings[:MILESTONE_EMBED_MEMBERS]
+        for member, milestones in shown:
+            embed.add_field(
+                name=f"◆ {member.display_name}",
+                value=f"{member.mention} reached {format_milestones(milestones)} • Next: **{get_next_milestone(milestones[-1])}h**",
+                inline=False
+            )
+        if len(crossings) > len(shown):
+            embed.add_field(
+                name="◆ And More",
+                value=f"+{len(crossings) - len(shown)} more members reached a milestone",
+                inline=False
+            )
+    embed.set_footer(text=f"⚡ RXT ENGINE • Voice Tracker", icon_url=bot.user.display_avatar.url)
+    return embed
+
+class MilestoneNotifier:
+    """Collects milestone crossings per guild for a short window and announces each batch in one message"""
+
+    def __init__(self, delay: float = VOICE_MILESTONE_BATCH_DELAY):
+        self.delay = delay
+        self._pending = {}  # guild_id -> (guild, {user_id: [member, milestones]})
+        self._tasks = {}  # guild_id -> delayed send task
+        self.crossings = 0
+        self.messages = 0
+
+    def add(self, member: discord.Member, milestones: list):
+        guild = member.guild
+        _, batch = self._pending.setdefault(guild.id, (guild, {}))
+        entry = batch.setdefault(member.id, [member, []])
+        entry[0] = member
+        entry[1].extend(milestones)
+        self.crossings += len(milestones)
+        if guild.id not in self._tasks:
+            self._tasks[guild.id] = asyncio.create_task(self._send_later(guild.id))
+
+    async def _send_later(self, guild_id):
+        await asyncio.sleep(self.delay)
+        self._tasks.pop(guild_id, None)
+        await self._announce(guild_id)
+
+    async def _announce(self, guild_id):
+        pending = self._pending.pop(guild_id, None)
+        if pending is None:
+            return
+        guild, batch = pending
+        crossings = [(member, sorted(set(milestones))) for member, milestones in batch.values()]
+        try:
+            channel = await get_milestone_channel(guild)
+            if channel:
+                await channel.send(embed=build_milestone_embed(guild, crossings))
+                self.messages += 1
+        except Exception as e:
+            print(f"Error sending milestone message: {e}")
+        try:
+            summary = "\n".join(f"{member} reached {format_milestones(milestones)} voice time!" for member, milestones in crossings[:MILESTONE_EMBED_MEMBERS])
+            if len(crossings) > MILESTONE_EMBED_MEMBERS:
+                summary += f"\n+{len(crossings) - MILESTONE_EMBED_MEMBERS} more"
+            await log_action(guild.id, "voice", f"🎧 [MILESTONE] {summary}")
+        except Exception:
+            pass
+
+    async def flush(self):
+        """Announce everything pending now, e.g. before shutdown"""
+        for guild_id in list(self._pending):
+            task = self._tasks.pop(guild_id, None)
+            if task is not None:
+                task.cancel()
+            await self._announce(guild_id)
+
+    def stats(self):
+        return {
+            'pending_guilds': len(self._pending),
+            'crossings': self.crossings,
+            'messages': self.messages
+        }
+
+# Shared notifier for milestone announcements
+milestone_notifier = MilestoneNotifier()
 
 async def handle_voice_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
     if db is None:
         return
     
+    # Mutes, deafens, streams and moves between tracked channels change nothing; drop them before any await
+    was_tracking = is_tracked_channel(member.guild, before.channel)
+    should_track = is_tracked_channel(member.guild, after.channel)
+    if was_tracking == should_track:
+        return
+    
     guild_id = str(member.guild.id)
     user_id = str(member.id)
     session_key = get_session_key(guild_id, user_id)
     
+    # A leave always ends the session, so nothing stays open (and checkpointed) after tracking is turned off
+    session = end_session(guild_id, user_id) if was_tracking else None
+    
     if not await is_voice_tracker_enabled(guild_id):
         return
     
-    afk_channel = member.guild.afk_channel
-    
-    def is_afk(channel):
-        return afk_channel and channel and channel.id == afk_channel.id
-    
-    was_in_vc = before.channel is not None
-    now_in_vc = after.channel is not None
-    was_in_afk = is_afk(before.channel)
-    now_in_afk = is_afk(after.channel)
-    
-    was_tracking = was_in_vc and not was_in_afk
-    should_track = now_in_vc and not now_in_afk
+    if was_tracking:
+        if session is not None and session.elapsed() > 0:
+            await process_time_update(member, guild_id, user_id, session)
     
-    if was_tracking and not should_track:
-        elapsed = end_session(guild_id, user_id)
-        if elapsed > 0:
-            await process_time_update(member, guild_id, user_id, elapsed)
-    
-    elif not was_tracking and should_track:
-        if session_key not in voice_sessions:
-            start_session(guild_id, user_id)
+    elif session_key not in voice_sessions:
+        start_session(guild_id, user_id)
 
-async def process_time_update(member: discord.Member, guild_id: str, user_id: str, elapsed_seconds: int):
-    voice_data = await get_voice_data(guild_id, user_id)
-    
-    old_total = voice_data.get('total_seconds', 0)
-    new_total = old_total + elapsed_seconds
-    last_milestone = voice_data.get('last_milestone', 0)
+async def close_guild_sessions(guild: discord.Guild):
+    """End and credit every open session in a guild, e.g. when tracking is turned off"""
+    guild_id = str(guild.id)
+    prefix = f"{guild_id}_"
+    for key in [key for key in voice_sessions if key.startswith(prefix)]:
+        session = voice_sessions.pop(key)
+        user_id = key[len(prefix):]
+        try:
+            await process_time_update(guild.get_member(int(user_id)), guild_id, user_id, session)
+        except Exception as e:
+            print(f"⚠️ Failed to close voice session {key}: {e}")
+
+async def process_time_update(member: Optional[discord.Member], guild_id: str, user_id: str, session: VoiceSession):
+    old_total, new_total, last_milestone = await credit_session(guild_id, user_id, session)
     
     old_hours = old_total / 3600
     new_hours = new_total / 3600
     
-    new_milestones = []
-    for milestone in MILESTONES_HOURS:
-        if old_hours < milestone <= new_hours and milestone > last_milestone:
-            new_milestones.append(milestone)
-    
-    if new_hours >= MILESTONES_HOURS[-1]:
-        extra = MILESTONES_HOURS[-1] + MILESTONE_INCREMENT
-        while extra <= new_hours:
-            if old_hours < extra and extra > last_milestone:
-                new_milestones.append(extra)
-            extra += MILESTONE_INCREMENT
-    
-    highest_milestone = last_milestone
-    for milestone in new_milestones:
-        if milestone > highest_milestone:
-            highest_milestone = milestone
-        try:
-            await send_milestone_message(member.guild, member, milestone)
-        except Exception as e:
-            print(f"Error sending milestone message: {e}")
+    new_milestones = milestones_between(max(old_hours, last_milestone), new_hours)
+    highest_milestone = new_milestones[-1] if new_milestones else last_milestone
+    if new_milestones and member is not None:
+        milestone_notifier.add(member, new_milestones)
     
-    await update_voice_data(guild_id, user_id, new_total, highest_milestone)
+    if highest_milestone > last_milestone:
+        await db.voice_tracker.update_one(
+            {'guild_id': guild_id, 'user_id': user_id},
+            {'$max': {'last_milestone': highest_milestone}}
+        )
 
 @app_commands.command(name="voicetracker", description="🎧 Enable or disable voice channel time tracking")
 @app_commands.describe(action="Turn voice tracking on or off")
@@ -248,6 +578,8 @@ async def voicetracker_cmd(interaction: discord.Interaction, action: str):
         {'$set': {'voice_tracker_enabled': enabled}},
         upsert=True
     )
+    server_cache.apply_update(guild_id, {'voice_tracker_enabled': enabled})
+    set_tracker_enabled(guild_id, enabled)
     
     if enabled:
         embed = discord.Embed(
@@ -263,7 +595,7 @@ async def voicetracker_cmd(interaction: discord.Interaction, action: str):
         )
         embed.add_field(
             name="◆ Features",
-            value="• Track total voice time per user\n• Milestone achievements (24h, 50h, 100h+)\n• Leaderboards with `/voicetime leaderboard`",
+            value="• Track total voice time per user\n• Milestone achievements (24h, 50h, 100h+)\n• All-time, weekly and monthly leaderboards with `/voicetime`",
             inline=False
         )
         status_text = "enabled"
@@ -290,6 +622,10 @@ async def voicetracker_cmd(interaction: discord.Interaction, action: str):
     await interaction.response.send_message(embed=embed)
     
     await log_action(interaction.guild.id, "voice", f"🎧 [VOICE TRACKER] {status_text.upper()} by {interaction.user}")
+    
+    if not enabled:
+        # Time up to now still counts; nothing after it does
+        await close_guild_sessions(interaction.guild)
 
 @app_commands.command(name="voicetime", description="🎧 Check voice channel time stats")
 @app_commands.describe(
@@ -299,7 +635,10 @@ async def voicetracker_cmd(interaction: discord.Interaction, action: str):
 @app_commands.choices(action=[
     app_commands.Choice(name="me", value="me"),
     app_commands.Choice(name="user", value="user"),
-    app_commands.Choice(name="leaderboard", value="leaderboard")
+    app_commands.Choice(name="leaderboard", value="leaderboard"),
+    app_commands.Choice(name="leaderboard (this week)", value="week"),
+    app_commands.Choice(name="leaderboard (this month)", value="month"),
+    app_commands.Choice(name="activity heatmap", value="heatmap")
 ])
 async def voicetime_cmd(interaction: discord.Interaction, action: str = "me", user: discord.Member = None):
     if db is None:
@@ -331,6 +670,12 @@ async def voicetime_cmd(interaction: discord.Interaction, action: str = "me", us
     elif action == "leaderboard":
         await show_leaderboard(interaction)
         return
+    elif action in LEADERBOARD_PERIODS:
+        await show_period_leaderboard(interaction, action)
+        return
+    elif action == "heatmap":
+        await show_heatmap(interaction)
+        return
     else:
         target = interaction.user
     
@@ -340,10 +685,12 @@ async def voicetime_cmd(interaction: discord.Interaction, action: str = "me", us
     
     session_key = get_session_key(guild_id, str(target.id))
     current_session = 0
-    if session_key in voice_sessions:
-        current_session = int((datetime.utcnow() - voice_sessions[session_key]).total_seconds())
+    display_total = total_seconds
+    session = voice_sessions.get(session_key)
+    if session is not None:
+        current_session = session.elapsed()
+        display_total += session.uncredited()
     
-    display_total = total_seconds + current_session
     total_hours = display_total / 3600
     
     next_milestone = get_next_milestone(total_hours)
@@ -354,21 +701,7 @@ async def voicetime_cmd(interaction: discord.Interaction, action: str = "me", us
     filled = int((progress_percent / 100) * progress_bar_length)
     progress_bar = "█" * filled + "░" * (progress_bar_length - filled)
     
-    all_users_raw = await db.voice_tracker.find({'guild_id': guild_id}).to_list(None)
-    ranked_users = []
-    for u in all_users_raw:
-        u_total = u.get('total_seconds', 0)
-        u_session_key = get_session_key(guild_id, u['user_id'])
-        if u_session_key in voice_sessions:
-            u_total += int((datetime.utcnow() - voice_sessions[u_session_key]).total_seconds())
-        ranked_users.append({'user_id': u['user_id'], 'total': u_total})
-    ranked_users.sort(key=lambda x: x['total'], reverse=True)
-    
-    rank = 1
-    for i, u in enumerate(ranked_users):
-        if u['user_id'] == str(target.id):
-            rank = i + 1
-            break
+    rank = await get_voice_rank(guild_id, str(target.id), display_total)
     
     embed = discord.Embed(
         title=f"🎧 **VOICE TIME STATS**",
@@ -421,32 +754,16 @@ async def voicetime_cmd(interaction: discord.Interaction, action: str = "me", us
 async def show_leaderboard(interaction: discord.Interaction):
     guild_id = str(interaction.guild.id)
     
-    all_users_raw = await db.voice_tracker.find({'guild_id': guild_id}).to_list(None)
+    active = await get_active_totals(guild_id)
+    leaderboard_data = await get_voice_leaderboard(guild_id, 10, active)
     
-    if not all_users_raw:
+    if not leaderboard_data:
         await interaction.response.send_message(
             embed=create_info_embed("Voice Leaderboard", "No voice time data yet! Start chatting in voice channels."),
             ephemeral=True
         )
         return
     
-    leaderboard_data = []
-    for user_data in all_users_raw:
-        user_id = user_data['user_id']
-        total_seconds = user_data.get('total_seconds', 0)
-        
-        session_key = get_session_key(guild_id, user_id)
-        if session_key in voice_sessions:
-            current = int((datetime.utcnow() - voice_sessions[session_key]).total_seconds())
-            total_seconds += current
-        
-        leaderboard_data.append({
-            'user_id': user_id,
-            'total_seconds': total_seconds
-        })
-    
-    leaderboard_data.sort(key=lambda x: x['total_seconds'], reverse=True)
-    
     embed = discord.Embed(
         title="🎧 **VOICE TIME LEADERBOARD**",
         description=f"Top 10 users by voice channel time\n{VisualElements.CIRCUIT_LINE}",
@@ -457,10 +774,7 @@ async def show_leaderboard(interaction: discord.Interaction):
     medals = ["🥇", "🥈", "🥉"]
     leaderboard_text = ""
     
-    for i, entry in enumerate(leaderboard_data[:10]):
-        user_id = entry['user_id']
-        total_seconds = entry['total_seconds']
-        
+    for i, (user_id, total_seconds) in enumerate(leaderboard_data):
         member = interaction.guild.get_member(int(user_id))
         name = member.display_name if member else f"User {user_id}"
         
@@ -474,14 +788,12 @@ async def show_leaderboard(interaction: discord.Interaction):
     embed.add_field(name="◆ Rankings", value=leaderboard_text, inline=False)
     
     user_id = str(interaction.user.id)
-    user_total = 0
-    user_rank = len(leaderboard_data) + 1
-    
-    for i, entry in enumerate(leaderboard_data):
-        if entry['user_id'] == user_id:
-            user_rank = i + 1
-            user_total = entry['total_seconds']
-            break
+    if user_id in active:
+        user_total = active[user_id][1]
+    else:
+        user_data = await db.voice_tracker.find_one({'guild_id': guild_id, 'user_id': user_id}, {'total_seconds': 1}) or {}
+        user_total = user_data.get('total_seconds', 0)
+    user_rank = await get_voice_rank(guild_id, user_id, user_total, active)
     
     embed.add_field(
         name="◆ Your Position",
@@ -492,10 +804,83 @@ async def show_leaderboard(interaction: discord.Interaction):
     embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
     await interaction.response.send_message(embed=embed)
 
+async def show_period_leaderboard(interaction: discord.Interaction, period: str):
+    guild_id = str(interaction.guild.id)
+    days, label = LEADERBOARD_PERIODS[period]
+    
+    leaderboard_data = await voice_analytics.top_members(guild_id, days, 10)
+    
+    if not leaderboard_data:
+        await interaction.response.send_message(
+            embed=create_info_embed("Voice Leaderboard", f"No voice time recorded in the last {days} days yet!"),
+            ephemeral=True
+        )
+        return
+    
+    embed = discord.Embed(
+        title=f"🎧 **VOICE TIME LEADERBOARD — {label.upper()}**",
+        description=f"Top 10 users by voice channel time in the last {days} days\n{VisualElements.CIRCUIT_LINE}",
+        color=BrandColors.PRIMARY,
+        timestamp=datetime.now()
+    )
+    
+    medals = ["🥇", "🥈", "🥉"]
+    leaderboard_text = ""
+    
+    for i, (user_id, total_seconds) in enumerate(leaderboard_data):
+        member = interaction.guild.get_member(int(user_id))
+        name = member.display_name if member else f"User {user_id}"
+        rank_display = medals[i] if i < 3 else f"`#{i+1}`"
+        leaderboard_text += f"{rank_display} **{name}** — {format_duration(total_seconds)}\n"
+    
+    embed.add_field(name="◆ Rankings", value=leaderboard_text, inline=False)
+    
+    user_total = await voice_analytics.member_total(guild_id, interaction.user.id, days)
+    embed.add_field(
+        name=f"◆ Your Time {label}",
+        value=f"**{format_duration(user_total)}**",
+        inline=False
+    )
+    
+    embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
+    await interaction.response.send_message(embed=embed)
+
+async def show_heatmap(interaction: discord.Interaction):
+    grid = await voice_analytics.heatmap(interaction.guild.id, HEATMAP_DAYS)
+    peak = max(max(row) for row in grid)
+    
+    if not peak:
+        await interaction.response.send_message(
+            embed=create_info_embed("Voice Heatmap", f"No voice time recorded in the last {HEATMAP_DAYS} days yet!"),
+            ephemeral=True
+        )
+        return
+    
+    rows = ["    " + "".join(str(hour).ljust(6) for hour in (0, 6, 12, 18))]
+    for weekday, row in zip(HEATMAP_WEEKDAYS, grid):
+        rows.append(f"{weekday} " + "".join(HEATMAP_SHADES[-(-seconds * (len(HEATMAP_SHADES) - 1) // peak)] for seconds in row))
+    peak_day, peak_hour = max(((d, h) for d in range(7) for h in range(24)), key=lambda cell: grid[cell[0]][cell[1]])
+    
+    embed = discord.Embed(
+        title="🎧 **VOICE ACTIVITY HEATMAP**",
+        description=f"Voice time by weekday and hour (UTC) over the last {HEATMAP_DAYS} days\n{VisualElements.CIRCUIT_LINE}",
+        color=BrandColors.PRIMARY,
+        timestamp=datetime.now()
+    )
+    embed.add_field(name="◆ Activity", value="```\n" + "\n".join(rows) + "\n```", inline=False)
+    embed.add_field(
+        name="◆ Busiest Hour",
+        value=f"**{HEATMAP_WEEKDAYS[peak_day]} {peak_hour:02d}:00 UTC** — {format_duration(peak)}",
+        inline=False
+    )
+    
+    embed.set_footer(text=BOT_FOOTER, icon_url=bot.user.display_avatar.url)
+    await interaction.response.send_message(embed=embed)
+
 _setup_done = False
 
-def setup(bot_instance, db_instance, has_permission_func, log_action_func):
-    global bot, db, has_permission, log_action, _setup_done
+def setup(bot_instance, db_instance, has_permission_func, log_action_func, get_server_data_func):
+    global bot, db, has_permission, log_action, get_server_data, _setup_done
     
     if _setup_done:
         return
@@ -504,6 +889,8 @@ def setup(bot_instance, db_instance, has_permission_func, log_action_func):
     db = db_instance
     has_permission = has_permission_func
     log_action = log_action_func
+    get_server_data = get_server_data_func
+    voice_analytics.attach_db(db)
     
     existing_commands = [cmd.name for cmd in bot.tree.get_commands()]
     
@@ -512,5 +899,7 @@ def setup(bot_instance, db_instance, has_permission_func, log_action_func):
     if "voicetime" not in existing_commands:
         bot.tree.add_command(voicetime_cmd)
     
+    bot.add_listener(voice_tracker_on_ready, 'on_ready')
+    
     _setup_done = True
     print("✅ Voice Tracker module loaded")
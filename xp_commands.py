@@ -1,14 +1,13 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import time
 import random
+from types import MappingProxyType
 from main import bot
 from brand_config import create_permission_denied_embed, create_owner_only_embed,  BOT_FOOTER, BrandColors, create_success_embed, create_error_embed, create_info_embed, create_command_embed, create_warning_embed
 from main import db, has_permission, log_action, get_server_data, update_server_data
+from karma_store import ensure_karma_indexes, get_karma_rank, get_karma_page, get_member_karma, karma_boards, karma_writes, karma_cooldowns, message_authors
 
-# Karma cooldown tracking (user_id -> {target_user_id: last_time})
-karma_cooldowns = {}
 
 # Quantum system messages for level advancement
 KARMA_QUOTES = [
@@ -45,6 +44,42 @@ KARMA_LEVELS = [
     {"milestone": 4500, "title": "✨ Holographic Master", "color": BrandColors.GRADIENT_7}
 ]
 
+async def ensure_karma_indexes_on_ready():
+    await ensure_karma_indexes(db)
+
+bot.add_listener(ensure_karma_indexes_on_ready, 'on_ready')
+
+# Emoji -> karma change for reactions. Keys are stored without the U+FE0F variation
+# selector because clients send some emoji both with and without it.
+KARMA_EMOJI_VALUES = MappingProxyType({
+    emoji.replace('\ufe0f', ''): value for emoji, value in {
+        # +1 KARMA
+        '👍': 1, '👌': 1, '🤝': 1, '😊': 1, '😄': 1, '⭐': 1, '✨': 1, '🎉': 1, '🤍': 1, '📈': 1,
+        # +2 KARMA
+        '👏': 2, '🙌': 2, '🔥': 2, '💯': 2, '⚡': 2, '🌟': 2, '😍': 2, '🥰': 2, '🎯': 2, '💖': 2,
+        # +3 KARMA
+        '🚀': 3, '🏅': 3, '🥇': 3, '🧠': 3, '🌈': 3, '🎶': 3, '🛡️': 3, '💎': 3,
+        # +4 KARMA
+        '🫶': 4, '👑': 4, '🏆': 4, '🗝️': 4, '🕊️': 4, '🧿': 4,
+        # +5 KARMA
+        '🎖️': 5, '🏵️': 5, '🥂': 5, '🌞': 5, '🦄': 5, '🐉': 5, '🌠': 5, '🔱': 5,
+        # -1 KARMA
+        '👎': -1, '😒': -1, '😑': -1, '🙄': -1, '😴': -1, '😬': -1, '📉': -1,
+        # -2 KARMA
+        '😤': -2, '😠': -2, '🤢': -2, '🤕': -2, '❌': -2, '⚠️': -2,
+        # -3 KARMA
+        '😡': -3, '🤬': -3, '💔': -3, '🤮': -3, '🚫': -3, '⛔': -3,
+        # -4 KARMA
+        '💀': -4, '☠️': -4, '🤡': -4, '🗿': -4, '🛑': -4, '🧱': -4,
+        # -5 KARMA
+        '🖕': -5, '💩': -5, '👿': -5, '👹': -5, '🪦': -5
+    }.items()
+})
+
+def lookup_karma_emoji(emoji):
+    """Karma change for a reaction emoji (0 for anything that isn't a karma emoji)"""
+    return KARMA_EMOJI_VALUES.get(str(emoji).replace('\ufe0f', ''), 0)
+
 def get_karma_level_info(karma):
     """Determines the current and next karma level based on karma points."""
     current_level = None
@@ -118,19 +153,14 @@ async def give_karma(interaction: discord.Interaction, user: discord.Member, amo
         karma_points = amount if amount in [1, 2] else random.randint(1, 2)
 
     # Check cooldown (1 minute for main mods, 3 minutes for others)
-    current_time = time.time()
     giver_id = interaction.user.id
     receiver_id = user.id
-
-    if giver_id not in karma_cooldowns:
-        karma_cooldowns[giver_id] = {}
-
-    last_given = karma_cooldowns[giver_id].get(receiver_id, 0)
     cooldown_time = 60 if is_main_mod else 180  # 1 minute for main mods, 3 minutes for others
+    remaining = karma_cooldowns.remaining(giver_id, receiver_id, cooldown_time)
 
     # Server owner has no cooldown
-    if not is_owner and current_time - last_given < cooldown_time:
-        remaining = int(cooldown_time - (current_time - last_given))
+    if not is_owner and remaining > 0:
+        remaining = int(remaining)
         minutes = remaining // 60
         seconds = remaining % 60
 
@@ -144,27 +174,15 @@ async def give_karma(interaction: discord.Interaction, user: discord.Member, amo
 
     # Update cooldown (except for owner)
     if not is_owner:
-        karma_cooldowns[giver_id][receiver_id] = current_time
+        karma_cooldowns.touch(giver_id, receiver_id)
 
     # Add karma to database
     if db is None:
         await interaction.response.send_message(embed=create_error_embed("Database not connected!"), ephemeral=True)
         return
 
-    # Get or create user karma data
-    user_data = await db.karma.find_one({'user_id': str(receiver_id), 'guild_id': str(interaction.guild.id)})
-    if not user_data:
-        user_data = {'user_id': str(receiver_id), 'guild_id': str(interaction.guild.id), 'karma': 0}
-
-    old_karma = user_data.get('karma', 0)
-    new_karma = old_karma + karma_points
-    user_data['karma'] = new_karma
-
-    await db.karma.update_one(
-        {'user_id': str(receiver_id), 'guild_id': str(interaction.guild.id)},
-        {'$set': user_data},
-        upsert=True
-    )
+    # Applied in memory now, written to Mongo as a floored $inc by the write-behind buffer
+    old_karma, new_karma = await karma_writes.add(db, interaction.guild.id, receiver_id, karma_points)
 
     # Create response embed
     reason_text = f" for **{reason}**" if reason else ""
@@ -209,16 +227,10 @@ async def check_karma(interaction: discord.Interaction, user: discord.Member = N
         await interaction.response.send_message(embed=create_error_embed("Database not connected!"), ephemeral=True)
         return
 
-    user_data = await db.karma.find_one({'user_id': str(target_user.id), 'guild_id': str(interaction.guild.id)})
-
-    if not user_data:
-        karma = 0
-    else:
-        karma = user_data.get('karma', 0)
+    karma = await get_member_karma(db, interaction.guild.id, target_user.id)
 
     # Get user rank
-    users_sorted = await db.karma.find({'guild_id': str(interaction.guild.id)}).sort('karma', -1).to_list(None)
-    rank = next((i + 1 for i, u in enumerate(users_sorted) if u['user_id'] == str(target_user.id)), len(users_sorted) + 1)
+    rank = await get_karma_rank(db, interaction.guild.id, karma)
 
     # Get current and next level info
     current_level, next_level = get_karma_level_info(karma)
@@ -281,16 +293,10 @@ async def my_karma(interaction: discord.Interaction):
         await interaction.response.send_message(embed=create_error_embed("Database not connected!"), ephemeral=True)
         return
 
-    user_data = await db.karma.find_one({'user_id': str(target_user.id), 'guild_id': str(interaction.guild.id)})
-
-    if not user_data:
-        karma = 0
-    else:
-        karma = user_data.get('karma', 0)
+    karma = await get_member_karma(db, interaction.guild.id, target_user.id)
 
     # Get user rank
-    users_sorted = await db.karma.find({'guild_id': str(interaction.guild.id)}).sort('karma', -1).to_list(None)
-    rank = next((i + 1 for i, u in enumerate(users_sorted) if u['user_id'] == str(target_user.id)), len(users_sorted) + 1)
+    rank = await get_karma_rank(db, interaction.guild.id, karma)
 
     # Get current and next level info
     current_level, next_level = get_karma_level_info(karma)
@@ -351,7 +357,7 @@ async def karma_leaderboard(interaction: discord.Interaction):
         await interaction.response.send_message(embed=create_error_embed("Database not connected!"), ephemeral=True)
         return
 
-    users_sorted = await db.karma.find({'guild_id': str(interaction.guild.id)}).sort('karma', -1).limit(10).to_list(None)
+    users_sorted = await get_karma_page(db, interaction.guild.id)
 
     if not users_sorted:
         embed = discord.Embed(
@@ -365,10 +371,9 @@ async def karma_leaderboard(interaction: discord.Interaction):
 
     # Build leaderboard text
     leaderboard_text = ""
-    for i, user_data in enumerate(users_sorted):
-        user = bot.get_user(int(user_data['user_id']))
+    for i, (user_id, karma) in enumerate(users_sorted):
+        user = bot.get_user(int(user_id))
         if user:
-            karma = user_data.get('karma', 0)
 
             # Get level info for the user
             current_level, _ = get_karma_level_info(karma)
@@ -420,7 +425,9 @@ async def reset_karma(interaction: discord.Interaction, scope: str, user: discor
             await interaction.response.send_message(embed=create_error_embed("Please specify a user to reset!"), ephemeral=True)
             return
 
+        karma_writes.discard(interaction.guild.id, user.id)
         result = await db.karma.delete_one({'user_id': str(user.id), 'guild_id': str(interaction.guild.id)})
+        karma_boards.remove_user(interaction.guild.id, user.id)
 
         if result.deleted_count > 0:
             embed = discord.Embed(
@@ -436,7 +443,9 @@ async def reset_karma(interaction: discord.Interaction, scope: str, user: discor
             )
 
     elif scope == "server":
+        karma_writes.discard(interaction.guild.id)
         result = await db.karma.delete_many({'guild_id': str(interaction.guild.id)})
+        karma_boards.reset_guild(interaction.guild.id)
 
         embed = discord.Embed(
             title="⚡ **Server Karma Reset**",
@@ -523,86 +532,58 @@ async def send_karma_levelup(guild, user, karma):
         print(f"⚠️ [KARMA] No karma level-up channel set for {guild.name}")
 
 # Reaction-based karma system
-@bot.event
-async def on_reaction_add(reaction, user):
-    # Don't give karma for bot reactions or self-reactions
-    if user.bot or user.id == reaction.message.author.id:
+async def resolve_message_author(payload):
+    """Author id of the reacted message without growing the message cache"""
+    author_id = getattr(payload, 'message_author_id', None)  # sent by the gateway since discord.py 2.4
+    if author_id is not None:
+        return author_id
+
+    author_id = message_authors.get(payload.message_id)
+    if author_id is not None:
+        return author_id
+
+    message = discord.utils.get(bot.cached_messages, id=payload.message_id)
+    if message is None:
+        channel = bot.get_channel(payload.channel_id)
+        if channel is None:
+            return None
+        try:
+            message = await channel.fetch_message(payload.message_id)
+        except discord.HTTPException:
+            return None
+        message_authors.fetches += 1
+    message_authors.put(payload.message_id, message.author.id)
+    return message.author.id
+
+async def karma_on_raw_reaction_add(payload):
+    # Don't give karma in DMs or for bot reactions
+    if payload.guild_id is None or (payload.member and payload.member.bot):
         return
 
-    # Process both positive and negative karma emojis
-    positive_emojis_map = {
-        # +1 KARMA
-        '👍': 1, '👌': 1, '🤝': 1, '😊': 1, '😄': 1, '⭐': 1, '✨': 1, '🎉': 1, '🤍': 1, '📈': 1,
-        # +2 KARMA
-        '👏': 2, '🙌': 2, '🔥': 2, '💯': 2, '⚡': 2, '🌟': 2, '😍': 2, '🥰': 2, '🎯': 2, '💖': 2,
-        # +3 KARMA
-        '🚀': 3, '🏅': 3, '🥇': 3, '🧠': 3, '🌈': 3, '🎶': 3, '🛡️': 3, '💎': 3,
-        # +4 KARMA
-        '🫶': 4, '👑': 4, '🏆': 4, '🗝️': 4, '🕊️': 4, '🧿': 4,
-        # +5 KARMA
-        '🎖️': 5, '🏵️': 5, '🥂': 5, '🌞': 5, '🦄': 5, '🐉': 5, '🌠': 5, '🔱': 5
-    }
-    negative_emojis_map = {
-        # -1 KARMA
-        '👎': -1, '😒': -1, '😑': -1, '🙄': -1, '😴': -1, '😬': -1, '📉': -1,
-        # -2 KARMA
-        '😤': -2, '😠': -2, '🤢': -2, '🤕': -2, '❌': -2, '⚠️': -2,
-        # -3 KARMA
-        '😡': -3, '🤬': -3, '💔': -3, '🤮': -3, '🚫': -3, '⛔': -3,
-        # -4 KARMA
-        '💀': -4, '☠️': -4, '🤡': -4, '🗿': -4, '🛑': -4, '🧱': -4,
-        # -5 KARMA
-        '🖕': -5, '💩': -5, '👿': -5, '👹': -5, '🪦': -5
-    }
-
-    emoji_str = str(reaction.emoji)
-    karma_change = 0
-
-    if emoji_str in positive_emojis_map:
-        karma_change = positive_emojis_map[emoji_str]
-    elif emoji_str in negative_emojis_map:
-        karma_change = negative_emojis_map[emoji_str]
-    else:
+    karma_change = lookup_karma_emoji(payload.emoji)
+    if not karma_change:
         return  # Not a karma emoji
 
-    # Don't give karma in DMs
-    if not reaction.message.guild:
-        return
+    receiver_id = await resolve_message_author(payload)
+    if receiver_id is None or receiver_id == payload.user_id:
+        return  # Unknown message or self-reaction
 
     # Check cooldown (3 minutes)
-    current_time = time.time()
-    giver_id = user.id
-    receiver_id = reaction.message.author.id
-
-    if giver_id not in karma_cooldowns:
-        karma_cooldowns[giver_id] = {}
-
-    last_given = karma_cooldowns[giver_id].get(receiver_id, 0)
+    giver_id = payload.user_id
     cooldown_time = 180  # 3 minutes
 
-    if current_time - last_given < cooldown_time:
+    if karma_cooldowns.remaining(giver_id, receiver_id, cooldown_time) > 0:
         return
 
     # Update cooldown
-    karma_cooldowns[giver_id][receiver_id] = current_time
+    karma_cooldowns.touch(giver_id, receiver_id)
 
     # Update karma
     if db is None:
         return
 
-    user_data = await db.karma.find_one({'user_id': str(receiver_id), 'guild_id': str(reaction.message.guild.id)})
-    if not user_data:
-        user_data = {'user_id': str(receiver_id), 'guild_id': str(reaction.message.guild.id), 'karma': 0}
-
-    old_karma = user_data.get('karma', 0)
-    new_karma = max(0, old_karma + karma_change)  # Don't allow negative karma
-    user_data['karma'] = new_karma
-
-    await db.karma.update_one(
-        {'user_id': str(receiver_id), 'guild_id': str(reaction.message.guild.id)},
-        {'$set': user_data},
-        upsert=True
-    )
+    # Karma never drops below 0; bursts on one message coalesce into a single write
+    old_karma, new_karma = await karma_writes.add(db, payload.guild_id, receiver_id, karma_change)
 
     # Check for level up only on positive karma
     if karma_change > 0:
@@ -610,4 +591,16 @@ async def on_reaction_add(reaction, user):
         new_level_info, _ = get_karma_level_info(new_karma)
 
         if new_level_info and old_level_info and new_level_info["milestone"] > old_level_info["milestone"]:
-            await send_karma_levelup(reaction.message.guild, reaction.message.author, new_karma), create_success_embed, create_error_embed, create_info_embed, create_command_embed, create_warning_embed, create_permission_denied_embed, create_owner_only_embed
+            guild = bot.get_guild(payload.guild_id)
+            if guild is None:
+                return
+            receiver = guild.get_member(receiver_id)
+            if receiver is None:
+                try:
+                    receiver = await guild.fetch_member(receiver_id)
+                except discord.HTTPException:
+                    return
+            await send_karma_levelup(guild, receiver, new_karma)
+
+# Listener rather than @bot.event so reaction roles keep their own on_raw_reaction_add
+bot.add_listener(karma_on_raw_reaction_add, 'on_raw_reaction_add')